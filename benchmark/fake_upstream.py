@@ -0,0 +1,153 @@
+"""
+配信サイトのAPIの代わりに、記録したレスポンス（benchmark/fixtures）を返すサーバ
+
+遅延、エラー（5xx）、YouTube Data APIのクォータ超過を、指定した割合で発生させる。
+
+uv run python -m benchmark.fake_upstream --port 8001 --latency 0.1
+"""
+
+import asyncio
+import random
+from argparse import ArgumentParser
+from collections import Counter
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI, Response
+from pydantic import BaseModel
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+NICOLIVE_API_PATH = "/front/api"
+YTLIVE_API_PATH = "/youtube/v3"
+
+YTLIVE_API_FIXTURES = {
+    "channels": "ytlive_channels.json",
+    "search": "ytlive_search.json",
+    "playlistItems": "ytlive_playlist_items.json",
+    "videos": "ytlive_videos.json",
+}
+
+YTLIVE_QUOTA_EXCEEDED_CONTENT = (
+    b'{"error":{"code":403,"message":"quota exceeded",'
+    b'"errors":[{"reason":"quotaExceeded"}]}}'
+)
+
+
+class FakeUpstreamConfig(BaseModel):
+    latency: float = 0.0
+    """
+    レスポンスを返すまでの遅延（秒）
+    """
+
+    latency_jitter: float = 0.0
+    """
+    遅延に加えるランダムな揺らぎの最大値（秒）
+    """
+
+    error_rate: float = 0.0
+    """
+    500を返す割合
+    """
+
+    quota_error_rate: float = 0.0
+    """
+    YouTube Data APIのクォータ超過（403）を返す割合
+    """
+
+
+class FakeUpstream:
+    def __init__(self, config: FakeUpstreamConfig) -> None:
+        self.config = config
+        self.call_counts: Counter[str] = Counter()
+        """
+        APIとステータスコードごとのリクエスト数（例: "videos 200"）
+        """
+
+        # ファイルの読み込みが計測に影響しないように、起動時に読み込む
+        self.fixtures = {
+            path.name: path.read_bytes() for path in FIXTURES_DIR.glob("*.json")
+        }
+
+        self.app = FastAPI()
+        self.app.add_api_route(
+            f"{NICOLIVE_API_PATH}/v2/user-broadcast-history",
+            self.get_nicolive_user_broadcast_history,
+        )
+        self.app.add_api_route(
+            f"{YTLIVE_API_PATH}/{{api}}",
+            self.get_ytlive_api,
+        )
+
+    async def _respond(
+        self,
+        api: str,
+        fixture_name: str,
+        is_ytlive: bool,
+    ) -> Response:
+        delay = self.config.latency + random.uniform(0, self.config.latency_jitter)
+        if 0 < delay:
+            await asyncio.sleep(delay)
+
+        if is_ytlive and random.random() < self.config.quota_error_rate:
+            status_code = 403
+            content = YTLIVE_QUOTA_EXCEEDED_CONTENT
+        elif random.random() < self.config.error_rate:
+            status_code = 500
+            content = b'{"error":"internal server error"}'
+        else:
+            status_code = 200
+            content = self.fixtures[fixture_name]
+
+        self.call_counts[f"{api} {status_code}"] += 1
+        return Response(
+            content=content,
+            status_code=status_code,
+            media_type="application/json",
+        )
+
+    async def get_nicolive_user_broadcast_history(self) -> Response:
+        return await self._respond(
+            api="user-broadcast-history",
+            fixture_name="nicolive_user_broadcast_history.json",
+            is_ytlive=False,
+        )
+
+    async def get_ytlive_api(self, api: str) -> Response:
+        fixture_name = YTLIVE_API_FIXTURES.get(api)
+        if fixture_name is None:
+            return Response(status_code=404)
+
+        return await self._respond(
+            api=api,
+            fixture_name=fixture_name,
+            is_ytlive=True,
+        )
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake_upstream = FakeUpstream(
+        config=FakeUpstreamConfig(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            error_rate=args.error_rate,
+            quota_error_rate=args.quota_error_rate,
+        ),
+    )
+
+    print(f"NICOLIVE_API_BASE_URL=http://{args.host}:{args.port}{NICOLIVE_API_PATH}")
+    print(f"YTLIVE_API_BASE_URL=http://{args.host}:{args.port}{YTLIVE_API_PATH}")
+    uvicorn.run(fake_upstream.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+配信サイトのAPIのレスポンスのパースの所要時間とメモリ使用量を計測する
+
+以前のパース（json.loadsでdictにしてからmodel_validate）と、
+現在のパース（レスポンスのバイト列から直接model_validate_json）を比較する。
+
+uv run python -m benchmark.parse_upstream_payloads
+"""
+
+import json
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.site.nicolive.fetch_nicolive_user_live import (
+    NicoliveApiUserBroadcastHistory,
+)
+from liveinfo_api_middleware.site.ytlive.fetch_ytlive_channel_live import (
+    YtliveApiChannel,
+    YtliveApiPlaylistItems,
+    YtliveApiSearch,
+    YtliveApiVideo,
+)
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+FIXTURE_CONTENT_TYPES: dict[str, type[BaseModel]] = {
+    "ytlive_channels.json": YtliveApiChannel,
+    "ytlive_search.json": YtliveApiSearch,
+    "ytlive_playlist_items.json": YtliveApiPlaylistItems,
+    "ytlive_videos.json": YtliveApiVideo,
+    "nicolive_user_broadcast_history.json": NicoliveApiUserBroadcastHistory,
+}
+
+
+def parse_via_dict(content: bytes, content_type: type[BaseModel]) -> BaseModel:
+    return content_type.model_validate(json.loads(content))
+
+
+def parse_from_bytes(content: bytes, content_type: type[BaseModel]) -> BaseModel:
+    return content_type.model_validate_json(content)
+
+
+PARSERS: dict[str, Callable[[bytes, type[BaseModel]], BaseModel]] = {
+    "dict": parse_via_dict,
+    "bytes": parse_from_bytes,
+}
+
+
+def measure_duration(
+    parse: Callable[[bytes, type[BaseModel]], BaseModel],
+    content: bytes,
+    content_type: type[BaseModel],
+    number: int,
+) -> float:
+    started_at = time.perf_counter()
+    for _ in range(number):
+        parse(content, content_type)
+
+    return (time.perf_counter() - started_at) / number
+
+
+def measure_peak_memory(
+    parse: Callable[[bytes, type[BaseModel]], BaseModel],
+    content: bytes,
+    content_type: type[BaseModel],
+) -> int:
+    tracemalloc.start()
+    try:
+        parse(content, content_type)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    number: int = args.number
+
+    print(f"{'fixture':<40} {'parser':<6} {'size':>8} {'time':>10} {'peak':>10}")
+    for fixture_name, content_type in FIXTURE_CONTENT_TYPES.items():
+        content = (FIXTURES_DIR / fixture_name).read_bytes()
+
+        for parser_name, parse in PARSERS.items():
+            # 初回の呼び出しの影響を除く
+            parse(content, content_type)
+
+            duration = measure_duration(
+                parse=parse,
+                content=content,
+                content_type=content_type,
+                number=number,
+            )
+            peak = measure_peak_memory(
+                parse=parse,
+                content=content,
+                content_type=content_type,
+            )
+
+            print(
+                f"{fixture_name:<40} {parser_name:<6} "
+                f"{len(content) / 1024:>6.1f}KB "
+                f"{duration * 1_000_000:>8.1f}us "
+                f"{peak / 1024:>8.1f}KB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+記録したレスポンスを返すサーバ（fake_upstream）を配信サイトのAPIの代わりにして
+APIサーバを起動し、指定した並列数でリクエストを送って性能を計測する
+
+スループット、レイテンシ（p50、p99）、配信サイトへのリクエスト数を出力する。
+取得間隔の制御が壊れた場合など、配信サイトへのリクエスト数の増加を検出できる。
+
+uv run python -m benchmark.replay_benchmark --concurrency 32 --requests 5000
+uv run python -m benchmark.replay_benchmark --env BACKGROUND_REFRESH=false
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import httpx
+import uvicorn
+from pydantic import BaseModel
+
+from .fake_upstream import (
+    NICOLIVE_API_PATH,
+    YTLIVE_API_PATH,
+    FakeUpstream,
+    FakeUpstreamConfig,
+)
+
+BENCHMARK_YTLIVE_CHANNEL_ID = "UCxxxxxxxxxxxxxxxxxxxxxx"
+"""
+benchmark/fixturesのレスポンスのチャンネルID
+"""
+
+
+class RequestResult(BaseModel):
+    path: str
+    status_code: int
+    duration: float
+
+
+def _get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+def _start_fake_upstream(
+    fake_upstream: FakeUpstream,
+    port: int,
+) -> tuple[uvicorn.Server, threading.Thread]:
+    server = uvicorn.Server(
+        config=uvicorn.Config(
+            fake_upstream.app,
+            host="127.0.0.1",
+            port=port,
+            log_level="warning",
+        ),
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    return server, thread
+
+
+def _start_api_server(
+    port: int,
+    upstream_port: int,
+    data_dir: Path,
+    env_overrides: dict[str, str],
+) -> subprocess.Popen[bytes]:
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+    env = {
+        **os.environ,
+        "NICOLIVE_USER_ID": "1",
+        "NICOLIVE_DUMP_PATH": str(data_dir / "nicolive.json"),
+        "NICOLIVE_API_BASE_URL": f"{upstream_url}{NICOLIVE_API_PATH}",
+        "YTLIVE_CHANNEL_ID": BENCHMARK_YTLIVE_CHANNEL_ID,
+        "YTLIVE_API_KEY": "benchmark",
+        "YTLIVE_DUMP_PATH": str(data_dir / "ytlive.json"),
+        "YTLIVE_API_BASE_URL": f"{upstream_url}{YTLIVE_API_PATH}",
+        **env_overrides,
+    }
+
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "liveinfo_api_middleware:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+
+def _get_refresh_progress(status: dict[str, Any]) -> tuple[bool, bool]:
+    """
+    /v1/statusから、最初の取得が完了していないソースがあるか、
+    取得に一度も成功していないソースがあるかを返す（取得を開始していないソースは除く）
+    """
+    is_pending = False
+    is_failed = False
+    for source_status in status.values():
+        # ytliveQuotaなど、ソース以外の項目
+        if not isinstance(source_status, dict) or "lastFetched" not in source_status:
+            continue
+
+        if source_status["lastFetched"] is None:
+            continue
+
+        if source_status["lastSucceeded"] is None:
+            if source_status["lastErrored"] is None:
+                is_pending = True
+            else:
+                is_failed = True
+
+    return is_pending, is_failed
+
+
+async def _wait_for_api_server(
+    base_url: str,
+    paths: list[str],
+    timeout: float,
+) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as http_client:
+        while True:
+            try:
+                response = await http_client.get("/v1/status")
+                if response.is_success:
+                    break
+            except httpx.TransportError:
+                pass
+
+            if deadline < time.monotonic():
+                raise TimeoutError("API server did not start")
+
+            await asyncio.sleep(0.1)
+
+        # 最初の取得が完了するまで待つ（取得に失敗した場合は待たない）
+        # 配信情報がない間は404（取得中の場合は503）が返り、
+        # 起動時の取得が計測中の配信サイトへのリクエストとして数えられてしまう
+        while True:
+            # BACKGROUND_REFRESH=falseの場合は、リクエストによって取得が始まる
+            status_codes = [(await http_client.get(path)).status_code for path in paths]
+            is_pending, is_failed = _get_refresh_progress(
+                status=(await http_client.get("/v1/status")).json()
+            )
+            if not is_pending and (
+                is_failed
+                or all(status_code not in (404, 503) for status_code in status_codes)
+            ):
+                break
+
+            if deadline < time.monotonic():
+                raise TimeoutError("First refresh did not complete")
+
+            await asyncio.sleep(0.1)
+
+
+async def _send_requests(
+    base_url: str,
+    paths: list[str],
+    concurrency: int,
+    request_count: int,
+) -> list[RequestResult]:
+    results: list[RequestResult] = []
+    next_index = 0
+
+    async def worker(http_client: httpx.AsyncClient) -> None:
+        nonlocal next_index
+        while next_index < request_count:
+            path = paths[next_index % len(paths)]
+            next_index += 1
+
+            started_at = time.perf_counter()
+            response = await http_client.get(path)
+            results.append(
+                RequestResult(
+                    path=path,
+                    status_code=response.status_code,
+                    duration=time.perf_counter() - started_at,
+                )
+            )
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        limits=httpx.Limits(max_connections=concurrency),
+        timeout=30.0,
+    ) as http_client:
+        await asyncio.gather(*(worker(http_client) for _ in range(concurrency)))
+
+    return results
+
+
+def _format_percentile(durations: list[float], percentile: int) -> str:
+    if len(durations) < 2:
+        return "-"
+
+    quantiles = statistics.quantiles(durations, n=100, method="inclusive")
+    return f"{quantiles[percentile - 1] * 1000:.2f}ms"
+
+
+def _print_report(
+    results: list[RequestResult],
+    elapsed: float,
+    upstream_call_counts: Counter[str],
+) -> None:
+    print(f"{'path':<20} {'requests':>8} {'req/s':>10} {'p50':>10} {'p99':>10}  status")
+    for path in sorted({result.path for result in results}):
+        path_results = [result for result in results if result.path == path]
+        durations = [result.duration for result in path_results]
+        status_counts = Counter(result.status_code for result in path_results)
+
+        print(
+            f"{path:<20} {len(path_results):>8} "
+            f"{len(path_results) / elapsed:>10.1f} "
+            f"{_format_percentile(durations, 50):>10} "
+            f"{_format_percentile(durations, 99):>10}  "
+            + ", ".join(
+                f"{status_code}: {count}"
+                for status_code, count in sorted(status_counts.items())
+            )
+        )
+
+    print(f"total: {len(results)} requests in {elapsed:.2f}s")
+
+    print()
+    print("upstream calls during the benchmark:")
+    if len(upstream_call_counts) == 0:
+        print("  (none)")
+
+    for api_status, count in sorted(upstream_call_counts.items()):
+        print(f"  {api_status}: {count}")
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="リクエストするパス（複数指定可、デフォルト: /v1/nicolive, /v1/ytlive）",
+    )
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--quota-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        help="APIサーバの設定（KEY=VALUE、複数指定可）",
+    )
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    paths: list[str] = args.paths or ["/v1/nicolive", "/v1/ytlive"]
+    env_overrides = dict(env.split("=", 1) for env in args.env)
+
+    fake_upstream = FakeUpstream(
+        config=FakeUpstreamConfig(
+            latency=args.latency,
+            latency_jitter=args.latency_jitter,
+            error_rate=args.error_rate,
+            quota_error_rate=args.quota_error_rate,
+        ),
+    )
+    upstream_port = _get_free_port()
+    upstream_server, upstream_thread = _start_fake_upstream(
+        fake_upstream=fake_upstream,
+        port=upstream_port,
+    )
+
+    port = _get_free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        api_server = _start_api_server(
+            port=port,
+            upstream_port=upstream_port,
+            data_dir=Path(data_dir),
+            env_overrides=env_overrides,
+        )
+        try:
+            asyncio.run(
+                _wait_for_api_server(
+                    base_url=base_url,
+                    paths=paths,
+                    timeout=args.startup_timeout,
+                )
+            )
+
+            # 起動時の取得を除くため、最初の取得の完了時点のリクエスト数を差し引く
+            initial_call_counts = fake_upstream.call_counts.copy()
+
+            started_at = time.perf_counter()
+            results = asyncio.run(
+                _send_requests(
+                    base_url=base_url,
+                    paths=paths,
+                    concurrency=args.concurrency,
+                    request_count=args.requests,
+                )
+            )
+            elapsed = time.perf_counter() - started_at
+
+            _print_report(
+                results=results,
+                elapsed=elapsed,
+                upstream_call_counts=fake_upstream.call_counts - initial_call_counts,
+            )
+        finally:
+            api_server.terminate()
+            api_server.wait()
+
+    upstream_server.should_exit = True
+    upstream_thread.join()
+
+
+if __name__ == "__main__":
+    main()
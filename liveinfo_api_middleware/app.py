@@ -1,11 +1,26 @@
+import asyncio
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import REGISTRY
 
-from .router.nicolive import router as nicolive_router
-from .router.ytlive import router as ytlive_router
+from .export import StaticExporter
+from .metrics import observe_request_duration
+from .refresher import restore_dumps, run_dump_watcher, start_refreshers
+from .router.aggregate import create_aggregate_router
+from .router.metrics import StateCollector
+from .router.metrics import router as metrics_router
+from .router.source import create_source_router
+from .router.status import create_status_router
 from .settings import get_settings
+from .source import get_source_registry
+from .state import get_state
+from .utility.http_client import create_http_client
+from .utility.log_format import setup_logging
+from .utility.tracing import setup_tracing, trace_request
 from .utility.version import get_version
 
 _version = get_version()
@@ -13,14 +28,87 @@ _settings = get_settings()
 
 _cors_allow_origins = _settings.cors_allow_origins.split(",")
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+setup_logging(log_format=_settings.log_format)
+_tracer_provider = setup_tracing(exporter=_settings.tracing_exporter)
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    state = get_state()
+    sources = get_source_registry()
+
+    # 壊れたダンプは別名で退避する
+    # （取得専用のプロセスがある場合は、そのプロセスが退避する）
+    await restore_dumps(
+        settings=settings,
+        state=state,
+        sources=sources,
+        quarantine=settings.process_role == "standalone",
+    )
+
+    dump_writer_task = asyncio.create_task(state.dump_writer.run())
+
+    async with create_http_client(settings=settings) as http_client:
+        app.state.http_client = http_client
+
+        refresher_tasks: list[asyncio.Task[None]] = []
+        if settings.process_role == "standalone" and settings.background_refresh:
+            refresher_tasks = start_refreshers(
+                settings=settings,
+                state=state,
+                sources=sources,
+                http_client=http_client,
+            )
+
+        # 取得専用のプロセスがある場合は、そのプロセスが書き込んだダンプの変更を
+        # /streamの購読者などに通知する
+        if settings.process_role == "server":
+            refresher_tasks.append(
+                asyncio.create_task(
+                    run_dump_watcher(settings=settings, state=state, sources=sources)
+                )
+            )
+
+        # 取得専用のプロセスがある場合は、そのプロセスが書き出す
+        export_tasks: list[asyncio.Task[None]] = []
+        if settings.process_role == "standalone" and settings.export_dir:
+            exporter = StaticExporter(
+                output_dir=settings.export_dir,
+                settings=settings,
+                state=state,
+                sources=sources,
+            )
+            export_tasks.append(asyncio.create_task(exporter.run()))
+
+        try:
+            yield
+        finally:
+            for task in [*refresher_tasks, *export_tasks]:
+                task.cancel()
+            await asyncio.gather(
+                *refresher_tasks,
+                *export_tasks,
+                return_exceptions=True,
+            )
+
+            # 書き込み待ちのダンプを書き込んでから終了する
+            dump_writer_task.cancel()
+            await asyncio.gather(dump_writer_task, return_exceptions=True)
+            await state.dump_writer.close()
+            await asyncio.to_thread(state.cache_backend.close)
+
+            # 出力待ちのスパンを出力する
+            if _tracer_provider is not None:
+                _tracer_provider.shutdown()
+
 
 app = FastAPI(
     title="Live Info API Middleware",
     version=_version,
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -30,5 +118,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(nicolive_router)
-app.include_router(ytlive_router)
+for _source in get_source_registry():
+    app.include_router(create_source_router(source=_source))
+app.include_router(create_aggregate_router(sources=get_source_registry()))
+app.include_router(create_status_router(sources=get_source_registry()))
+app.include_router(metrics_router)
+
+app.middleware("http")(observe_request_duration)
+app.middleware("http")(trace_request)
+
+REGISTRY.register(StateCollector(state=get_state(), sources=get_source_registry()))
@@ -0,0 +1,83 @@
+import asyncio
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from pydantic import BaseModel
+
+from .snapshot import Snapshot
+
+
+class SnapshotBroadcaster[T: BaseModel]:
+    """
+    配信情報の更新を、購読中のすべてのクライアントに配信する
+
+    クライアントごとのキューは上限付きで、受け取りが遅いクライアントのキューが
+    いっぱいの場合は、古い配信情報を捨てて最新の配信情報を入れる。
+    """
+
+    def __init__(self) -> None:
+        self._queues: set[asyncio.Queue[Snapshot[T]]] = set()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._queues)
+
+    @contextmanager
+    def subscribe(self, maxsize: int) -> Iterator[asyncio.Queue[Snapshot[T]]]:
+        queue: asyncio.Queue[Snapshot[T]] = asyncio.Queue(maxsize=max(maxsize, 1))
+        self._queues.add(queue)
+        try:
+            yield queue
+        finally:
+            self._queues.discard(queue)
+
+    def publish(self, snapshot: Snapshot[T]) -> None:
+        """
+        イベントループのスレッドから呼び出す（asyncio.Queueはスレッドセーフではない）
+        """
+        for queue in self._queues:
+            if queue.full():
+                # 最新の配信情報だけが重要なため、古いものから捨てる
+                queue.get_nowait()
+
+            queue.put_nowait(snapshot)
+
+
+class ChangeWaiters:
+    """
+    配信情報の内容の変化を待つリクエスト（ロングポーリング）を管理する
+
+    asyncio.Conditionと同様に、変化があると待ち始めた順にすべてのリクエストを起こす。
+    取得処理（同期的な呼び出し）から起こせるように、ロックは使わない。
+    """
+
+    def __init__(self) -> None:
+        self._waiters: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def waiter_count(self) -> int:
+        return len(self._waiters)
+
+    async def wait(self, timeout: float) -> None:
+        """
+        次のnotify_allまで待つ。timeout秒経過した場合、TimeoutErrorを送出する。
+        """
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            # 起こされた場合は、notify_allで取り除かれている
+            if future in self._waiters:
+                self._waiters.remove(future)
+
+    def notify_all(self) -> None:
+        """
+        イベントループのスレッドから呼び出す
+        """
+        waiters = self._waiters
+        self._waiters = deque()
+        for future in waiters:
+            if not future.done():
+                future.set_result(None)
@@ -0,0 +1,57 @@
+from typing import Literal
+
+from .base import CacheBackend, DumpKey, from_ns, to_ns
+from .file import FileCacheBackend
+from .memory import MemoryCacheBackend
+from .mmap import MmapCacheBackend
+from .redis import RedisCacheBackend
+from .sqlite import SqliteCacheBackend
+
+CacheBackendName = Literal["memory", "file", "mmap", "sqlite", "redis"]
+"""
+配信情報のダンプの保存先
+
+- memory: プロセスのメモリ上（再起動すると失われる）
+- file: ソースごとのJSONファイル（*_DUMP_PATH）
+- mmap: メモリマップしたファイル（同じホストの複数のワーカーで共有する）
+- sqlite: SQLiteデータベース（同じホストの複数のワーカーで共有する）
+- redis: Redis（複数のホスト・コンテナのレプリカで共有する）
+"""
+
+
+def create_cache_backend(
+    backend: CacheBackendName,
+    dump_paths: dict[str, str],
+    mmap_dir: str,
+    sqlite_path: str,
+    redis_url: str,
+    redis_key_prefix: str,
+) -> CacheBackend:
+    if backend == "memory":
+        return MemoryCacheBackend()
+
+    if backend == "mmap":
+        return MmapCacheBackend(directory=mmap_dir)
+
+    if backend == "sqlite":
+        return SqliteCacheBackend(database_path=sqlite_path)
+
+    if backend == "redis":
+        return RedisCacheBackend(url=redis_url, key_prefix=redis_key_prefix)
+
+    return FileCacheBackend(dump_paths=dump_paths)
+
+
+__all__ = [
+    "CacheBackend",
+    "CacheBackendName",
+    "DumpKey",
+    "FileCacheBackend",
+    "MemoryCacheBackend",
+    "MmapCacheBackend",
+    "RedisCacheBackend",
+    "SqliteCacheBackend",
+    "create_cache_backend",
+    "from_ns",
+    "to_ns",
+]
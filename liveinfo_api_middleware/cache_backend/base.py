@@ -0,0 +1,128 @@
+import asyncio
+import os
+import socket
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import ClassVar
+
+from pydantic import BaseModel, ConfigDict
+
+
+class DumpKey(BaseModel):
+    """
+    ダンプが外部（他のプロセス・レプリカ）から変更されたかを判定するためのキー
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    updated_at_ns: int
+    """
+    ダンプの更新時刻（取得時刻として使われる）
+    """
+
+    size: int
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+
+def to_ns(value: datetime) -> int:
+    # floatのタイムスタンプを経由すると、ナノ秒の精度が失われる
+    return (value - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def from_ns(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1_000_000_000, tz=UTC)
+
+
+def get_quarantine_name(name: str) -> str:
+    # 同じ秒に退避しても、以前に退避したダンプを上書きしない
+    # （SQLiteでは一意制約に違反する）
+    timestamp = datetime.now(tz=UTC).strftime("%Y%m%d%H%M%S")
+    return f"{name}.corrupt-{timestamp}-{uuid.uuid4().hex[:8]}"
+
+
+class CacheBackend(ABC):
+    """
+    配信情報のダンプの保存先
+
+    ダンプはソースの名前（nicolive、ytliveなど）ごとに保存する。
+    複数のプロセス・レプリカで共有する保存先は、配信サイトからの取得を
+    1つのプロセスに限定するためのリースを提供する。
+
+    メソッドは、イベントループのスレッドとダンプの書き込みスレッドから呼び出される。
+    """
+
+    blocking: ClassVar[bool] = False
+    """
+    呼び出しがネットワーク・ファイルロックの待ちでブロックする場合True
+
+    イベントループのスレッドからはcallで呼び出す。
+    """
+
+    def __init__(self) -> None:
+        self._instance_id = uuid.uuid4().hex[:8]
+
+    async def call[**P, R](
+        self,
+        function: Callable[P, R],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> R:
+        """
+        イベントループのスレッドから、保存先へアクセスするfunctionを呼び出す。
+
+        ブロックする保存先（blocking）はスレッドで呼び出し、イベントループを止めない。
+        それ以外（メモリ、ファイルのstatなど）は、スレッドの切り替えより速いため直接呼び出す。
+        """
+        if not self.blocking:
+            return function(*args, **kwargs)
+
+        return await asyncio.to_thread(function, *args, **kwargs)
+
+    @property
+    def lease_owner(self) -> str:
+        # fork後のプロセスを区別するため、呼び出すたびにPIDを取得する
+        return f"{socket.gethostname()}:{os.getpid()}:{self._instance_id}"
+
+    @abstractmethod
+    def get_dump_key(self, name: str) -> DumpKey | None: ...
+
+    @abstractmethod
+    def read_dump(self, name: str) -> tuple[bytes, DumpKey] | None: ...
+
+    @abstractmethod
+    def write_dump(self, name: str, content: bytes, updated_at: datetime) -> DumpKey:
+        """
+        ダンプを置き換える。読み込み中のプロセスが書き込み途中の内容を読むことはない。
+        """
+
+    @abstractmethod
+    def touch_dump(self, name: str, updated_at: datetime) -> DumpKey | None:
+        """
+        内容を変えずに更新時刻のみ更新する。ダンプが存在しない場合、Noneを返す。
+        """
+
+    @abstractmethod
+    def quarantine_dump(self, name: str) -> str | None:
+        """
+        壊れたダンプを、調査のために別名で退避する。退避先の名前を返す。
+        """
+
+    def acquire_lease(self, name: str, ttl: timedelta) -> bool:
+        """
+        ttlの間、このプロセスだけがソースを取得する権利（リース）を獲得する。
+
+        他のプロセスがリースを持っている場合、Falseを返す。
+        自身がリースを持っている場合は延長する。
+        共有しない保存先では、常にTrueを返す。
+        """
+        return True
+
+    def close(self) -> None:
+        """
+        接続を閉じる。閉じた後に呼び出された場合、再び接続する。
+        """
+        return None
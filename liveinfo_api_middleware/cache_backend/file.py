@@ -0,0 +1,118 @@
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from .base import CacheBackend, DumpKey, get_quarantine_name, to_ns
+
+
+def _get_dump_key(dump_path: Path) -> DumpKey | None:
+    try:
+        stat_result = dump_path.stat()
+    except FileNotFoundError:
+        return None
+
+    return DumpKey(
+        updated_at_ns=stat_result.st_mtime_ns,
+        size=stat_result.st_size,
+    )
+
+
+def _fsync_directory(directory: Path) -> None:
+    # rename後のディレクトリエントリを永続化する（POSIXのみ）
+    if os.name != "posix":
+        return
+
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+
+class FileCacheBackend(CacheBackend):
+    """
+    ダンプをソースごとのJSONファイルに保存する
+
+    取得時刻はファイルの更新時刻に記録する。
+    同じファイルを参照する他のプロセスは、更新時刻・サイズの変化で変更を検出できるが、
+    リースを提供しないため、それぞれのプロセスが配信サイトから取得する。
+    """
+
+    def __init__(self, dump_paths: dict[str, str]) -> None:
+        super().__init__()
+        self.dump_paths = dump_paths
+
+    def get_dump_path(self, name: str) -> Path:
+        dump_path_string = self.dump_paths.get(name)
+        if not dump_path_string:
+            raise ValueError(f"{name.upper()}_DUMP_PATH is not set")
+
+        return Path(dump_path_string)
+
+    def get_dump_key(self, name: str) -> DumpKey | None:
+        return _get_dump_key(dump_path=self.get_dump_path(name=name))
+
+    def read_dump(self, name: str) -> tuple[bytes, DumpKey] | None:
+        dump_path = self.get_dump_path(name=name)
+
+        dump_key = _get_dump_key(dump_path=dump_path)
+        if dump_key is None:
+            return None
+
+        return dump_path.read_bytes(), dump_key
+
+    def write_dump(self, name: str, content: bytes, updated_at: datetime) -> DumpKey:
+        """
+        一時ファイルに書き込んでfsyncしてからrenameするため、
+        書き込み中にプロセスが終了しても、ダンプファイルが壊れることはない。
+        """
+        dump_path = self.get_dump_path(name=name)
+        dump_path.parent.mkdir(parents=True, exist_ok=True)
+
+        temp_fd, temp_path_string = tempfile.mkstemp(
+            dir=dump_path.parent,
+            prefix=f".{dump_path.name}.",
+            suffix=".tmp",
+        )
+        temp_path = Path(temp_path_string)
+        try:
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                temp_file.write(content)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+
+            # mkstempは所有者のみ読み書きできるファイルを作成するため、
+            # 他のプロセス（コンテナ外など）から読めるようにする
+            temp_path.chmod(0o644)
+            updated_at_ns = to_ns(updated_at)
+            os.utime(temp_path, ns=(updated_at_ns, updated_at_ns))
+            temp_path.replace(dump_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        _fsync_directory(dump_path.parent)
+
+        dump_key = _get_dump_key(dump_path=dump_path)
+        if dump_key is None:
+            raise FileNotFoundError(f"Dump file disappeared after write: {dump_path}")
+
+        return dump_key
+
+    def touch_dump(self, name: str, updated_at: datetime) -> DumpKey | None:
+        dump_path = self.get_dump_path(name=name)
+
+        updated_at_ns = to_ns(updated_at)
+        try:
+            os.utime(dump_path, ns=(updated_at_ns, updated_at_ns))
+        except FileNotFoundError:
+            return None
+
+        return _get_dump_key(dump_path=dump_path)
+
+    def quarantine_dump(self, name: str) -> str | None:
+        dump_path = self.get_dump_path(name=name)
+        quarantine_path = dump_path.with_name(get_quarantine_name(dump_path.name))
+        dump_path.replace(quarantine_path)
+        return str(quarantine_path)
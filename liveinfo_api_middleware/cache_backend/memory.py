@@ -0,0 +1,51 @@
+import threading
+from datetime import datetime
+
+from .base import CacheBackend, DumpKey, to_ns
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    ダンプをプロセスのメモリ上にのみ保持する（再起動すると失われる）
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = threading.Lock()
+        self._dumps: dict[str, tuple[bytes, DumpKey]] = {}
+
+    def get_dump_key(self, name: str) -> DumpKey | None:
+        with self._lock:
+            dump = self._dumps.get(name)
+
+        return dump[1] if dump is not None else None
+
+    def read_dump(self, name: str) -> tuple[bytes, DumpKey] | None:
+        with self._lock:
+            return self._dumps.get(name)
+
+    def write_dump(self, name: str, content: bytes, updated_at: datetime) -> DumpKey:
+        dump_key = DumpKey(updated_at_ns=to_ns(updated_at), size=len(content))
+        with self._lock:
+            self._dumps[name] = (content, dump_key)
+
+        return dump_key
+
+    def touch_dump(self, name: str, updated_at: datetime) -> DumpKey | None:
+        with self._lock:
+            dump = self._dumps.get(name)
+            if dump is None:
+                return None
+
+            content, _ = dump
+            dump_key = DumpKey(updated_at_ns=to_ns(updated_at), size=len(content))
+            self._dumps[name] = (content, dump_key)
+
+        return dump_key
+
+    def quarantine_dump(self, name: str) -> str | None:
+        # メモリ上のダンプは検証済みの配信情報から作られるため、壊れることはない
+        with self._lock:
+            self._dumps.pop(name, None)
+
+        return None
@@ -0,0 +1,256 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from .base import CacheBackend, DumpKey, get_quarantine_name, to_ns
+
+# シーケンス番号、世代、更新時刻（ナノ秒）、サイズ
+HEADER_STRUCT = struct.Struct("<QQqQ")
+SEQUENCE_STRUCT = struct.Struct("<Q")
+
+# 書き込みと競合した場合に読み直す回数
+READ_RETRIES = 100
+
+
+class _Header:
+    """
+    ソースごとのヘッダファイルをメモリマップしたもの
+
+    書き込み側はシーケンス番号を奇数にしてからフィールドを書き換え、偶数に戻す（seqlock）。
+    読み込み側は、前後でシーケンス番号が一致して偶数の場合のみ値を採用する。
+    """
+
+    def __init__(self, buffer: mmap.mmap) -> None:
+        self.buffer = buffer
+
+    def read(self) -> tuple[int, int, int] | None:
+        """
+        世代、更新時刻、サイズを返す。書き込みと競合し続けた場合、Noneを返す。
+        """
+        for _ in range(READ_RETRIES):
+            sequence, generation, updated_at_ns, size = HEADER_STRUCT.unpack_from(
+                self.buffer
+            )
+            if sequence % 2 == 1:
+                continue
+
+            (sequence_after,) = SEQUENCE_STRUCT.unpack_from(self.buffer)
+            if sequence == sequence_after:
+                return generation, updated_at_ns, size
+
+        return None
+
+    def write(self, generation: int, updated_at_ns: int, size: int) -> None:
+        (sequence,) = SEQUENCE_STRUCT.unpack_from(self.buffer)
+        SEQUENCE_STRUCT.pack_into(self.buffer, 0, sequence + 1)
+        HEADER_STRUCT.pack_into(
+            self.buffer, 0, sequence + 1, generation, updated_at_ns, size
+        )
+        SEQUENCE_STRUCT.pack_into(self.buffer, 0, sequence + 2)
+
+    def close(self) -> None:
+        self.buffer.close()
+
+
+class MmapCacheBackend(CacheBackend):
+    """
+    ダンプをディレクトリ上のメモリマップしたファイルで共有する
+
+    ソースごとに、最新のダンプの世代・更新時刻・サイズを持つヘッダファイル（{name}.header）と、
+    世代ごとの内容のファイル（{name}.{世代}）を置く。
+    ダンプの変更の確認はメモリマップしたヘッダの読み込みのみで行い、システムコールを発生させない。
+
+    同じホストの複数のプロセス（ワーカー）で共有する。書き込むプロセスは1つに限る
+    （CLIのserveコマンドでは、取得専用のプロセス）。
+    ディレクトリをtmpfs（/dev/shmなど）に置くと、ディスクへの書き込みも発生しない。
+    """
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        self.directory = directory
+
+        self._lock = threading.Lock()
+        self._headers: dict[str, _Header] = {}
+
+    def _get_directory(self) -> Path:
+        if not self.directory:
+            raise ValueError("CACHE_MMAP_DIR is not set")
+
+        return Path(self.directory)
+
+    def _get_content_path(self, name: str, generation: int) -> Path:
+        return self._get_directory() / f"{name}.{generation}"
+
+    def _get_header(self, name: str, create: bool) -> _Header | None:
+        header = self._headers.get(name)
+        if header is not None:
+            return header
+
+        header_path = self._get_directory() / f"{name}.header"
+        if create and not header_path.exists():
+            header_path.parent.mkdir(parents=True, exist_ok=True)
+            # 読み込み側がサイズの足りないファイルをマップしないように、
+            # 初期化したファイルをrenameで配置する
+            temp_fd, temp_path_string = tempfile.mkstemp(
+                dir=header_path.parent,
+                prefix=f".{header_path.name}.",
+                suffix=".tmp",
+            )
+            with os.fdopen(temp_fd, "wb") as temp_file:
+                temp_file.write(bytes(HEADER_STRUCT.size))
+            Path(temp_path_string).chmod(0o644)
+            Path(temp_path_string).replace(header_path)
+
+        try:
+            fd = os.open(header_path, os.O_RDWR)
+            access = mmap.ACCESS_WRITE
+        except PermissionError:
+            # 書き込まないプロセスは、読み込み権限のみでよい
+            fd = os.open(header_path, os.O_RDONLY)
+            access = mmap.ACCESS_READ
+        except FileNotFoundError:
+            return None
+
+        try:
+            header = _Header(
+                buffer=mmap.mmap(fd, HEADER_STRUCT.size, access=access),
+            )
+        finally:
+            os.close(fd)
+
+        self._headers[name] = header
+        return header
+
+    def _read_header(self, name: str) -> tuple[int, int, int] | None:
+        with self._lock:
+            header = self._get_header(name=name, create=False)
+
+        if header is None:
+            return None
+
+        fields = header.read()
+        if fields is None or fields[0] == 0:
+            # 世代0は、ダンプが存在しないことを表す
+            return None
+
+        return fields
+
+    def get_dump_key(self, name: str) -> DumpKey | None:
+        fields = self._read_header(name=name)
+        if fields is None:
+            return None
+
+        _, updated_at_ns, size = fields
+        return DumpKey(updated_at_ns=updated_at_ns, size=size)
+
+    def read_dump(self, name: str) -> tuple[bytes, DumpKey] | None:
+        for _ in range(READ_RETRIES):
+            fields = self._read_header(name=name)
+            if fields is None:
+                return None
+
+            generation, updated_at_ns, _ = fields
+            try:
+                content = self._get_content_path(
+                    name=name,
+                    generation=generation,
+                ).read_bytes()
+            except FileNotFoundError:
+                # 読み込む前に次の世代が書き込まれ、削除された
+                continue
+
+            return content, DumpKey(updated_at_ns=updated_at_ns, size=len(content))
+
+        return None
+
+    def write_dump(self, name: str, content: bytes, updated_at: datetime) -> DumpKey:
+        dump_key = DumpKey(updated_at_ns=to_ns(updated_at), size=len(content))
+        with self._lock:
+            header = self._get_header(name=name, create=True)
+            if header is None:
+                raise FileNotFoundError(f"Dump header disappeared: {name}")
+
+            fields = header.read()
+            generation = (fields[0] if fields is not None else 0) + 1
+
+            content_path = self._get_content_path(name=name, generation=generation)
+            temp_fd, temp_path_string = tempfile.mkstemp(
+                dir=content_path.parent,
+                prefix=f".{content_path.name}.",
+                suffix=".tmp",
+            )
+            temp_path = Path(temp_path_string)
+            try:
+                with os.fdopen(temp_fd, "wb") as temp_file:
+                    temp_file.write(content)
+                temp_path.chmod(0o644)
+                temp_path.replace(content_path)
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+
+            header.write(
+                generation=generation,
+                updated_at_ns=dump_key.updated_at_ns,
+                size=dump_key.size,
+            )
+
+            # 読み込み中のプロセスのために、1つ前の世代は残す
+            if generation > 2:
+                self._get_content_path(
+                    name=name,
+                    generation=generation - 2,
+                ).unlink(missing_ok=True)
+
+        return dump_key
+
+    def touch_dump(self, name: str, updated_at: datetime) -> DumpKey | None:
+        with self._lock:
+            header = self._get_header(name=name, create=False)
+            if header is None:
+                return None
+
+            fields = header.read()
+            if fields is None or fields[0] == 0:
+                return None
+
+            generation, _, size = fields
+            updated_at_ns = to_ns(updated_at)
+            header.write(generation=generation, updated_at_ns=updated_at_ns, size=size)
+
+        return DumpKey(updated_at_ns=updated_at_ns, size=size)
+
+    def quarantine_dump(self, name: str) -> str | None:
+        with self._lock:
+            header = self._get_header(name=name, create=False)
+            if header is None:
+                return None
+
+            fields = header.read()
+            if fields is None or fields[0] == 0:
+                return None
+
+            generation = fields[0]
+            content_path = self._get_content_path(name=name, generation=generation)
+            quarantine_path = content_path.with_name(get_quarantine_name(name))
+            content_path.replace(quarantine_path)
+            self._get_content_path(
+                name=name,
+                generation=generation - 1,
+            ).unlink(missing_ok=True)
+
+            header.write(generation=0, updated_at_ns=0, size=0)
+
+        return str(quarantine_path)
+
+    def close(self) -> None:
+        with self._lock:
+            headers = list(self._headers.values())
+            self._headers.clear()
+
+        for header in headers:
+            header.close()
@@ -0,0 +1,144 @@
+import threading
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING
+
+from .base import CacheBackend, DumpKey, get_quarantine_name, to_ns
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+TOUCH_DUMP_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+redis.call('HSET', KEYS[1], 'updated_at_ns', ARGV[1])
+return redis.call('HGET', KEYS[1], 'size')
+"""
+
+ACQUIRE_LEASE_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+if owner == false or owner == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    ダンプをRedis（Redisプロトコル互換のサーバ）に保存する
+
+    複数のホスト・コンテナのレプリカで共有する。
+    リースの期限はRedisサーバの時計で判定する。
+
+    redis extraが必要。
+    """
+
+    blocking = True
+
+    def __init__(self, url: str, key_prefix: str) -> None:
+        super().__init__()
+        self.url = url
+        self.key_prefix = key_prefix
+
+        self._lock = threading.Lock()
+        self._client: Redis | None = None
+
+    def _get_client(self) -> "Redis":
+        with self._lock:
+            if self._client is None:
+                if not self.url:
+                    raise ValueError("CACHE_REDIS_URL is not set")
+
+                try:
+                    from redis import Redis
+                except ImportError as error:
+                    raise RuntimeError(
+                        "CACHE_BACKEND=redis requires the 'redis' extra: "
+                        "pip install liveinfo-api-middleware[redis]"
+                    ) from error
+
+                # 接続プールはスレッドセーフなため、書き込みスレッドと共有する
+                self._client = Redis.from_url(self.url)
+
+            return self._client
+
+    def _get_dump_redis_key(self, name: str) -> str:
+        return f"{self.key_prefix}dump:{name}"
+
+    def _get_lease_redis_key(self, name: str) -> str:
+        return f"{self.key_prefix}lease:{name}"
+
+    def get_dump_key(self, name: str) -> DumpKey | None:
+        updated_at_ns, size = self._get_client().hmget(
+            self._get_dump_redis_key(name=name),
+            ["updated_at_ns", "size"],
+        )
+        if updated_at_ns is None or size is None:
+            return None
+
+        return DumpKey(updated_at_ns=int(updated_at_ns), size=int(size))
+
+    def read_dump(self, name: str) -> tuple[bytes, DumpKey] | None:
+        content, updated_at_ns = self._get_client().hmget(
+            self._get_dump_redis_key(name=name),
+            ["content", "updated_at_ns"],
+        )
+        # decode_responsesを指定していないため、bytesで返る
+        if not isinstance(content, bytes) or updated_at_ns is None:
+            return None
+
+        return content, DumpKey(updated_at_ns=int(updated_at_ns), size=len(content))
+
+    def write_dump(self, name: str, content: bytes, updated_at: datetime) -> DumpKey:
+        dump_key = DumpKey(updated_at_ns=to_ns(updated_at), size=len(content))
+        # 1つのコマンドで書き込むため、書き込み途中の内容が読まれることはない
+        self._get_client().hset(
+            self._get_dump_redis_key(name=name),
+            mapping={
+                "content": content,
+                "updated_at_ns": dump_key.updated_at_ns,
+                "size": dump_key.size,
+            },
+        )
+        return dump_key
+
+    def touch_dump(self, name: str, updated_at: datetime) -> DumpKey | None:
+        updated_at_ns = to_ns(updated_at)
+        size = self._get_client().eval(
+            TOUCH_DUMP_SCRIPT,
+            1,
+            self._get_dump_redis_key(name=name),
+            updated_at_ns,
+        )
+        if size is None:
+            return None
+
+        return DumpKey(updated_at_ns=updated_at_ns, size=int(size))
+
+    def quarantine_dump(self, name: str) -> str | None:
+        quarantine_name = get_quarantine_name(name)
+        self._get_client().rename(
+            self._get_dump_redis_key(name=name),
+            self._get_dump_redis_key(name=quarantine_name),
+        )
+        return quarantine_name
+
+    def acquire_lease(self, name: str, ttl: timedelta) -> bool:
+        acquired = self._get_client().eval(
+            ACQUIRE_LEASE_SCRIPT,
+            1,
+            self._get_lease_redis_key(name=name),
+            self.lease_owner,
+            max(ttl // timedelta(milliseconds=1), 1),
+        )
+        return int(acquired) == 1
+
+    def close(self) -> None:
+        with self._lock:
+            client = self._client
+            self._client = None
+
+        if client is not None:
+            client.close()
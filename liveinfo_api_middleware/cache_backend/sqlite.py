@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from .base import CacheBackend, DumpKey, get_quarantine_name, to_ns
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dumps (
+    name TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    updated_at_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at_ns INTEGER NOT NULL
+);
+"""
+
+ACQUIRE_LEASE_SQL = """
+INSERT INTO leases (name, owner, expires_at_ns) VALUES (?, ?, ?)
+ON CONFLICT (name) DO UPDATE
+SET owner = excluded.owner, expires_at_ns = excluded.expires_at_ns
+WHERE leases.owner = excluded.owner OR leases.expires_at_ns <= ?
+"""
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    ダンプを1つのSQLiteデータベースに保存する
+
+    同じホストの複数のプロセス（ワーカー）でデータベースファイルを共有する。
+    ロックはSQLiteのファイルロックで行う（NFSなどのネットワークファイルシステムには
+    置かないこと）。
+    """
+
+    # 他のプロセスの書き込み中は、ロックの解放を最大busy_timeout秒待つ
+    blocking = True
+
+    def __init__(self, database_path: str, busy_timeout: float = 5.0) -> None:
+        super().__init__()
+        self.database_path = database_path
+        self.busy_timeout = busy_timeout
+
+        self._lock = threading.Lock()
+        # fork後に接続を共有しないように、最初に使うときに接続する
+        self._connection: sqlite3.Connection | None = None
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if not self.database_path:
+                raise ValueError("CACHE_SQLITE_PATH is not set")
+
+            Path(self.database_path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.database_path,
+                timeout=self.busy_timeout,
+                # 書き込みスレッドからも使うため、ロックで保護する
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            # 書き込み中も他のプロセスが読み込めるようにする
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._connection = connection
+
+        return self._connection
+
+    def get_dump_key(self, name: str) -> DumpKey | None:
+        with self._lock:
+            row = (
+                self._get_connection()
+                .execute(
+                    "SELECT updated_at_ns, length(content) FROM dumps WHERE name = ?",
+                    (name,),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            return None
+
+        return DumpKey(updated_at_ns=row[0], size=row[1])
+
+    def read_dump(self, name: str) -> tuple[bytes, DumpKey] | None:
+        with self._lock:
+            row = (
+                self._get_connection()
+                .execute(
+                    "SELECT content, updated_at_ns FROM dumps WHERE name = ?",
+                    (name,),
+                )
+                .fetchone()
+            )
+
+        if row is None:
+            return None
+
+        content: bytes = row[0]
+        return content, DumpKey(updated_at_ns=row[1], size=len(content))
+
+    def write_dump(self, name: str, content: bytes, updated_at: datetime) -> DumpKey:
+        dump_key = DumpKey(updated_at_ns=to_ns(updated_at), size=len(content))
+        with self._lock:
+            self._get_connection().execute(
+                "INSERT OR REPLACE INTO dumps (name, content, updated_at_ns) "
+                "VALUES (?, ?, ?)",
+                (name, content, dump_key.updated_at_ns),
+            )
+
+        return dump_key
+
+    def touch_dump(self, name: str, updated_at: datetime) -> DumpKey | None:
+        updated_at_ns = to_ns(updated_at)
+        with self._lock:
+            # 文を最後まで実行してコミットするため、fetchallで読み切る
+            rows = (
+                self._get_connection()
+                .execute(
+                    "UPDATE dumps SET updated_at_ns = ? WHERE name = ? "
+                    "RETURNING length(content)",
+                    (updated_at_ns, name),
+                )
+                .fetchall()
+            )
+
+        if len(rows) == 0:
+            return None
+
+        return DumpKey(updated_at_ns=updated_at_ns, size=rows[0][0])
+
+    def quarantine_dump(self, name: str) -> str | None:
+        quarantine_name = get_quarantine_name(name)
+        with self._lock:
+            self._get_connection().execute(
+                "UPDATE dumps SET name = ? WHERE name = ?",
+                (quarantine_name, name),
+            )
+
+        return quarantine_name
+
+    def acquire_lease(self, name: str, ttl: timedelta) -> bool:
+        # 同じホストのプロセス間でのみ共有するため、ホストの時計で期限を判定する
+        now_ns = time.time_ns()
+        expires_at_ns = now_ns + ttl // timedelta(microseconds=1) * 1000
+        with self._lock:
+            cursor = self._get_connection().execute(
+                ACQUIRE_LEASE_SQL,
+                (name, self.lease_owner, expires_at_ns, now_ns),
+            )
+
+        return cursor.rowcount == 1
+
+    def close(self) -> None:
+        with self._lock:
+            connection = self._connection
+            self._connection = None
+
+        if connection is not None:
+            connection.close()
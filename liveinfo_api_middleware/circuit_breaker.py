@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+from typing import Literal
+
+from pydantic import BaseModel
+
+from .utility.upstream_error import UpstreamErrorKind
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreakerPolicy(BaseModel):
+    failure_threshold: int
+    """
+    連続して失敗した場合に遮断する回数
+    """
+
+    reset_timeout: timedelta
+    """
+    遮断してから、取得を再開（half-open）するまでの時間
+    """
+
+
+class CircuitOpenError(Exception):
+    """
+    配信サイトへのアクセスを遮断しているため、取得しなかった
+    """
+
+    def __init__(self, open_until: datetime) -> None:
+        super().__init__(f"Circuit is open until {open_until.isoformat()}")
+        self.open_until = open_until
+
+
+class CircuitBreaker:
+    """
+    失敗が続いている配信サイトへのアクセスを一時的に遮断する
+
+    - closed: 通常通り取得する
+    - open: reset_timeoutが経過するまで取得しない
+    - half_open: 1回だけ取得を試み、成功すればclosed、失敗すればopenに戻る
+
+    クォータ超過の場合、待っても回復しないため、1回の失敗で遮断する。
+    """
+
+    def __init__(self) -> None:
+        self.state: CircuitState = "closed"
+        self.consecutive_failures = 0
+        self.open_until: datetime | None = None
+
+    def before_call(self, now: datetime) -> None:
+        if self.state != "open" or self.open_until is None:
+            return
+
+        if now < self.open_until:
+            raise CircuitOpenError(open_until=self.open_until)
+
+        self.state = "half_open"
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.open_until = None
+
+    def record_failure(
+        self,
+        now: datetime,
+        kind: UpstreamErrorKind | None,
+        policy: CircuitBreakerPolicy,
+    ) -> None:
+        self.consecutive_failures += 1
+
+        if (
+            self.state == "half_open"
+            or kind == "quota_exceeded"
+            or policy.failure_threshold <= self.consecutive_failures
+        ):
+            self.state = "open"
+            self.open_until = now + policy.reset_timeout
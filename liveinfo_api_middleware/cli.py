@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from argparse import ArgumentParser
+
+import uvicorn
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from prometheus_client import start_http_server
+
+from .export import StaticExporter
+from .refresher import restore_dumps, start_refreshers
+from .settings import get_settings
+from .source import get_source_registry
+from .state import get_state
+from .utility.http_client import create_http_client
+
+logger = logging.getLogger(__name__)
+
+REFRESHER_RESTART_DELAY = 5.0  # in seconds
+REFRESHER_STOP_TIMEOUT = 30.0  # in seconds
+
+
+async def run_refresher_process(export_dir: str) -> None:
+    """
+    バックグラウンドでの取得とダンプの書き込みを、終了するまで続ける（APIは提供しない）
+
+    export_dirが空でない場合、配信情報の内容が変化するたびに静的ファイルも書き出す。
+    REFRESHER_METRICS_PORTが0でない場合、取得に関するメトリクスを/metricsで公開する
+    （APIサーバのワーカーは取得しないため、ワーカーの/metricsには記録されない）。
+    """
+    settings = get_settings()
+    state = get_state()
+    sources = get_source_registry()
+
+    # StateCollectorは、パッケージの読み込み時（app）に登録されている
+    if settings.refresher_metrics_port > 0:
+        metrics_server, _ = start_http_server(port=settings.refresher_metrics_port)
+        logger.info(
+            "Serving refresher metrics on port %d", settings.refresher_metrics_port
+        )
+    else:
+        metrics_server = None
+
+    # SIGTERMでも、書き込み待ちのダンプを書き込んでから終了する
+    stopping = asyncio.Event()
+    if os.name == "posix":
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+
+    # 壊れたダンプは別名で退避する
+    await restore_dumps(
+        settings=settings,
+        state=state,
+        sources=sources,
+        quarantine=True,
+    )
+
+    dump_writer_task = asyncio.create_task(state.dump_writer.run())
+
+    export_tasks: list[asyncio.Task[None]] = []
+    if export_dir:
+        exporter = StaticExporter(
+            output_dir=export_dir,
+            settings=settings,
+            state=state,
+            sources=sources,
+        )
+        export_tasks.append(asyncio.create_task(exporter.run()))
+
+    async with create_http_client(settings=settings) as http_client:
+        refresher_tasks = start_refreshers(
+            settings=settings,
+            state=state,
+            sources=sources,
+            http_client=http_client,
+        )
+        logger.info("Started refresher process (%d sources)", len(refresher_tasks))
+
+        try:
+            await stopping.wait()
+        finally:
+            for task in [*refresher_tasks, *export_tasks]:
+                task.cancel()
+            await asyncio.gather(
+                *refresher_tasks,
+                *export_tasks,
+                return_exceptions=True,
+            )
+
+            dump_writer_task.cancel()
+            await asyncio.gather(dump_writer_task, return_exceptions=True)
+            await state.dump_writer.close()
+            await asyncio.to_thread(state.cache_backend.close)
+
+            if metrics_server is not None:
+                metrics_server.shutdown()
+
+            # 出力待ちのスパンを出力する
+            tracer_provider = trace.get_tracer_provider()
+            if isinstance(tracer_provider, TracerProvider):
+                tracer_provider.shutdown()
+
+
+class RefresherSupervisor:
+    """
+    取得専用のプロセスを子プロセスとして起動し、終了した場合は再起動する
+    """
+
+    def __init__(self, env: dict[str, str]) -> None:
+        self.env = env
+
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._process: subprocess.Popen[bytes] | None = None
+        self._thread = threading.Thread(
+            target=self._run,
+            name="refresher-supervisor",
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._stopping.is_set():
+                    return
+
+                self._process = subprocess.Popen(
+                    [sys.executable, "-m", "liveinfo_api_middleware.cli", "refresher"],
+                    env=self.env,
+                    # 端末からのSIGINTは受け取らず、stopで終了する
+                    start_new_session=True,
+                )
+                process = self._process
+
+            returncode = process.wait()
+            if self._stopping.is_set():
+                return
+
+            logger.error(
+                "Refresher process exited with code %d, restarting in %.1f seconds",
+                returncode,
+                REFRESHER_RESTART_DELAY,
+            )
+            self._stopping.wait(REFRESHER_RESTART_DELAY)
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopping.set()
+            process = self._process
+
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=REFRESHER_STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+        self._thread.join()
+
+
+def serve(host: str, port: int, workers: int) -> None:
+    """
+    取得専用のプロセスと、ダンプを読み込んでAPIを提供する複数のワーカーを起動する
+
+    各サービスへのアクセスは、ワーカーの数によらず取得間隔ごとに1回になる。
+    """
+    settings = get_settings()
+    if settings.cache_backend == "memory":
+        raise SystemExit(
+            "CACHE_BACKEND=memory cannot be shared between processes; "
+            "use mmap, file, sqlite or redis"
+        )
+
+    supervisor = RefresherSupervisor(env=dict(os.environ))
+
+    # ワーカーは取得せず、取得専用のプロセスが書き込んだダンプを読み込む
+    os.environ["PROCESS_ROLE"] = "server"
+    # ワーカーが1つの場合、このプロセスでAPIを提供するため、設定を読み直す
+    get_settings.cache_clear()
+
+    supervisor.start()
+    try:
+        uvicorn.run(
+            "liveinfo_api_middleware:app",
+            host=host,
+            port=port,
+            workers=workers,
+        )
+    finally:
+        supervisor.stop()
+
+
+def main() -> None:
+    parser = ArgumentParser(prog="liveinfo-api-middleware")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="start a refresher process and API server workers",
+    )
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    subparsers.add_parser(
+        "refresher",
+        help="fetch from upstream services and write dumps without serving the API",
+    )
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="fetch from upstream services and write static files for CDN serving",
+    )
+    export_parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="output directory (default: EXPORT_DIR)",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(host=args.host, port=args.port, workers=args.workers)
+    elif args.command == "refresher":
+        asyncio.run(run_refresher_process(export_dir=get_settings().export_dir))
+    elif args.command == "export":
+        export_dir = args.output_dir or get_settings().export_dir
+        if not export_dir:
+            parser.error("export requires --output-dir or EXPORT_DIR")
+
+        asyncio.run(run_refresher_process(export_dir=export_dir))
+
+
+if __name__ == "__main__":
+    main()
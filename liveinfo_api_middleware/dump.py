@@ -0,0 +1,188 @@
+import asyncio
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import getLogger
+from typing import Any, NamedTuple
+
+from opentelemetry import trace
+from pydantic import BaseModel
+
+from .cache_backend import CacheBackend, DumpKey, from_ns
+from .metrics import DUMP_DURATION
+from .snapshot import Snapshot, create_snapshot
+
+logger = getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+
+def read_dump[T: BaseModel](
+    cache_backend: CacheBackend,
+    name: str,
+    content_type: type[T],
+) -> tuple[Snapshot[T], DumpKey] | None:
+    with (
+        tracer.start_as_current_span("dump read"),
+        DUMP_DURATION.labels(operation="read").time(),
+    ):
+        dump = cache_backend.read_dump(name=name)
+        if dump is None:
+            return None
+
+        content_json, dump_key = dump
+        content = content_type.model_validate_json(content_json)
+
+    # 取得時刻はダンプの更新時刻で代用する
+    fetched_at = from_ns(dump_key.updated_at_ns)
+
+    return create_snapshot(content=content, fetched_at=fetched_at), dump_key
+
+
+class _PendingDump(NamedTuple):
+    # 配信情報は検証済みのため、pydanticのモデルにしない
+    snapshot: Snapshot[Any]
+    on_written: Callable[[DumpKey], None]
+    on_error: Callable[[BaseException], None]
+
+
+class _WrittenDump(NamedTuple):
+    etag: str
+    dump_key: DumpKey
+
+
+class DumpWriter:
+    """
+    ダンプを専用のスレッドで書き込む
+
+    取得処理はダンプの書き込みを待たない。
+    同じダンプへの書き込みが溜まっている場合、最新の配信情報のみ書き込む。
+    内容が前回書き込んだものと同じ場合、書き込まずに更新時刻のみ更新する
+    （更新時刻は、再起動時や他のプロセスで取得時刻として使われる）。
+    """
+
+    def __init__(self, cache_backend: CacheBackend) -> None:
+        self.cache_backend = cache_backend
+
+        self._pending: dict[str, _PendingDump] = {}
+        self._writing: str | None = None
+
+        # runの実行中のみ存在する
+        self._executor: ThreadPoolExecutor | None = None
+        self._wakeup: asyncio.Event | None = None
+
+        # 書き込みスレッドからのみ読み書きする
+        self._written: dict[str, _WrittenDump] = {}
+
+    def schedule[T: BaseModel](
+        self,
+        name: str,
+        snapshot: Snapshot[T],
+        on_written: Callable[[DumpKey], None],
+        on_error: Callable[[BaseException], None],
+    ) -> None:
+        # 書き込み前の古い配信情報は、新しい配信情報で置き換える
+        self._pending[name] = _PendingDump(
+            snapshot=snapshot,
+            on_written=on_written,
+            on_error=on_error,
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def is_writing(self, name: str) -> bool:
+        """
+        書き込み待ち・書き込み中の場合Trueを返す
+
+        書き込み中のダンプを外部からの変更として読み込むと、
+        メモリ上の新しい配信情報が古い配信情報で上書きされるため、読み込まない。
+        """
+        return name in self._pending or name == self._writing
+
+    def _write(self, name: str, snapshot: Snapshot[Any]) -> DumpKey:
+        dump_key: DumpKey | None = None
+
+        written = self._written.get(name)
+        if (
+            written is not None
+            and written.etag == snapshot.etag
+            and written.dump_key == self.cache_backend.get_dump_key(name=name)
+        ):
+            with (
+                tracer.start_as_current_span("dump touch"),
+                DUMP_DURATION.labels(operation="touch").time(),
+            ):
+                dump_key = self.cache_backend.touch_dump(
+                    name=name,
+                    updated_at=snapshot.fetched_at,
+                )
+
+        if dump_key is None:
+            with (
+                tracer.start_as_current_span("dump write"),
+                DUMP_DURATION.labels(operation="write").time(),
+            ):
+                dump_key = self.cache_backend.write_dump(
+                    name=name,
+                    content=snapshot.content_json,
+                    updated_at=snapshot.fetched_at,
+                )
+
+        self._written[name] = _WrittenDump(etag=snapshot.etag, dump_key=dump_key)
+        return dump_key
+
+    async def flush(self) -> None:
+        """
+        書き込み待ちのダンプをすべて書き込む
+        """
+        executor = self._executor
+        if executor is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            name = next(iter(self._pending))
+            pending = self._pending.pop(name)
+
+            self._writing = name
+            try:
+                dump_key = await loop.run_in_executor(
+                    executor,
+                    partial(self._write, name, pending.snapshot),
+                )
+            except Exception as error:
+                logger.exception("Failed to write %s dump", name)
+                pending.on_error(error)
+            else:
+                pending.on_written(dump_key)
+            finally:
+                self._writing = None
+
+    async def run(self) -> None:
+        """
+        書き込みスレッドを開始し、書き込み待ちのダンプを書き込み続ける
+        """
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="dump-writer",
+        )
+        wakeup = asyncio.Event()
+        self._wakeup = wakeup
+
+        # 開始前に書き込み待ちになったダンプも書き込む
+        wakeup.set()
+        while True:
+            await wakeup.wait()
+            wakeup.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        """
+        書き込み待ちのダンプを書き込んでから、書き込みスレッドを終了する
+        """
+        await self.flush()
+
+        executor = self._executor
+        self._executor = None
+        self._wakeup = None
+        if executor is not None:
+            await asyncio.to_thread(executor.shutdown, wait=True)
@@ -0,0 +1,286 @@
+import asyncio
+import gzip
+import os
+import tempfile
+from collections.abc import Callable, Iterable
+from datetime import UTC, datetime
+from logging import getLogger
+from pathlib import Path, PurePosixPath
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+
+from .cache_backend import to_ns
+from .settings import Settings
+from .snapshot import Snapshot
+from .source import KeyedSource, Source
+from .state import State
+
+logger = getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+
+ENCODING_EXTENSIONS = {"gzip": "gz", "br": "br"}
+"""
+圧縮形式（Content-Encoding）ごとの、圧縮したファイルの拡張子
+"""
+
+
+class ExportedFile(BaseModel):
+    file: str
+    """
+    出力ディレクトリからの相対パス（圧縮したファイルは、これに.gz、.brを付けたもの）
+    """
+
+    etag: str
+    """
+    APIのETagヘッダと同じ値（引用符を含む）
+    """
+
+    version: int
+    """
+    APIのX-Snapshot-Versionヘッダと同じ値（プロセスごとの番号）
+    """
+
+    lastModified: str
+    fetchedAt: datetime
+    size: int
+    encodings: list[str]
+
+
+class Manifest(BaseModel):
+    generatedAt: datetime
+    files: dict[str, ExportedFile]
+    """
+    APIのパス（/v1/nicoliveなど）ごとの出力したファイル
+    """
+
+
+class _PendingFile(NamedTuple):
+    api_path: str
+    version: int
+    snapshot: Snapshot[Any]
+
+
+def _get_brotli_compress() -> Callable[[bytes], bytes]:
+    try:
+        import brotli
+    except ImportError as error:
+        raise RuntimeError(
+            "EXPORT_BROTLI=true requires the 'brotli' extra: "
+            "pip install liveinfo-api-middleware[brotli]"
+        ) from error
+
+    def compress(content: bytes) -> bytes:
+        return bytes(brotli.compress(content, quality=11))
+
+    return compress
+
+
+def _is_safe_key(key: str) -> bool:
+    # キーはパスの1要素としてそのまま使う
+    return key not in ("", ".", "..") and PurePosixPath(key).name == key
+
+
+def _write_file(path: Path, content: bytes, updated_at: datetime) -> None:
+    """
+    一時ファイルに書き込んでからrenameするため、配信中のファイルが途中の状態になることはない。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    temp_fd, temp_path_string = tempfile.mkstemp(
+        dir=path.parent,
+        prefix=f".{path.name}.",
+        suffix=".tmp",
+    )
+    temp_path = Path(temp_path_string)
+    try:
+        with os.fdopen(temp_fd, "wb") as temp_file:
+            temp_file.write(content)
+
+        # mkstempは所有者のみ読み書きできるファイルを作成するため、
+        # エッジサーバー（別のユーザー）から読めるようにする
+        temp_path.chmod(0o644)
+        # エッジサーバーがファイルの更新時刻をLast-Modifiedに使えるようにする
+        updated_at_ns = to_ns(updated_at)
+        os.utime(temp_path, ns=(updated_at_ns, updated_at_ns))
+        temp_path.replace(path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+class StaticExporter:
+    """
+    配信情報の内容が変化するたびに、CDNやエッジサーバーでそのまま配信できるファイルを書き出す
+
+    - {パス}.json: APIのレスポンスボディと同じJSON
+    - {パス}.json.gz、{パス}.json.br: 圧縮済みのJSON（gzip_staticなどで配信する）
+    - manifest.json: パスごとのETag、バージョン、取得時刻
+
+    manifest.jsonは、すべてのファイルを書き出した後に更新する。
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        settings: Settings,
+        state: State,
+        sources: Iterable[Source[Any]],
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self.settings = settings
+        self.state = state
+        self.sources = [
+            source for source in sources if source.is_enabled(settings=settings)
+        ]
+
+        self._compressors: dict[str, Callable[[bytes], bytes]] = {
+            "gzip": lambda content: gzip.compress(content, compresslevel=9, mtime=0),
+        }
+        if settings.export_brotli:
+            self._compressors["br"] = _get_brotli_compress()
+
+        self._lock = asyncio.Lock()
+        self._files: dict[str, ExportedFile] = {}
+
+    async def run(self) -> None:
+        """
+        キャンセルされるまで、ソースごとに配信情報の変化を待って書き出す
+        """
+        export_tasks = [
+            asyncio.create_task(self._watch(source=source)) for source in self.sources
+        ]
+        logger.info(
+            "Exporting static files to %s (%d sources)",
+            self.output_dir,
+            len(export_tasks),
+        )
+
+        try:
+            await asyncio.gather(*export_tasks)
+        finally:
+            for export_task in export_tasks:
+                export_task.cancel()
+            await asyncio.gather(*export_tasks, return_exceptions=True)
+
+    async def _watch(self, source: Source[Any]) -> None:
+        source_state = source.get_source_state(state=self.state)
+
+        # 書き出しが追いつかない場合、最新の配信情報のみ書き出せばよい
+        with source_state.subscribe(maxsize=1) as queue:
+            snapshot = source_state.snapshot
+            while True:
+                if snapshot is not None:
+                    try:
+                        await self.export(
+                            source=source,
+                            snapshot=snapshot,
+                            version=source_state.version,
+                        )
+                    except OSError:
+                        # 次に内容が変化したときに書き出し直す
+                        logger.exception("Failed to export %s", source.name)
+
+                snapshot = await queue.get()
+
+    def _get_pending_files(
+        self,
+        source: Source[Any],
+        snapshot: Snapshot[Any],
+        version: int,
+    ) -> list[_PendingFile]:
+        if not isinstance(source, KeyedSource):
+            return [
+                _PendingFile(api_path=source.path, version=version, snapshot=snapshot)
+            ]
+
+        pending_files: list[_PendingFile] = []
+        for key in source.get_keys(settings=self.settings):
+            if not _is_safe_key(key=key):
+                logger.warning("Skipped exporting %s: unsafe key %r", source.name, key)
+                continue
+
+            item_snapshot = source.get_item_snapshot(
+                state=self.state,
+                parent=snapshot,
+                key=key,
+            )
+            if item_snapshot is None:
+                # まだ取得できていない（APIでは404になる）
+                continue
+
+            pending_files.append(
+                _PendingFile(
+                    api_path=f"{source.path}/{key}",
+                    version=version,
+                    snapshot=item_snapshot,
+                )
+            )
+
+        return pending_files
+
+    async def export(
+        self,
+        source: Source[Any],
+        snapshot: Snapshot[Any],
+        version: int,
+    ) -> None:
+        # キーごとの配信情報の切り出しはキャッシュを使うため、イベントループで行う
+        pending_files = self._get_pending_files(
+            source=source,
+            snapshot=snapshot,
+            version=version,
+        )
+
+        # manifest.jsonは全ソースで共有するため、書き出しを直列化する
+        async with self._lock:
+            await asyncio.to_thread(self._write_files, pending_files)
+
+    def _write_files(self, pending_files: list[_PendingFile]) -> None:
+        for pending_file in pending_files:
+            if (
+                exported_file := self._files.get(pending_file.api_path)
+            ) is not None and exported_file.etag == pending_file.snapshot.etag:
+                # 他のキーのみ変化した
+                continue
+
+            self._files[pending_file.api_path] = self._export_file(
+                pending_file=pending_file
+            )
+
+        manifest = Manifest(generatedAt=datetime.now(tz=UTC), files=self._files)
+        _write_file(
+            path=self.output_dir / MANIFEST_NAME,
+            content=manifest.model_dump_json().encode("utf-8"),
+            updated_at=manifest.generatedAt,
+        )
+
+    def _export_file(self, pending_file: _PendingFile) -> ExportedFile:
+        snapshot = pending_file.snapshot
+        file = f"{pending_file.api_path.lstrip('/')}.json"
+        path = self.output_dir / file
+
+        # 圧縮したファイルを先に書き出す（JSONが更新された時点で、すべて更新済みになる）
+        for encoding, compress in self._compressors.items():
+            _write_file(
+                path=path.with_name(f"{path.name}.{ENCODING_EXTENSIONS[encoding]}"),
+                content=compress(snapshot.content_json),
+                updated_at=snapshot.fetched_at,
+            )
+
+        _write_file(
+            path=path,
+            content=snapshot.content_json,
+            updated_at=snapshot.fetched_at,
+        )
+
+        return ExportedFile(
+            file=file,
+            etag=snapshot.etag,
+            version=pending_file.version,
+            lastModified=snapshot.last_modified,
+            fetchedAt=snapshot.fetched_at,
+            size=len(snapshot.content_json),
+            encodings=list(self._compressors),
+        )
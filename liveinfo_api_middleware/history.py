@@ -0,0 +1,102 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict
+
+from .schedule import LiveProgram
+
+ChangeKind = Literal["start", "end", "program", "title"]
+"""
+配信状態の変化の種類
+
+- start: 配信が開始された
+- end: 配信が終了した
+- program: 配信中でない間に、別の配信（予約した配信など）に変わった
+- title: 同じ配信のタイトルが変わった
+"""
+
+
+class Change(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    kind: ChangeKind
+    key: str | None = None
+    """
+    まとめて取得するソースの場合、取得対象のキー（ユーザーID、チャンネルID）
+    """
+
+    title: str | None = None
+    url: str | None = None
+
+
+class HistoryEntry(BaseModel):
+    """
+    配信情報の内容の変化（バージョンごとに1つ）
+
+    説明文やサムネイルのみが変化した場合、changesは空になる。
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    version: int
+    changedAt: datetime
+    etag: str
+    changes: list[Change]
+
+
+class History(BaseModel):
+    version: int
+    """
+    現在のバージョン（次のリクエストのsinceに指定する）
+    """
+
+    truncated: bool
+    """
+    sinceより後の変更履歴の一部が、保持する数を超えて破棄された（または再起動した）
+    """
+
+    entries: list[HistoryEntry]
+
+
+def _get_change_kind(previous: LiveProgram, current: LiveProgram) -> ChangeKind | None:
+    was_onair = bool(previous.isOnair)
+    is_onair = bool(current.isOnair)
+    is_same_program = previous.url == current.url
+
+    if is_onair and (not was_onair or not is_same_program):
+        return "start"
+
+    if was_onair and not is_onair:
+        return "end"
+
+    if not is_same_program:
+        return "program"
+
+    if previous.title != current.title:
+        return "title"
+
+    return None
+
+
+def detect_changes(
+    previous: dict[str | None, LiveProgram],
+    current: dict[str | None, LiveProgram],
+) -> list[Change]:
+    """
+    取得対象ごとの配信状態を比較して、配信状態の変化を返す
+
+    以前の配信状態がない取得対象（起動直後、追加された取得対象）は変化として扱わない。
+    """
+    changes: list[Change] = []
+    for key, program in current.items():
+        previous_program = previous.get(key)
+        if previous_program is None:
+            continue
+
+        kind = _get_change_kind(previous=previous_program, current=program)
+        if kind is not None:
+            changes.append(
+                Change(kind=kind, key=key, title=program.title, url=program.url)
+            )
+
+    return changes
@@ -0,0 +1,59 @@
+import time
+from collections.abc import Awaitable, Callable
+
+from fastapi import Request, Response
+from prometheus_client import Histogram
+
+REQUEST_DURATION = Histogram(
+    "liveinfo_request_duration_seconds",
+    "Time to the first byte of API responses",
+    ["route", "method", "status"],
+)
+
+UPSTREAM_REQUEST_DURATION = Histogram(
+    "liveinfo_upstream_request_duration_seconds",
+    "Duration of each attempt of requests to upstream APIs",
+    ["api", "outcome"],
+)
+
+DUMP_DURATION = Histogram(
+    "liveinfo_dump_duration_seconds",
+    "Duration of dump file operations",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+SERIALIZE_DURATION = Histogram(
+    "liveinfo_snapshot_serialize_duration_seconds",
+    "Duration of serializing and hashing snapshots",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+
+
+def get_upstream_api_name(path: str) -> str:
+    # /youtube/v3/videos -> videos, /front/api/v2/user-broadcast-history -> ...
+    return path.rstrip("/").rsplit("/", 1)[-1]
+
+
+async def observe_request_duration(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    """
+    ルートごとのレスポンス開始までの時間を記録するミドルウェア
+
+    ストリーミングレスポンスは、接続時間ではなくヘッダを返すまでの時間を記録する。
+    """
+    started_at = time.perf_counter()
+    response = await call_next(request)
+    duration = time.perf_counter() - started_at
+
+    # パスパラメータを含まない、ルートのパスで集計する
+    route_path = getattr(request.scope.get("route"), "path", None)
+    REQUEST_DURATION.labels(
+        route=route_path if isinstance(route_path, str) else "unmatched",
+        method=request.method,
+        status=str(response.status_code),
+    ).observe(duration)
+
+    return response
@@ -0,0 +1,394 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from logging import getLogger
+from typing import Any
+
+import httpx
+from opentelemetry import trace
+from pydantic import BaseModel, ValidationError
+
+from .cache_backend import CacheBackend
+from .circuit_breaker import CircuitBreakerPolicy, CircuitOpenError
+from .dump import DumpWriter, read_dump
+from .settings import Settings
+from .snapshot import Snapshot, create_snapshot
+from .source import Source, SourceRegistry
+from .state import SourceState, State
+
+logger = getLogger(__name__)
+tracer = trace.get_tracer(__name__)
+
+# DUMP_CHECK_INTERVAL=0（リクエストごとに確認）でも、ダンプの監視は間隔を空ける
+DUMP_WATCHER_MIN_INTERVAL = 0.1  # in seconds
+
+
+async def sync_dump[T: BaseModel](
+    source_state: SourceState[T],
+    name: str,
+    content_type: type[T],
+    cache_backend: CacheBackend,
+    dump_writer: DumpWriter,
+    quarantine: bool = False,
+) -> None:
+    """
+    ダンプが変更されていれば、メモリ上の配信情報に読み込む。
+
+    自身が書き込んだダンプは、キーが一致するため読み込まない。
+    壊れたダンプは読み込まず、quarantineがTrueの場合（起動時）は別名で退避する。
+    """
+    if dump_writer.is_writing(name=name):
+        return
+
+    current_dump_key = source_state.get_dump_key()
+    dump_key = await cache_backend.call(cache_backend.get_dump_key, name=name)
+    if dump_key is None or dump_key == current_dump_key:
+        return
+
+    try:
+        dump = await cache_backend.call(
+            read_dump,
+            cache_backend=cache_backend,
+            name=name,
+            content_type=content_type,
+        )
+    except ValidationError:
+        if quarantine:
+            quarantine_name = await cache_backend.call(
+                cache_backend.quarantine_dump,
+                name=name,
+            )
+            if quarantine_name is not None:
+                logger.warning(
+                    "Quarantined corrupt %s dump to %s", name, quarantine_name
+                )
+            else:
+                logger.warning("Discarded corrupt %s dump", name)
+        else:
+            # 同じダンプを繰り返し読み込まないように、キーを記録する
+            source_state.record_dump_key(dump_key=dump_key)
+            logger.warning("Ignored corrupt %s dump", name)
+        return
+
+    if dump is None:
+        return
+
+    # 読み込み中に取得した新しい配信情報を、古いダンプで上書きしない
+    if (
+        dump_writer.is_writing(name=name)
+        or source_state.get_dump_key() != current_dump_key
+    ):
+        return
+
+    snapshot, dump_key = dump
+    source_state.record_dump(snapshot=snapshot, dump_key=dump_key)
+
+
+async def get_snapshot[T: BaseModel](
+    settings: Settings,
+    source_state: SourceState[T],
+    name: str,
+    content_type: type[T],
+    cache_backend: CacheBackend,
+    dump_writer: DumpWriter,
+) -> Snapshot[T] | None:
+    with tracer.start_as_current_span(
+        "cache lookup",
+        attributes={"liveinfo.source": name},
+    ):
+        if source_state.should_check_dump(
+            now=time.monotonic(),
+            interval=settings.dump_check_interval,
+        ):
+            await sync_dump(
+                source_state=source_state,
+                name=name,
+                content_type=content_type,
+                cache_backend=cache_backend,
+                dump_writer=dump_writer,
+            )
+
+        return source_state.snapshot
+
+
+async def fetch_and_dump[T: BaseModel](
+    source_state: SourceState[T],
+    name: str,
+    fetch_content: Callable[[], Awaitable[T]],
+    now: datetime,
+    circuit_breaker_policy: CircuitBreakerPolicy,
+    dump_writer: DumpWriter,
+) -> None:
+    # 失敗が続いている場合は取得しない（CircuitOpenError）
+    source_state.begin_upstream_fetch(now=now)
+
+    try:
+        content = await fetch_content()
+    except Exception as error:
+        # 失敗した場合は例外になり、取得に成功した配信情報は上書きされない
+        source_state.record_error(
+            error=error,
+            now=now,
+            circuit_breaker_policy=circuit_breaker_policy,
+        )
+        raise
+
+    source_state.record_upstream_success()
+
+    snapshot = create_snapshot(content=content, fetched_at=now)
+    source_state.record_success(snapshot=snapshot, now=now)
+
+    # ダンプの書き込みは待たない
+    # （書き込みの失敗は取得の失敗ではないため、record_errorには記録しない）
+    dump_writer.schedule(
+        name=name,
+        snapshot=snapshot,
+        on_written=source_state.record_dump_key,
+        on_error=lambda error: source_state.record_dump_error(),
+    )
+
+
+async def refresh[T: BaseModel](
+    source_state: SourceState[T],
+    name: str,
+    content_type: type[T],
+    interval: timedelta,
+    fetch_content: Callable[[], Awaitable[T]],
+    circuit_breaker_policy: CircuitBreakerPolicy,
+    cache_backend: CacheBackend,
+    dump_writer: DumpWriter,
+    wait: bool = True,
+) -> bool:
+    async def fetch(now: datetime) -> None:
+        with tracer.start_as_current_span(
+            "refresh",
+            attributes={"liveinfo.source": name},
+        ):
+            # 複数のプロセス・レプリカで保存先を共有する場合、
+            # リースを獲得した1つのプロセスだけが配信サイトから取得する
+            if not await cache_backend.call(
+                cache_backend.acquire_lease,
+                name=name,
+                ttl=interval,
+            ):
+                logger.debug("Skipped fetching %s: lease is held by another", name)
+                await sync_dump(
+                    source_state=source_state,
+                    name=name,
+                    content_type=content_type,
+                    cache_backend=cache_backend,
+                    dump_writer=dump_writer,
+                )
+                return
+
+            await fetch_and_dump(
+                source_state=source_state,
+                name=name,
+                fetch_content=fetch_content,
+                now=now,
+                circuit_breaker_policy=circuit_breaker_policy,
+                dump_writer=dump_writer,
+            )
+
+    return await source_state.refresh_if_expired(
+        interval=interval,
+        fetch=fetch,
+        wait=wait,
+    )
+
+
+def get_circuit_breaker_policy(settings: Settings) -> CircuitBreakerPolicy:
+    return CircuitBreakerPolicy(
+        failure_threshold=settings.circuit_failure_threshold,
+        reset_timeout=timedelta(seconds=settings.circuit_reset_timeout),
+    )
+
+
+async def sync_source_dump(
+    source: Source[Any],
+    state: State,
+    quarantine: bool = False,
+) -> None:
+    await sync_dump(
+        source_state=source.get_source_state(state=state),
+        name=source.name,
+        content_type=source.content_type,
+        cache_backend=state.cache_backend,
+        dump_writer=state.dump_writer,
+        quarantine=quarantine,
+    )
+
+
+async def get_source_snapshot[T: BaseModel](
+    source: Source[T],
+    settings: Settings,
+    state: State,
+) -> Snapshot[T] | None:
+    return await get_snapshot(
+        settings=settings,
+        source_state=source.get_source_state(state=state),
+        name=source.name,
+        content_type=source.content_type,
+        cache_backend=state.cache_backend,
+        dump_writer=state.dump_writer,
+    )
+
+
+async def refresh_source[T: BaseModel](
+    source: Source[T],
+    settings: Settings,
+    state: State,
+    http_client: httpx.AsyncClient,
+    interval: timedelta | None = None,
+    wait: bool = True,
+) -> bool:
+    return await refresh(
+        source_state=source.get_source_state(state=state),
+        name=source.name,
+        content_type=source.content_type,
+        interval=interval or source.get_interval(settings=settings, state=state),
+        fetch_content=partial(source.fetch, settings, state, http_client),
+        circuit_breaker_policy=get_circuit_breaker_policy(settings=settings),
+        cache_backend=state.cache_backend,
+        dump_writer=state.dump_writer,
+        wait=wait,
+    )
+
+
+def _get_jittered_interval(interval: timedelta, jitter: float) -> timedelta:
+    # 期限切れになる前に取得するため、間隔を短くする方向にのみ揺らがせる
+    return interval * (1 - random.uniform(0, jitter))
+
+
+async def run_refresher[T: BaseModel](
+    name: str,
+    source_state: SourceState[T],
+    refresh: Callable[[timedelta], Awaitable[bool]],
+    get_interval: Callable[[], timedelta],
+    jitter: float,
+) -> None:
+    """
+    キャッシュが期限切れになる前にrefreshを呼び出し続ける。
+
+    取得間隔は、取得のたびにget_intervalで計算し直す。
+
+    取得に失敗してもループは継続する。
+    複数のソースの取得タイミングが揃わないように、間隔にはjitter（間隔に対する比率）分の
+    ランダムな揺らぎを加える。
+    """
+    refresh_interval = _get_jittered_interval(
+        interval=get_interval(),
+        jitter=jitter,
+    )
+    while True:
+        try:
+            if await refresh(refresh_interval):
+                logger.info("Refreshed %s", name)
+        except CircuitOpenError as error:
+            logger.warning("Skipped refreshing %s: %s", name, error)
+        except Exception:
+            logger.exception("Failed to refresh %s", name)
+
+        refresh_interval = _get_jittered_interval(
+            interval=get_interval(),
+            jitter=jitter,
+        )
+        delay = source_state.get_time_until_expired(
+            now=datetime.now(tz=UTC),
+            interval=refresh_interval,
+        )
+        await asyncio.sleep(delay.total_seconds())
+
+
+def should_refresh_on_request(settings: Settings) -> bool:
+    """
+    APIサーバへのリクエスト時に、期限切れの配信情報を取得する場合Trueを返す
+
+    取得専用のプロセスがある場合（server）、APIサーバのプロセスは取得しない。
+    """
+    return settings.process_role == "standalone" and not settings.background_refresh
+
+
+async def restore_dumps(
+    settings: Settings,
+    state: State,
+    sources: SourceRegistry,
+    quarantine: bool,
+) -> None:
+    """
+    前回の取得結果をダンプから復元する
+    """
+    for source in sources:
+        # 取得対象が設定されているソースのみ、復元する
+        if not source.is_enabled(settings=settings):
+            continue
+
+        try:
+            await sync_source_dump(
+                source=source,
+                state=state,
+                quarantine=quarantine,
+            )
+        except Exception:
+            logger.exception("Failed to load %s dump", source.name)
+
+
+def start_refreshers(
+    settings: Settings,
+    state: State,
+    sources: SourceRegistry,
+    http_client: httpx.AsyncClient,
+) -> list[asyncio.Task[None]]:
+    """
+    取得対象が設定されているソースごとに、バックグラウンドでの取得を開始する
+    """
+    refresher_tasks: list[asyncio.Task[None]] = []
+    for source in sources:
+        if not source.is_enabled(settings=settings):
+            continue
+
+        refresher_tasks.append(
+            asyncio.create_task(
+                run_refresher(
+                    name=source.name,
+                    source_state=source.get_source_state(state=state),
+                    refresh=partial(
+                        refresh_source, source, settings, state, http_client
+                    ),
+                    get_interval=partial(source.get_interval, settings, state),
+                    jitter=settings.refresh_jitter,
+                )
+            )
+        )
+
+    return refresher_tasks
+
+
+async def run_dump_watcher(
+    settings: Settings,
+    state: State,
+    sources: SourceRegistry,
+) -> None:
+    """
+    取得専用のプロセスが書き込んだダンプを、dump_check_interval秒
+    （最短DUMP_WATCHER_MIN_INTERVAL秒）ごとに読み込み続ける
+
+    serverロールのAPIサーバで実行する。リクエストがなくてもダンプの変更を読み込むことで、
+    /streamの購読者やロングポーリングのリクエストに配信情報の変化を通知する。
+    """
+    while True:
+        for source in sources:
+            if not source.is_enabled(settings=settings):
+                continue
+
+            try:
+                await sync_source_dump(source=source, state=state)
+            except Exception:
+                logger.exception("Failed to load %s dump", source.name)
+
+        await asyncio.sleep(
+            max(settings.dump_check_interval, DUMP_WATCHER_MIN_INTERVAL)
+        )
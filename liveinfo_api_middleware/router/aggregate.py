@@ -0,0 +1,246 @@
+import asyncio
+import hashlib
+from collections.abc import Awaitable
+from datetime import UTC, datetime, timedelta
+from logging import getLogger
+from typing import Annotated, Any, Literal, NamedTuple
+
+import httpx
+from fastapi import APIRouter, Depends, Header, Response
+from pydantic import BaseModel, create_model
+
+from ..refresher import get_source_snapshot, refresh_source, should_refresh_on_request
+from ..settings import Settings, get_settings
+from ..snapshot import Snapshot
+from ..source import KeyedSource, Source, SourceRegistry
+from ..state import State, get_state
+from ..utility.http_client import get_http_client
+from ..utility.upstream_error import classify_upstream_error
+from .snapshot_response import get_max_stale, match_etag
+
+logger = getLogger(__name__)
+
+SourceResultStatus = Literal["ok", "stale", "unavailable"]
+"""
+ソースごとの結果
+
+- ok: 取得間隔内の配信情報
+- stale: 取得間隔を過ぎた、または取得に失敗して古いままの配信情報
+- unavailable: 返せる配信情報がない（理由はerror）
+"""
+
+
+class SourceResult[T: BaseModel](BaseModel):
+    status: SourceResultStatus
+    fetchedAt: datetime | None = None
+    etag: str | None = None
+    error: str | None = None
+    """
+    取得できなかった理由（timeout、not_found、too_stale、または取得の失敗の分類）
+    """
+
+    content: T | None = None
+
+
+class _ResolvedSource(NamedTuple):
+    # contentを含まない結果（配信情報はシリアライズ済みのJSONを埋め込む）
+    result: SourceResult[Any]
+    snapshot: Snapshot[Any] | None
+    max_age: timedelta
+
+
+async def _resolve_source(
+    source: Source[Any],
+    settings: Settings,
+    state: State,
+    http_client: httpx.AsyncClient,
+    deadline: float,
+) -> _ResolvedSource:
+    """
+    source.pathと同じ手順で配信情報を解決する。
+
+    取得の完了を待つ場合もdeadline秒で打ち切り、その時点の配信情報を返す。
+    打ち切った取得は中断せず、完了後の配信情報は後続のリクエストで返す。
+    """
+    source_state = source.get_source_state(state=state)
+
+    fetched = False
+    error: str | None = None
+    if should_refresh_on_request(settings=settings):
+        try:
+            fetched = await asyncio.wait_for(
+                refresh_source(
+                    source=source,
+                    settings=settings,
+                    state=state,
+                    http_client=http_client,
+                    # 配信情報がある場合、取得を待たずに古い配信情報を返す
+                    wait=(
+                        not settings.stale_while_revalidate
+                        or source_state.snapshot is None
+                    ),
+                ),
+                timeout=deadline,
+            )
+        except TimeoutError:
+            logger.warning(
+                "Timed out refreshing %s after %.1f seconds", source.name, deadline
+            )
+            fetched = True
+            error = "timeout"
+        except Exception as refresh_error:
+            # error fallback
+            logger.exception("Failed to refresh %s", source.name)
+            fetched = True
+            error = classify_upstream_error(refresh_error)
+
+    source_state.record_request(fetched=fetched)
+
+    snapshot = await get_source_snapshot(source=source, settings=settings, state=state)
+    interval = source.get_interval(settings=settings, state=state)
+    now = datetime.now(tz=UTC)
+    max_age = source_state.get_time_until_expired(now=now, interval=interval)
+
+    if snapshot is None:
+        # このリクエストで取得していない場合も、直前の取得の失敗を理由とする
+        return _ResolvedSource(
+            result=SourceResult(
+                status="unavailable",
+                error=error or source_state.last_error_kind or "not_found",
+            ),
+            snapshot=None,
+            max_age=max_age,
+        )
+
+    age = max(now - snapshot.fetched_at, timedelta(0))
+    max_stale = get_max_stale(settings=settings)
+    if max_stale is not None and interval + max_stale < age:
+        return _ResolvedSource(
+            result=SourceResult(
+                status="unavailable",
+                fetchedAt=snapshot.fetched_at,
+                error="too_stale",
+            ),
+            snapshot=None,
+            max_age=max_age,
+        )
+
+    status: SourceResultStatus = "ok"
+    if error is not None or source_state.is_revalidation_failed() or interval < age:
+        status = "stale"
+        source_state.record_stale_response()
+
+    return _ResolvedSource(
+        result=SourceResult(
+            status=status,
+            fetchedAt=snapshot.fetched_at,
+            etag=snapshot.etag,
+            error=error,
+        ),
+        snapshot=snapshot,
+        max_age=max_age,
+    )
+
+
+def _dump_resolved_source(resolved: _ResolvedSource) -> bytes:
+    result_json = resolved.result.model_dump_json(exclude_none=True).encode("utf-8")
+    if resolved.snapshot is None:
+        return result_json
+
+    # シリアライズ済みの配信情報をそのまま埋め込む（再シリアライズしない）
+    return result_json[:-1] + b',"content":' + resolved.snapshot.content_json + b"}"
+
+
+def create_aggregate_router(sources: SourceRegistry) -> APIRouter:
+    """
+    まとめて取得するソース（KeyedSource）以外のソースの配信情報を、
+    1つのレスポンスで返すルート（/v1/all）を作成する
+    """
+    aggregate_sources = [
+        source for source in sources if not isinstance(source, KeyedSource)
+    ]
+
+    # ソースごとのフィールドを持つレスポンスのモデル（OpenAPIのスキーマ用）
+    fields: dict[str, Any] = {
+        source.name: (SourceResult[source.content_type] | None, None)  # type: ignore[name-defined]
+        for source in aggregate_sources
+    }
+    all_live = create_model(
+        "AllLive",
+        __doc__="取得対象が設定されているソースのみ含む",
+        **fields,
+    )
+
+    router = APIRouter()
+
+    @router.get(
+        "/v1/all",
+        response_model=all_live,
+        response_model_exclude_none=True,
+    )
+    async def v1_all(
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+        http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
+        if_none_match: Annotated[str | None, Header()] = None,
+    ) -> Response:
+        """
+        ソースごとの配信情報（/v1/nicolive、/v1/ytliveなど）を1つのレスポンスで返す
+
+        ソースごとの配信情報は並行して解決し、一部のソースの配信情報がない場合も、
+        ソースごとの結果（status）を含めて200を返す。
+        """
+        resolvers: dict[str, Awaitable[_ResolvedSource]] = {
+            source.name: _resolve_source(
+                source=source,
+                settings=settings,
+                state=state,
+                http_client=http_client,
+                deadline=settings.all_source_deadline,
+            )
+            for source in aggregate_sources
+            # 取得対象が設定されているソースのみ含む
+            if source.is_enabled(settings=settings)
+        }
+
+        resolved_sources = dict(
+            zip(
+                resolvers.keys(),
+                await asyncio.gather(*resolvers.values()),
+                strict=True,
+            )
+        )
+
+        content_json = (
+            b"{"
+            + b",".join(
+                f'"{name}":'.encode() + _dump_resolved_source(resolved)
+                for name, resolved in resolved_sources.items()
+            )
+            + b"}"
+        )
+        etag = f'"{hashlib.sha256(content_json).hexdigest()[:32]}"'
+
+        # 最も早く期限切れになるソースに合わせてキャッシュを許可する
+        max_age = min(
+            (resolved.max_age for resolved in resolved_sources.values()),
+            default=timedelta(0),
+        )
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"max-age={int(max_age.total_seconds())}",
+        }
+
+        if if_none_match is not None and match_etag(
+            if_none_match=if_none_match,
+            etag=etag,
+        ):
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=content_json,
+            media_type="application/json",
+            headers=headers,
+        )
+
+    return router
@@ -0,0 +1,125 @@
+from collections.abc import Iterator
+from datetime import UTC, datetime
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+
+from ..source import SourceRegistry
+from ..state import State
+
+router = APIRouter()
+
+
+class StateCollector(Collector):
+    """
+    /v1/statusと同じ値を、収集時にStateから読み取って公開する
+    """
+
+    def __init__(self, state: State, sources: SourceRegistry) -> None:
+        self.state = state
+        self.sources = sources
+
+    def collect(self) -> Iterator[Metric]:
+        now = datetime.now(tz=UTC)
+
+        cache_requests = CounterMetricFamily(
+            "liveinfo_cache_requests",
+            "API requests served from the cache",
+            labels=["source", "result"],
+        )
+        upstream_fetches = CounterMetricFamily(
+            "liveinfo_upstream_fetches",
+            "Refreshes attempted against upstream",
+            labels=["source"],
+        )
+        dump_errors = CounterMetricFamily(
+            "liveinfo_dump_errors",
+            "Failed dump writes",
+            labels=["source"],
+        )
+        snapshot_age = GaugeMetricFamily(
+            "liveinfo_snapshot_age_seconds",
+            "Seconds since the current snapshot was fetched",
+            labels=["source"],
+        )
+        circuit_state = GaugeMetricFamily(
+            "liveinfo_circuit_state",
+            "Circuit breaker state (1 for the current state)",
+            labels=["source", "state"],
+        )
+        stream_subscribers = GaugeMetricFamily(
+            "liveinfo_stream_subscribers",
+            "Connected Server-Sent Events clients",
+            labels=["source"],
+        )
+        long_poll_waiters = GaugeMetricFamily(
+            "liveinfo_long_poll_waiters",
+            "Requests waiting for the next snapshot change",
+            labels=["source"],
+        )
+
+        for source in self.sources:
+            name = source.name
+            source_state = source.get_source_state(state=self.state)
+            cache_requests.add_metric([name, "hit"], source_state.cache_hits)
+            cache_requests.add_metric([name, "miss"], source_state.cache_misses)
+            cache_requests.add_metric([name, "stale"], source_state.stale_responses)
+            upstream_fetches.add_metric([name], source_state.upstream_fetches)
+            dump_errors.add_metric([name], source_state.dump_errors)
+
+            snapshot = source_state.snapshot
+            if snapshot is not None:
+                snapshot_age.add_metric(
+                    [name],
+                    (now - snapshot.fetched_at).total_seconds(),
+                )
+
+            current_circuit_state = source_state.get_circuit_state()
+            for state_name in ("closed", "open", "half_open"):
+                circuit_state.add_metric(
+                    [name, state_name],
+                    1 if state_name == current_circuit_state else 0,
+                )
+
+            stream_subscribers.add_metric(
+                [name],
+                source_state.get_subscriber_count(),
+            )
+            long_poll_waiters.add_metric([name], source_state.get_waiter_count())
+
+        quota_used = GaugeMetricFamily(
+            "liveinfo_ytlive_quota_used_units",
+            "YouTube Data API quota used today (Pacific Time)",
+        )
+        quota_used.add_metric([], self.state.ytlive_quota.get_used(now=now))
+
+        quota_units = CounterMetricFamily(
+            "liveinfo_ytlive_quota_units",
+            "YouTube Data API quota consumed since start",
+            labels=["api"],
+        )
+        for api, units in self.state.ytlive_quota.get_total_by_api().items():
+            quota_units.add_metric([api], units)
+
+        yield cache_requests
+        yield upstream_fetches
+        yield dump_errors
+        yield snapshot_age
+        yield circuit_state
+        yield stream_subscribers
+        yield long_poll_waiters
+        yield quota_used
+        yield quota_units
+
+
+@router.get(
+    "/metrics",
+    response_class=Response,
+)
+async def metrics() -> Response:
+    return Response(
+        content=generate_latest(REGISTRY),
+        media_type=CONTENT_TYPE_LATEST,
+    )
@@ -0,0 +1,89 @@
+from datetime import UTC, datetime, timedelta
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+
+from ..settings import Settings
+from ..snapshot import Snapshot
+from ..state import SourceState
+
+
+def match_etag(if_none_match: str, etag: str) -> bool:
+    # If-None-Matchは弱い比較で判定する
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+
+        if candidate.removeprefix("W/") == etag:
+            return True
+
+    return False
+
+
+def create_snapshot_response[T: BaseModel, U: BaseModel](
+    snapshot: Snapshot[T],
+    source_state: SourceState[U],
+    if_none_match: str | None,
+    interval: timedelta,
+    max_stale: timedelta | None,
+) -> Response:
+    """
+    シリアライズ済みのJSONを返すレスポンスを作成する。
+
+    If-None-MatchがETagに一致する場合、ボディなしの304を返す。
+    取得間隔を過ぎた古い配信情報にはWarningヘッダを付与し、
+    さらにmax_staleを過ぎた場合は503を返す。
+    """
+    now = datetime.now(tz=UTC)
+    age = max(now - snapshot.fetched_at, timedelta(0))
+
+    # 次の取得までの残り時間だけキャッシュを許可する
+    max_age = source_state.get_time_until_expired(now=now, interval=interval)
+
+    if max_stale is not None and interval + max_stale < age:
+        raise HTTPException(
+            status_code=503,
+            detail="Live info is too stale",
+            headers={"Retry-After": str(max(int(max_age.total_seconds()), 1))},
+        )
+    cache_control = f"max-age={int(max_age.total_seconds())}"
+    if max_stale is not None:
+        cache_control += f", stale-if-error={int(max_stale.total_seconds())}"
+
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": snapshot.last_modified,
+        "Cache-Control": cache_control,
+        "Age": str(int(age.total_seconds())),
+        # 内容が変化していないかを、ETagの代わりに番号で比較できる
+        "X-Snapshot-Version": str(source_state.version),
+    }
+
+    if source_state.is_revalidation_failed():
+        # 取得に失敗したため、最後に取得に成功した配信情報を返している
+        headers["Warning"] = '111 - "Revalidation Failed"'
+    elif interval < age:
+        headers["Warning"] = '110 - "Response is Stale"'
+
+    if "Warning" in headers:
+        source_state.record_stale_response()
+
+    if if_none_match is not None and match_etag(
+        if_none_match=if_none_match,
+        etag=snapshot.etag,
+    ):
+        return Response(status_code=304, headers=headers)
+
+    return Response(
+        content=snapshot.content_json,
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def get_max_stale(settings: Settings) -> timedelta | None:
+    if settings.max_stale <= 0:
+        return None
+
+    return timedelta(seconds=settings.max_stale)
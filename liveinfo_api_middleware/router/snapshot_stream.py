@@ -0,0 +1,83 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ..snapshot import Snapshot
+from ..state import SourceState
+
+
+def _format_event[T: BaseModel](event: str, snapshot: Snapshot[T]) -> bytes:
+    # content_jsonは改行を含まないため、1行のdataとして送る
+    return (
+        f"id: {snapshot.etag}\nevent: {event}\n".encode()
+        + b"data: "
+        + snapshot.content_json
+        + b"\n\n"
+    )
+
+
+async def _iter_snapshot_events[T: BaseModel, U: BaseModel](
+    source_state: SourceState[U],
+    get_item: Callable[[Snapshot[U]], Snapshot[T] | None],
+    event: str,
+    last_event_id: str | None,
+    queue_size: int,
+    heartbeat_interval: float,
+) -> AsyncIterator[bytes]:
+    with source_state.subscribe(maxsize=queue_size) as queue:
+        last_etag = last_event_id
+        # 購読を開始してから現在の配信情報を読むことで、更新の取りこぼしを防ぐ
+        parent_snapshot = source_state.snapshot
+
+        while True:
+            item_snapshot = (
+                get_item(parent_snapshot) if parent_snapshot is not None else None
+            )
+            if item_snapshot is not None and item_snapshot.etag != last_etag:
+                # 内容が変化した場合のみ送る
+                last_etag = item_snapshot.etag
+                yield _format_event(event=event, snapshot=item_snapshot)
+
+            try:
+                parent_snapshot = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=heartbeat_interval,
+                )
+            except TimeoutError:
+                # 中継サーバに接続を切断されないように、コメント行を送る
+                parent_snapshot = None
+                yield b": heartbeat\n\n"
+
+
+def create_snapshot_stream_response[T: BaseModel, U: BaseModel](
+    source_state: SourceState[U],
+    get_item: Callable[[Snapshot[U]], Snapshot[T] | None],
+    event: str,
+    last_event_id: str | None,
+    queue_size: int,
+    heartbeat_interval: float,
+) -> StreamingResponse:
+    """
+    配信情報の内容が変化するたびにイベントを送る、Server-Sent Eventsのレスポンスを返す
+
+    接続直後に現在の配信情報を送る。
+    Last-Event-IDヘッダが現在の配信情報のETagと一致する場合は送らない。
+    """
+    return StreamingResponse(
+        _iter_snapshot_events(
+            source_state=source_state,
+            get_item=get_item,
+            event=event,
+            last_event_id=last_event_id,
+            queue_size=queue_size,
+            heartbeat_interval=heartbeat_interval,
+        ),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # リバースプロキシ（nginx）のバッファリングを無効にする
+            "X-Accel-Buffering": "no",
+        },
+    )
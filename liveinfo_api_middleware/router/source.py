@@ -0,0 +1,399 @@
+import asyncio
+from collections.abc import Callable
+from logging import getLogger
+from typing import Annotated, Any
+
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from ..history import History
+from ..refresher import get_source_snapshot, refresh_source, should_refresh_on_request
+from ..settings import Settings, get_settings
+from ..snapshot import Snapshot
+from ..source import KeyedSource, Source
+from ..state import State, get_state
+from ..utility.http_client import get_http_client
+from .snapshot_response import create_snapshot_response, get_max_stale, match_etag
+from .snapshot_stream import create_snapshot_stream_response
+
+logger = getLogger(__name__)
+
+MIN_WAIT_CHECK_INTERVAL = 0.1  # in seconds
+
+WaitSeconds = Annotated[
+    float | None,
+    Query(
+        ge=0,
+        description=(
+            "If-None-Match（ETag）またはversionと内容が一致する場合、"
+            "内容が変化するまで最大wait秒待ってから返す"
+        ),
+    ),
+]
+KnownVersion = Annotated[
+    int | None,
+    Query(description="クライアントが持っている配信情報のバージョン"),
+]
+
+
+async def _refresh_on_request(
+    source: Source[Any],
+    settings: Settings,
+    state: State,
+    http_client: httpx.AsyncClient,
+) -> None:
+    source_state = source.get_source_state(state=state)
+
+    fetched = False
+    if should_refresh_on_request(settings=settings):
+        # キャッシュが期限切れの場合、取得する（同時リクエストでも取得は1回のみ）
+        try:
+            fetched = await refresh_source(
+                source=source,
+                settings=settings,
+                state=state,
+                http_client=http_client,
+                # 配信情報がある場合、取得を待たずに古い配信情報を返す
+                wait=(
+                    not settings.stale_while_revalidate or source_state.snapshot is None
+                ),
+            )
+        except Exception:
+            # error fallback
+            logger.exception("Failed to refresh %s", source.name)
+            fetched = True
+
+    source_state.record_request(fetched=fetched)
+
+
+async def _wait_for_change(
+    source: Source[Any],
+    settings: Settings,
+    state: State,
+    is_changed: Callable[[], bool],
+    timeout: float,
+) -> None:
+    """
+    is_changedがTrueになるまで（最大timeout秒）待つ（ロングポーリング）
+
+    配信情報の内容が変化するたびにis_changedを確認する。
+    待機中のリクエストがLONG_POLL_MAX_WAITERSに達している場合、503を返す。
+    """
+    if is_changed() or timeout <= 0:
+        return
+
+    source_state = source.get_source_state(state=state)
+    if source_state.get_waiter_count() >= settings.long_poll_max_waiters:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many waiting requests",
+            headers={"Retry-After": "1"},
+        )
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    # 取得専用のプロセスが書き込んだダンプの変更も、この間隔で確認する
+    dump_check_interval = max(settings.dump_check_interval, MIN_WAIT_CHECK_INTERVAL)
+
+    while not is_changed():
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return
+
+        try:
+            await source_state.wait_for_change(
+                timeout=min(remaining, dump_check_interval),
+            )
+        except TimeoutError:
+            await get_source_snapshot(source=source, settings=settings, state=state)
+
+
+def _is_snapshot_changed[T: BaseModel](
+    snapshot: Snapshot[T] | None,
+    version: int,
+    if_none_match: str | None,
+    known_version: int | None,
+) -> bool:
+    """
+    クライアントが持っている配信情報（ETag、バージョン）から変化した場合Trueを返す
+
+    配信情報がまだない場合はFalse、クライアントが配信情報を持っていない場合はTrueを返す。
+    """
+    if snapshot is None:
+        return False
+
+    if if_none_match is None and known_version is None:
+        return True
+
+    if if_none_match is not None and not match_etag(
+        if_none_match=if_none_match,
+        etag=snapshot.etag,
+    ):
+        return True
+
+    return known_version is not None and known_version != version
+
+
+def _add_history_route(router: APIRouter, source: Source[Any], name: str) -> None:
+    @router.get(
+        f"{source.path}/history",
+        response_model=History,
+        name=f"{name}_history",
+    )
+    async def get_source_history(
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+        since: int | None = None,
+    ) -> History:
+        """
+        配信情報の変更履歴（配信の開始・終了、タイトルの変更など）を返す
+
+        sinceを指定した場合、sinceより後の変更履歴のみ返す。
+        バージョンがsinceから変わっていない場合、変わるまで
+        （最大HISTORY_WAIT_TIMEOUT秒）待ってから返す。
+        """
+        # ダンプが外部から変更されていれば読み込む
+        await get_source_snapshot(source=source, settings=settings, state=state)
+
+        if since is not None:
+            source_state = source.get_source_state(state=state)
+            await _wait_for_change(
+                source=source,
+                settings=settings,
+                state=state,
+                is_changed=lambda: source_state.version != since,
+                timeout=settings.history_wait_timeout,
+            )
+
+        version, entries, truncated = source.get_source_state(state=state).get_history(
+            since=since or 0
+        )
+        return History(version=version, truncated=truncated, entries=entries)
+
+
+def _get_route_name(path: str) -> str:
+    # /v1/nicolive -> v1_nicolive（OpenAPIのoperationIdに使われる）
+    return path.strip("/").replace("/", "_")
+
+
+def create_source_router(source: Source[Any]) -> APIRouter:
+    """
+    ソースの配信情報を返すルート（{path}、{path}/stream、{path}/history）を作成する
+    """
+    if isinstance(source, KeyedSource):
+        return _create_keyed_source_router(source=source)
+
+    router = APIRouter()
+    name = _get_route_name(path=source.path)
+
+    _add_history_route(router=router, source=source, name=name)
+
+    @router.get(
+        source.path,
+        response_model=source.content_type,
+        name=name,
+    )
+    async def get_source(
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+        http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
+        if_none_match: Annotated[str | None, Header()] = None,
+        wait: WaitSeconds = None,
+        version: KnownVersion = None,
+    ) -> Response:
+        await _refresh_on_request(
+            source=source,
+            settings=settings,
+            state=state,
+            http_client=http_client,
+        )
+
+        source_state = source.get_source_state(state=state)
+        if wait is not None:
+            await _wait_for_change(
+                source=source,
+                settings=settings,
+                state=state,
+                is_changed=lambda: _is_snapshot_changed(
+                    snapshot=source_state.snapshot,
+                    version=source_state.version,
+                    if_none_match=if_none_match,
+                    known_version=version,
+                ),
+                timeout=min(wait, settings.long_poll_max_wait),
+            )
+
+        snapshot = await get_source_snapshot(
+            source=source, settings=settings, state=state
+        )
+
+        if snapshot is None:
+            # return 404 if not found
+            raise HTTPException(
+                status_code=404,
+                detail=source.not_found_detail,
+            )
+
+        return create_snapshot_response(
+            snapshot=snapshot,
+            source_state=source.get_source_state(state=state),
+            if_none_match=if_none_match,
+            interval=source.get_interval(settings=settings, state=state),
+            max_stale=get_max_stale(settings=settings),
+        )
+
+    @router.get(
+        f"{source.path}/stream",
+        response_class=StreamingResponse,
+        name=f"{name}_stream",
+    )
+    async def get_source_stream(
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+        last_event_id: Annotated[str | None, Header()] = None,
+    ) -> StreamingResponse:
+        # ダンプが外部から変更されていれば読み込む
+        await get_source_snapshot(source=source, settings=settings, state=state)
+
+        return create_snapshot_stream_response(
+            source_state=source.get_source_state(state=state),
+            get_item=lambda snapshot: snapshot,
+            event=source.event,
+            last_event_id=last_event_id,
+            queue_size=settings.stream_queue_size,
+            heartbeat_interval=settings.stream_heartbeat_interval,
+        )
+
+    return router
+
+
+def _create_keyed_source_router(source: KeyedSource[Any, Any]) -> APIRouter:
+    router = APIRouter()
+    name = _get_route_name(path=source.path)
+
+    # {path}/{キー}より先に追加する（historyをキーとして扱わない）
+    _add_history_route(router=router, source=source, name=name)
+
+    # パスパラメータの名前（OpenAPIに表示される）はソースごとに異なる
+    Key = Annotated[str, Path(alias=source.key_name)]
+
+    def check_key(settings: Settings, key: str) -> None:
+        if key not in source.get_keys(settings=settings):
+            # 取得対象として設定されていない
+            raise HTTPException(
+                status_code=404,
+                detail=source.key_not_found_detail,
+            )
+
+    @router.get(
+        f"{source.path}/{{{source.key_name}}}",
+        response_model=source.item_type,
+        name=name,
+    )
+    async def get_keyed_source(
+        key: Key,
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+        http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
+        if_none_match: Annotated[str | None, Header()] = None,
+        wait: WaitSeconds = None,
+        version: KnownVersion = None,
+    ) -> Response:
+        check_key(settings=settings, key=key)
+
+        # キャッシュが期限切れの場合、設定されたすべての取得対象をまとめて取得する
+        await _refresh_on_request(
+            source=source,
+            settings=settings,
+            state=state,
+            http_client=http_client,
+        )
+
+        source_state = source.get_source_state(state=state)
+        if wait is not None:
+
+            def is_changed() -> bool:
+                parent_snapshot = source_state.snapshot
+                return _is_snapshot_changed(
+                    snapshot=(
+                        source.get_item_snapshot(
+                            state=state,
+                            parent=parent_snapshot,
+                            key=key,
+                        )
+                        if parent_snapshot is not None
+                        else None
+                    ),
+                    # まとめて取得した配信情報のバージョン
+                    version=source_state.version,
+                    if_none_match=if_none_match,
+                    known_version=version,
+                )
+
+            await _wait_for_change(
+                source=source,
+                settings=settings,
+                state=state,
+                is_changed=is_changed,
+                timeout=min(wait, settings.long_poll_max_wait),
+            )
+
+        parent_snapshot = await get_source_snapshot(
+            source=source,
+            settings=settings,
+            state=state,
+        )
+
+        snapshot = (
+            source.get_item_snapshot(state=state, parent=parent_snapshot, key=key)
+            if parent_snapshot is not None
+            else None
+        )
+
+        if snapshot is None:
+            # return 404 if not found
+            raise HTTPException(
+                status_code=404,
+                detail=source.not_found_detail,
+            )
+
+        return create_snapshot_response(
+            snapshot=snapshot,
+            source_state=source.get_source_state(state=state),
+            if_none_match=if_none_match,
+            interval=source.get_interval(settings=settings, state=state),
+            max_stale=get_max_stale(settings=settings),
+        )
+
+    @router.get(
+        f"{source.path}/{{{source.key_name}}}/stream",
+        response_class=StreamingResponse,
+        name=f"{name}_stream",
+    )
+    async def get_keyed_source_stream(
+        key: Key,
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+        last_event_id: Annotated[str | None, Header()] = None,
+    ) -> StreamingResponse:
+        check_key(settings=settings, key=key)
+
+        # ダンプが外部から変更されていれば読み込む
+        await get_source_snapshot(source=source, settings=settings, state=state)
+
+        return create_snapshot_stream_response(
+            source_state=source.get_source_state(state=state),
+            get_item=lambda snapshot: source.get_item_snapshot(
+                state=state,
+                parent=snapshot,
+                key=key,
+            ),
+            event=source.event,
+            last_event_id=last_event_id,
+            queue_size=settings.stream_queue_size,
+            heartbeat_interval=settings.stream_heartbeat_interval,
+        )
+
+    return router
@@ -0,0 +1,84 @@
+from datetime import UTC, datetime
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, create_model
+from pydantic.alias_generators import to_camel
+
+from ..settings import Settings, get_settings
+from ..source import SourceRegistry
+from ..state import SourceState, State, get_state
+
+
+class SourceStatus(BaseModel):
+    lastFetched: datetime | None
+    lastSucceeded: datetime | None
+    lastErrored: datetime | None
+    lastError: str | None
+    lastErrorKind: str | None
+    circuitState: str
+    cacheHits: int
+    cacheMisses: int
+    upstreamFetches: int
+    dumpErrors: int
+    streamSubscribers: int
+    longPollWaiters: int
+    version: int
+
+
+class QuotaStatus(BaseModel):
+    used: int
+    dailyBudget: int
+
+
+def _to_source_status[T: BaseModel](source_state: SourceState[T]) -> SourceStatus:
+    return SourceStatus(
+        lastFetched=source_state.last_fetched,
+        lastSucceeded=source_state.last_succeeded,
+        lastErrored=source_state.last_errored,
+        lastError=source_state.last_error,
+        lastErrorKind=source_state.last_error_kind,
+        circuitState=source_state.get_circuit_state(),
+        cacheHits=source_state.cache_hits,
+        cacheMisses=source_state.cache_misses,
+        upstreamFetches=source_state.upstream_fetches,
+        dumpErrors=source_state.dump_errors,
+        streamSubscribers=source_state.get_subscriber_count(),
+        longPollWaiters=source_state.get_waiter_count(),
+        version=source_state.version,
+    )
+
+
+def create_status_router(sources: SourceRegistry) -> APIRouter:
+    # ソースごとのフィールド（nicoliveUsersなど）とytliveQuotaを持つモデル
+    fields: dict[str, Any] = {
+        to_camel(source.name): (SourceStatus, ...) for source in sources
+    }
+    status_model: type[BaseModel] = create_model(
+        "Status", **fields, ytliveQuota=(QuotaStatus, ...)
+    )
+
+    router = APIRouter()
+
+    @router.get(
+        "/v1/status",
+        response_model=status_model,
+    )
+    async def v1_status(
+        settings: Annotated[Settings, Depends(get_settings)],
+        state: Annotated[State, Depends(get_state)],
+    ) -> BaseModel:
+        return status_model(
+            **{
+                to_camel(source.name): _to_source_status(
+                    source.get_source_state(state=state)
+                )
+                for source in sources
+            },
+            ytliveQuota=QuotaStatus(
+                used=state.ytlive_quota.get_used(now=datetime.now(tz=UTC)),
+                dailyBudget=settings.ytlive_quota_daily_budget,
+            ),
+        )
+
+    return router
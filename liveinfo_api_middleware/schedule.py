@@ -0,0 +1,89 @@
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Protocol
+
+MAX_IDLE_DOUBLINGS = 16
+"""
+取得間隔を倍にする回数の上限（オーバーフロー対策）
+"""
+
+
+class LiveProgram(Protocol):
+    """
+    NicoliveUserLiveProgramとYtliveChannelLiveProgramに共通する配信状態
+    """
+
+    title: str | None
+    url: str | None
+    startTime: str | None
+    endTime: str | None
+    isOnair: bool | None
+
+
+def parse_program_time(value: str | None) -> datetime | None:
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is None:
+        return None
+
+    return parsed
+
+
+def get_adaptive_interval(
+    programs: Iterable[LiveProgram],
+    now: datetime,
+    interval: timedelta,
+    min_interval: timedelta,
+    max_interval: timedelta,
+    start_window: timedelta,
+    idle_backoff: timedelta,
+) -> timedelta:
+    """
+    配信状態に応じた取得間隔を返す。
+
+    - 配信中、または開始予定時刻の前後start_window以内の場合、min_interval
+    - 最後の配信からidle_backoff経過するごとに、intervalを倍にする（max_intervalまで）
+    - 開始予定時刻がある場合、開始予定時刻のstart_window前までに取得する
+    """
+    last_active_at: datetime | None = None
+    next_start_at: datetime | None = None
+
+    for program in programs:
+        if program.isOnair:
+            # 配信の終了をすぐに反映するため、短い間隔で取得する
+            return min_interval
+
+        start_time = parse_program_time(program.startTime)
+        end_time = parse_program_time(program.endTime)
+
+        if start_time is not None:
+            if abs(start_time - now) <= start_window:
+                # 配信の開始をすぐに反映するため、短い間隔で取得する
+                return min_interval
+
+            if now < start_time:
+                if next_start_at is None or start_time < next_start_at:
+                    next_start_at = start_time
+
+        for active_at in (start_time, end_time):
+            if active_at is None or now < active_at:
+                continue
+
+            if last_active_at is None or last_active_at < active_at:
+                last_active_at = active_at
+
+    adaptive_interval = interval
+    if last_active_at is not None and idle_backoff > timedelta(0):
+        doublings = min(int((now - last_active_at) / idle_backoff), MAX_IDLE_DOUBLINGS)
+        adaptive_interval = interval * (2**doublings)
+
+    if next_start_at is not None:
+        adaptive_interval = min(adaptive_interval, next_start_at - start_window - now)
+
+    return min(max_interval, max(min_interval, adaptive_interval))
@@ -1,7 +1,22 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings
 
+from .cache_backend import CacheBackendName
+from .site.ytlive import YtliveDiscovery
+from .utility.log_format import LogFormat
+from .utility.tracing import TracingExporter
+
+ProcessRole = Literal["standalone", "server"]
+"""
+プロセスの役割
+
+- standalone: 1つのプロセスで配信情報の取得とAPIの提供を行う
+- server: APIの提供のみ行い、取得専用のプロセス（CLIのrefresherコマンド）が
+  書き込んだダンプを読み込む
+"""
+
 
 class Settings(BaseSettings):
     # YouTube Settings
@@ -9,19 +24,91 @@ class Settings(BaseSettings):
     ytlive_api_key: str = ""
     ytlive_dump_path: str = ""
     ytlive_interval: int = 60  # in seconds
+    ytlive_min_interval: int = 30  # in seconds
+    ytlive_max_interval: int = 900  # in seconds
+    ytlive_channel_interval: int = 86400  # in seconds
+    ytlive_channel_ids: str = ""  # comma separated, for /v2/ytlive/{channel_id}
+    ytlive_channels_dump_path: str = ""
+    ytlive_discovery: YtliveDiscovery = "playlist"
+    ytlive_quota_daily_budget: int = 10000  # 0 for unlimited
+    ytlive_api_base_url: str = "https://www.googleapis.com/youtube/v3"
 
     # NicoNico Live Settings
     nicolive_user_id: str = ""
     nicolive_dump_path: str = ""
     nicolive_interval: int = 60  # in seconds
+    nicolive_min_interval: int = 30  # in seconds
+    nicolive_max_interval: int = 900  # in seconds
+    nicolive_user_ids: str = ""  # comma separated, for /v2/nicolive/{user_id}
+    nicolive_users_dump_path: str = ""
+    nicolive_api_base_url: str = "https://live.nicovideo.jp/front/api"
 
     # API Settings
     cors_allow_origins: str = ""
+    stream_queue_size: int = 4
+    stream_heartbeat_interval: float = 15.0  # in seconds
+    all_source_deadline: float = 3.0  # in seconds, for /v1/all
+    history_size: int = 100  # per source
+    history_wait_timeout: float = 30.0  # in seconds, for {path}/history?since=
+    long_poll_max_wait: float = 60.0  # in seconds, upper bound of ?wait=
+    long_poll_max_waiters: int = 1000  # per source
+
+    # HTTP Client Settings
+    http2: bool = True
+    http_connect_timeout: float = 5.0  # in seconds
+    http_read_timeout: float = 10.0  # in seconds
+    http_max_connections: int = 10
+    http_max_keepalive_connections: int = 10
+    http_retries: int = 2
+    http_retry_backoff: float = 0.5  # in seconds
+    http_retry_max_backoff: float = 10.0  # in seconds
+
+    # Circuit Breaker Settings
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: int = 300  # in seconds
+
+    # Cache Settings
+    cache_backend: CacheBackendName = "file"
+    cache_mmap_dir: str = ""
+    cache_sqlite_path: str = ""
+    cache_redis_url: str = ""
+    cache_redis_key_prefix: str = "liveinfo:"
+
+    # Export Settings
+    export_dir: str = ""  # empty to disable static file export
+    export_brotli: bool = False  # requires the 'brotli' extra
 
     # Common Settings
     useragent: str = ""
+    process_role: ProcessRole = "standalone"
+    background_refresh: bool = True
+    stale_while_revalidate: bool = True
+    max_stale: int = 0  # in seconds, 0 for unlimited
+    refresh_jitter: float = 0.1  # ratio of interval
+    dump_check_interval: float = 1.0  # in seconds
+    adaptive_start_window: int = 600  # in seconds
+    adaptive_idle_backoff: int = 3600  # in seconds
+
+    # Observability Settings
+    log_format: LogFormat = "text"
+    tracing_exporter: TracingExporter = "none"
+    refresher_metrics_port: int = 0  # 0 to disable, /metrics of the refresher process
 
 
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
+
+
+def _split_ids(ids_string: str) -> list[str]:
+    return [
+        id_string.strip() for id_string in ids_string.split(",") if id_string.strip()
+    ]
+
+
+def get_ytlive_channel_ids(settings: Settings) -> list[str]:
+    return _split_ids(settings.ytlive_channel_ids)
+
+
+def get_nicolive_user_ids(settings: Settings) -> list[str]:
+    return _split_ids(settings.nicolive_user_ids)
@@ -1,13 +1,17 @@
 from .fetch_nicolive_user_live import (
     NicoliveUserLive,
     NicoliveUserLiveProgram,
+    NicoliveUserLives,
     NicoliveUserLiveUser,
     fetch_nicolive_user_live,
+    fetch_nicolive_user_lives,
 )
 
 __all__ = [
     "NicoliveUserLive",
     "NicoliveUserLiveProgram",
     "NicoliveUserLiveUser",
+    "NicoliveUserLives",
     "fetch_nicolive_user_live",
+    "fetch_nicolive_user_lives",
 ]
@@ -0,0 +1,291 @@
+import re
+from functools import lru_cache
+from html import unescape
+from html.parser import HTMLParser
+
+# HTML仕様の空白文字（str.isspaceとは異なる）
+HTML_WHITESPACE = "\t\n\x0c\r "
+
+INCOMPLETE_TAG_PATTERN = re.compile(r"<(?:[a-zA-Z!?]|/[^>])")
+
+# 終了タグまでの中身をテキストとして扱う要素（RAWTEXT、RCDATA）
+RAW_TEXT_ELEMENTS = frozenset(
+    (
+        "iframe",
+        "noembed",
+        "noframes",
+        "plaintext",
+        "script",
+        "style",
+        "textarea",
+        "title",
+        "xmp",
+    )
+)
+
+# 中身の文字参照を展開する要素（RCDATA）
+ESCAPABLE_RAW_TEXT_ELEMENTS = frozenset(("textarea", "title"))
+
+# 開始タグの直後の改行を無視する要素
+LEADING_NEWLINE_ELEMENTS = frozenset(("listing", "pre", "textarea"))
+
+# 中身をHTMLとは異なる規則で解析する要素（SVG、MathML）
+FOREIGN_ELEMENTS = frozenset(("math", "svg"))
+
+# SVG、MathMLの中に現れると、SVG、MathMLの外に出る要素
+FOREIGN_BREAKOUT_ELEMENTS = frozenset(
+    (
+        "b big blockquote body br center code dd div dl dt em embed "
+        "h1 h2 h3 h4 h5 h6 head hr i img li listing menu meta nobr ol p pre "
+        "ruby s small span strong strike sub sup table tt u ul var"
+    ).split()
+)
+FOREIGN_BREAKOUT_FONT_ATTRIBUTES = frozenset(("color", "face", "size"))
+
+# SVG、MathMLの中で、中身をHTMLとして解析する要素
+FOREIGN_INTEGRATION_POINTS = {
+    "svg": frozenset(("desc", "foreignobject", "title")),
+    "math": frozenset(("mi", "mn", "mo", "ms", "mtext")),
+}
+
+# 終了タグを持たない要素
+VOID_ELEMENTS = frozenset(
+    (
+        "area base br col embed hr image img input keygen link meta param "
+        "source track wbr"
+    ).split()
+)
+
+REPLACEMENT_CHARACTER = "\ufffd"
+
+
+def normalize_newlines(data: str) -> str:
+    # html5libは、改行をLFに正規化する
+    return data.replace("\r\n", "\n").replace("\r", "\n")
+
+
+class NicoliveDescriptionParser(HTMLParser):
+    """
+    放送の説明文（HTML）から、改行（br）を保ったままテキストを取り出す
+
+    以前のBeautifulSoup（html5lib）による変換と同じ結果になるように、
+    先頭の空白を除き、コメントを無視し、スクリプトなどの中身はテキストとして扱う。
+    スクリプト、textarea、titleなどの中身は、HTMLParserの解析（Pythonのバージョンによって
+    異なる）を使わずに、html5libと同じ規則で取り出す。
+
+    次の場合は再現しない（説明文に使われるタグでは起こらない）。
+
+    - 表の中の文字を表の前に移動する規則（foster parenting）、frameset
+    - 入れ子の誤った書式タグ（<b><pre></b> など）を組み替える規則（adoption agency）
+    - SVG、MathMLの中に現れた、その外側のHTMLの要素の終了タグ
+    - タグ名の中のNUL文字
+
+    説明文全体を1回のfeedで渡すこと（スクリプトなどの中身は、終了タグがなければ
+    末尾までとして扱う）。
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._chunks: list[str] = []
+        self._is_leading = True
+        self._leading_newline_tag: str | None = None
+        self._raw_text_tag: str | None = None
+
+        # SVG、MathMLの中で開いている要素（要素名、svg・math、HTMLの要素の場合はNone）
+        self._foreign_open_elements: list[tuple[str, str | None]] = []
+
+    def _is_in_foreign_content(self) -> bool:
+        if len(self._foreign_open_elements) == 0:
+            return False
+
+        tag, namespace = self._foreign_open_elements[-1]
+        return (
+            namespace is not None and tag not in FOREIGN_INTEGRATION_POINTS[namespace]
+        )
+
+    def parse_starttag(self, i: int) -> int:
+        end = super().parse_starttag(i)
+
+        # スクリプトなどの中身は、HTMLParserの代わりにここで取り出す
+        if self.cdata_elem is not None:
+            self.clear_cdata_mode()
+
+        raw_text_tag = self._raw_text_tag
+        self._raw_text_tag = None
+        if end < 0 or raw_text_tag is None:
+            return end
+
+        rawdata = self.rawdata
+        end_tag_match = (
+            # plaintextは終了タグでも終わらない
+            None
+            if raw_text_tag == "plaintext"
+            else re.compile(
+                rf"</{raw_text_tag}(?=[{HTML_WHITESPACE}/>])",
+                re.IGNORECASE,
+            ).search(rawdata, end)
+        )
+
+        if end_tag_match is None:
+            self._handle_raw_text(data=rawdata[end:], tag=raw_text_tag)
+            return len(rawdata)
+
+        self._handle_raw_text(
+            data=rawdata[end : end_tag_match.start()],
+            tag=raw_text_tag,
+        )
+
+        # 終了タグの属性などは無視する（閉じられていない終了タグは捨てる）
+        end_tag_end = rawdata.find(">", end_tag_match.end())
+        self.handle_endtag(raw_text_tag)
+        return end_tag_end + 1 if end_tag_end >= 0 else len(rawdata)
+
+    def parse_comment(self, i: int, report: bool = True) -> int:
+        # html5libは、<!--> と <!---> を空のコメントとして扱う
+        for empty_comment in ("<!-->", "<!--->"):
+            if self.rawdata.startswith(empty_comment, i):
+                self.handle_comment("")
+                return i + len(empty_comment)
+
+        return super().parse_comment(i, report)
+
+    def handle_starttag(
+        self,
+        tag: str,
+        attrs: list[tuple[str, str | None]],
+    ) -> None:
+        if tag != "html":
+            # html5libは、最初のタグ・文字より前の空白を無視する
+            self._is_leading = False
+
+        self._leading_newline_tag = None
+
+        is_in_foreign_content = self._is_in_foreign_content()
+        if is_in_foreign_content and (
+            tag in FOREIGN_BREAKOUT_ELEMENTS
+            or (
+                tag == "font"
+                and any(name in FOREIGN_BREAKOUT_FONT_ATTRIBUTES for name, _ in attrs)
+            )
+        ):
+            # HTMLの要素として扱う
+            while self._is_in_foreign_content():
+                self._foreign_open_elements.pop()
+            is_in_foreign_content = False
+
+        if is_in_foreign_content:
+            # SVG、MathMLの中のtitle、styleなどは、通常の要素として扱う
+            _, namespace = self._foreign_open_elements[-1]
+            self._foreign_open_elements.append((tag, namespace))
+        elif tag in FOREIGN_ELEMENTS:
+            self._foreign_open_elements.append((tag, tag))
+        else:
+            if len(self._foreign_open_elements) > 0 and tag not in VOID_ELEMENTS:
+                self._foreign_open_elements.append((tag, None))
+
+            if tag in RAW_TEXT_ELEMENTS:
+                self._raw_text_tag = tag
+
+            # 開始タグの直後の文字が改行の場合のみ無視する
+            if tag in LEADING_NEWLINE_ELEMENTS:
+                self._leading_newline_tag = tag
+
+        if tag == "br":
+            self._chunks.append("\n")
+
+    def handle_startendtag(
+        self,
+        tag: str,
+        attrs: list[tuple[str, str | None]],
+    ) -> None:
+        # <br /> を終了タグとしても扱わないようにする
+        # （html5libは、<textarea /> なども開始タグとして扱う）
+        self.handle_starttag(tag=tag, attrs=attrs)
+
+        # SVG、MathMLの要素のみ、<circle /> を終了タグとしても扱う
+        if (
+            len(self._foreign_open_elements) > 0
+            and self._foreign_open_elements[-1][0] == tag
+            and self._foreign_open_elements[-1][1] is not None
+        ):
+            self._foreign_open_elements.pop()
+
+    def handle_endtag(self, tag: str) -> None:
+        # html5libは、最初のタグ・文字より前の終了タグを
+        # head、body、html、br以外は無視する
+        if tag in ("head", "body", "html", "br"):
+            self._is_leading = False
+
+        # 開始タグのない終了タグは無視される（</br>、</p>は空の要素になる）
+        # html5libは、</pre> の後は常に改行を無視しない
+        if tag in (self._leading_newline_tag, "br", "p", "pre"):
+            self._leading_newline_tag = None
+
+        for index in range(len(self._foreign_open_elements) - 1, -1, -1):
+            if self._foreign_open_elements[index][0] == tag:
+                del self._foreign_open_elements[index:]
+                break
+
+        # html5libは </br> を <br> として扱う
+        if tag == "br":
+            self._chunks.append("\n")
+
+    def handle_comment(self, data: str) -> None:
+        self._leading_newline_tag = None
+
+    def handle_data(self, data: str) -> None:
+        if self._is_leading:
+            data = data.lstrip(HTML_WHITESPACE)
+            if data == "":
+                return
+
+            self._is_leading = False
+
+        # html5libは、改行をLFに正規化してから、NUL文字を取り除く
+        # （SVG、MathMLの中では置換文字にする）
+        data = normalize_newlines(data).replace(
+            "\x00",
+            REPLACEMENT_CHARACTER if self._is_in_foreign_content() else "",
+        )
+        self._chunks.append(self._strip_leading_newline(data=data))
+
+    def _handle_raw_text(self, data: str, tag: str) -> None:
+        data = self._strip_leading_newline(data=normalize_newlines(data))
+
+        if tag in ESCAPABLE_RAW_TEXT_ELEMENTS:
+            data = unescape(data)
+
+        # html5libは、スクリプトなどの中身のNUL文字を置換文字にする
+        self._chunks.append(data.replace("\x00", REPLACEMENT_CHARACTER))
+
+    def _strip_leading_newline(self, data: str) -> str:
+        if self._leading_newline_tag is not None and data != "":
+            self._leading_newline_tag = None
+            return data.removeprefix("\n")
+
+        return data
+
+    def close(self) -> None:
+        # html5libは、閉じられていない末尾のタグ・コメントを捨てる
+        # （HTMLParserはテキストとして扱う）
+        if INCOMPLETE_TAG_PATTERN.match(self.rawdata):
+            self.rawdata = ""
+
+        super().close()
+
+    def get_text(self) -> str:
+        return "".join(self._chunks)
+
+
+@lru_cache(maxsize=64)
+def convert_nicolive_description(description_html: str) -> str:
+    """
+    放送の説明文（HTML）をテキストに変換する
+
+    説明文は取得のたびにほとんど変化しないため、変換結果を内容ごとに保持する。
+    """
+    parser = NicoliveDescriptionParser()
+    parser.feed(description_html)
+    parser.close()
+
+    return parser.get_text()
@@ -1,13 +1,22 @@
+import asyncio
 from datetime import datetime
 from typing import Literal
 from zoneinfo import ZoneInfo
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+from opentelemetry import trace
 from pydantic import BaseModel
 
+from ...utility.upstream_error import (
+    parse_upstream_response,
+    raise_for_upstream_status,
+)
+from .convert_nicolive_description import convert_nicolive_description
+
 JST = ZoneInfo("Asia/Tokyo")
 
+tracer = trace.get_tracer(__name__)
+
 
 class NicoliveApiUserBroadcastHistoryProgramId(BaseModel):
     value: str | None = None
@@ -134,12 +143,45 @@ class NicoliveUserLive(BaseModel):
     user: NicoliveUserLiveUser
 
 
-def fetch_nicolive_user_live(
+class NicoliveUserLives(BaseModel):
+    users: dict[str, NicoliveUserLive]
+    """
+    ユーザーIDごとの配信情報
+    """
+
+
+async def fetch_nicolive_user_lives(
+    http_client: httpx.AsyncClient,
+    nicolive_user_ids: list[str],
+    useragent: str,
+    nicolive_api_base_url: str,
+) -> NicoliveUserLives:
+    # 複数のユーザーの配信情報をまとめて取得するAPIはないため、並行して取得する
+    user_lives = await asyncio.gather(
+        *(
+            fetch_nicolive_user_live(
+                http_client=http_client,
+                nicolive_user_id=nicolive_user_id,
+                useragent=useragent,
+                nicolive_api_base_url=nicolive_api_base_url,
+            )
+            for nicolive_user_id in nicolive_user_ids
+        )
+    )
+
+    return NicoliveUserLives(
+        users=dict(zip(nicolive_user_ids, user_lives, strict=True)),
+    )
+
+
+async def fetch_nicolive_user_live(
+    http_client: httpx.AsyncClient,
     nicolive_user_id: str,
     useragent: str,
+    nicolive_api_base_url: str,
 ) -> NicoliveUserLive:
-    history_response = requests.get(
-        "https://live.nicovideo.jp/front/api/v2/user-broadcast-history",
+    history_response = await http_client.get(
+        f"{nicolive_api_base_url}/v2/user-broadcast-history",
         headers={
             "User-Agent": useragent,
         },
@@ -153,20 +195,17 @@ def fetch_nicolive_user_live(
         },
     )
 
-    broadcast_history: NicoliveApiUserBroadcastHistory | None = None
-    if history_response.status_code == 200:
-        broadcast_history = NicoliveApiUserBroadcastHistory.model_validate_json(
-            history_response.text
-        )
-    else:
-        print(f"ERRORED: {history_response.text}")
+    raise_for_upstream_status(response=history_response)
+    broadcast_history = parse_upstream_response(
+        response=history_response,
+        content_type=NicoliveApiUserBroadcastHistory,
+    )
 
     program: NicoliveApiUserBroadcastHistoryProgram | None = None
-    if broadcast_history is not None:
-        if broadcast_history.data is not None:
-            if broadcast_history.data.programsList is not None:
-                if len(broadcast_history.data.programsList) > 0:
-                    program = broadcast_history.data.programsList[0]
+    if broadcast_history.data is not None:
+        if broadcast_history.data.programsList is not None:
+            if len(broadcast_history.data.programsList) > 0:
+                program = broadcast_history.data.programsList[0]
 
     is_onair = False
     if program is not None:
@@ -185,13 +224,10 @@ def fetch_nicolive_user_live(
             if program.program.description is not None:
                 description_html = program.program.description
 
-                description_bs = BeautifulSoup(description_html, "html5lib")
-
-                # keep line breaks
-                for br_tag in description_bs.select("br"):
-                    br_tag.replace_with("\n")
-
-                description = description_bs.text
+                with tracer.start_as_current_span("convert description"):
+                    description = convert_nicolive_description(
+                        description_html=description_html,
+                    )
 
     thumbnails: list[str] | None = None
     if program is not None:
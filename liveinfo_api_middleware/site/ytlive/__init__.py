@@ -4,6 +4,9 @@ from .fetch_ytlive_channel_live import (
     YtliveApiChannelItemSnippet,
     YtliveApiChannelItemSnippetThumbnail,
     YtliveApiChannelItemSnippetThumbnails,
+    YtliveApiPlaylistItem,
+    YtliveApiPlaylistItemContentDetails,
+    YtliveApiPlaylistItems,
     YtliveApiSearch,
     YtliveApiSearchItem,
     YtliveApiSearchItemId,
@@ -15,10 +18,29 @@ from .fetch_ytlive_channel_live import (
     YtliveApiVideoItemSnippetThumbnail,
     YtliveApiVideoItemSnippetThumbnails,
     YtliveApiVideoItemStatus,
+    YtliveChannelCache,
+    YtliveChannelCacheEntry,
     YtliveChannelLive,
     YtliveChannelLiveChannel,
     YtliveChannelLiveProgram,
+    YtliveChannelLives,
+    YtliveDiscoveredVideos,
+    YtliveDiscovery,
+    build_ytlive_channel_live,
+    discover_ytlive_videos,
     fetch_ytlive_channel_live,
+    fetch_ytlive_channel_lives,
+    fetch_ytlive_channels,
+    fetch_ytlive_playlist_video_ids,
+    fetch_ytlive_search_items,
+    fetch_ytlive_video_items,
+)
+from .quota import (
+    YTLIVE_API_QUOTA_COSTS,
+    YtliveApiName,
+    YtliveQuotaScope,
+    YtliveQuotaSourceUsage,
+    YtliveQuotaTracker,
 )
 
 __all__ = [
@@ -27,6 +49,9 @@ __all__ = [
     "YtliveApiChannelItemSnippet",
     "YtliveApiChannelItem",
     "YtliveApiChannel",
+    "YtliveApiPlaylistItemContentDetails",
+    "YtliveApiPlaylistItem",
+    "YtliveApiPlaylistItems",
     "YtliveApiSearchItemSnippet",
     "YtliveApiSearchItemId",
     "YtliveApiSearchItem",
@@ -41,5 +66,22 @@ __all__ = [
     "YtliveChannelLiveProgram",
     "YtliveChannelLiveChannel",
     "YtliveChannelLive",
+    "YtliveChannelLives",
+    "YtliveDiscovery",
+    "YtliveDiscoveredVideos",
+    "YtliveChannelCacheEntry",
+    "YtliveChannelCache",
+    "build_ytlive_channel_live",
+    "fetch_ytlive_channels",
+    "fetch_ytlive_playlist_video_ids",
+    "fetch_ytlive_search_items",
+    "discover_ytlive_videos",
+    "fetch_ytlive_video_items",
     "fetch_ytlive_channel_live",
+    "fetch_ytlive_channel_lives",
+    "YTLIVE_API_QUOTA_COSTS",
+    "YtliveApiName",
+    "YtliveQuotaScope",
+    "YtliveQuotaSourceUsage",
+    "YtliveQuotaTracker",
 ]
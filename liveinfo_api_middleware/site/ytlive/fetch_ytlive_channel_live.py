@@ -1,10 +1,18 @@
-from datetime import datetime
+import asyncio
+from datetime import UTC, datetime, timedelta
 from typing import Literal
 from zoneinfo import ZoneInfo
 
-import requests
+import httpx
 from pydantic import BaseModel
 
+from ...utility.upstream_error import (
+    UpstreamErrorKind,
+    create_upstream_status_error,
+    parse_upstream_response,
+)
+from .quota import YtliveQuotaScope
+
 JST = ZoneInfo("Asia/Tokyo")
 
 
@@ -26,6 +34,7 @@ class YtliveApiChannelItemSnippet(BaseModel):
 
 
 class YtliveApiChannelItem(BaseModel):
+    id: str | None = None
     snippet: YtliveApiChannelItemSnippet | None = None
 
 
@@ -50,9 +59,28 @@ class YtliveApiSearch(BaseModel):
     items: list[YtliveApiSearchItem] | None = None
 
 
+class YtliveApiPlaylistItemContentDetails(BaseModel):
+    videoId: str
+
+
+class YtliveApiPlaylistItem(BaseModel):
+    contentDetails: YtliveApiPlaylistItemContentDetails | None = None
+
+
+class YtliveApiPlaylistItems(BaseModel):
+    items: list[YtliveApiPlaylistItem] | None = None
+
+
 class YtliveApiVideoItemLiveStreamingDetails(BaseModel):
-    actualStartTime: str
-    actualEndTime: str
+    actualStartTime: str | None = None
+    """
+    配信を開始した時刻（開始前のライブ配信にはない）
+    """
+
+    actualEndTime: str | None = None
+    """
+    配信を終了した時刻（配信中・開始前のライブ配信にはない）
+    """
 
 
 class YtliveApiVideoItemSnippetThumbnail(BaseModel):
@@ -75,6 +103,7 @@ class YtliveApiVideoItemSnippet(BaseModel):
     channelId: str | None = None
     channelTitle: str | None = None
     thumbnails: YtliveApiVideoItemSnippetThumbnails | None = None
+    liveBroadcastContent: str | None = None
 
 
 class YtliveApiVideoItemStatus(BaseModel):
@@ -92,6 +121,48 @@ class YtliveApiVideo(BaseModel):
     items: list[YtliveApiVideoItem] | None = None
 
 
+class YtliveApiErrorItem(BaseModel):
+    reason: str | None = None
+
+
+class YtliveApiErrorBody(BaseModel):
+    errors: list[YtliveApiErrorItem] | None = None
+
+
+class YtliveApiError(BaseModel):
+    error: YtliveApiErrorBody | None = None
+
+
+YTLIVE_API_ERROR_REASON_KINDS: dict[str, UpstreamErrorKind] = {
+    "quotaExceeded": "quota_exceeded",
+    "dailyLimitExceeded": "quota_exceeded",
+    "rateLimitExceeded": "rate_limited",
+    "userRateLimitExceeded": "rate_limited",
+}
+"""
+YouTube Data APIのエラーの理由（error.errors[].reason）と分類の対応
+"""
+
+
+def raise_for_ytlive_api_status(response: httpx.Response) -> None:
+    if response.is_success:
+        return
+
+    kind: UpstreamErrorKind | None = None
+    try:
+        api_error = YtliveApiError.model_validate_json(response.content)
+    except ValueError:
+        api_error = None
+
+    if api_error is not None and api_error.error is not None:
+        for error_item in api_error.error.errors or []:
+            if error_item.reason in YTLIVE_API_ERROR_REASON_KINDS:
+                kind = YTLIVE_API_ERROR_REASON_KINDS[error_item.reason]
+                break
+
+    raise create_upstream_status_error(response=response, kind=kind)
+
+
 class YtliveChannelLiveProgram(BaseModel):
     id: str | None
     title: str | None
@@ -115,39 +186,184 @@ class YtliveChannelLive(BaseModel):
     channel: YtliveChannelLiveChannel
 
 
-def fetch_ytlive_channel_live(
-    ytlive_channel_id: str,
+class YtliveChannelLives(BaseModel):
+    channels: dict[str, YtliveChannelLive]
+    """
+    チャンネルIDごとの配信情報
+    """
+
+
+YtliveDiscovery = Literal["search", "playlist"]
+"""
+チャンネルの最近の動画を探す方法
+
+- search: search.list（100クォータ）
+- playlist: アップロード動画の再生リストのplaylistItems.list（1クォータ）
+"""
+
+
+class YtliveDiscoveredVideos(BaseModel):
+    video_ids: list[str]
+    live_broadcast_contents: dict[str, str]
+    """
+    動画IDごとのliveBroadcastContent（search.listで取得した場合のみ）
+    """
+
+
+class YtliveChannelCacheEntry(BaseModel):
+    channel: YtliveApiChannelItem | None
+    fetched_at: datetime
+
+
+class YtliveChannelCache:
+    """
+    チャンネル情報（カスタムURL、アイコン）のキャッシュ
+
+    チャンネル情報はほとんど変化しないため、配信情報より長い間隔で取得する。
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, YtliveChannelCacheEntry] = {}
+
+    def get(
+        self,
+        ytlive_channel_id: str,
+        now: datetime,
+        ttl: timedelta,
+    ) -> YtliveChannelCacheEntry | None:
+        entry = self._entries.get(ytlive_channel_id)
+        if entry is None or ttl <= now - entry.fetched_at:
+            return None
+
+        return entry
+
+    def set(
+        self,
+        ytlive_channel_id: str,
+        entry: YtliveChannelCacheEntry,
+    ) -> None:
+        self._entries[ytlive_channel_id] = entry
+
+
+YTLIVE_API_MAX_IDS = 50
+"""
+channels.list、videos.listのidパラメータに一度に指定できるIDの最大数
+"""
+
+
+YTLIVE_API_CHANNEL_FIELDS = "items(id,snippet(customUrl,thumbnails))"
+YTLIVE_API_SEARCH_FIELDS = "items(id/videoId,snippet/liveBroadcastContent)"
+YTLIVE_API_PLAYLIST_ITEMS_FIELDS = "items/contentDetails/videoId"
+YTLIVE_API_VIDEO_FIELDS = (
+    "items("
+    "id,"
+    "status/privacyStatus,"
+    "snippet(title,description,channelId,channelTitle,thumbnails,liveBroadcastContent),"
+    "liveStreamingDetails(actualStartTime,actualEndTime)"
+    ")"
+)
+"""
+各APIのレスポンスに含めるフィールド（fieldsパラメータ）
+
+使用するフィールドだけを取得して、転送量とパースの時間を減らす。
+モデルにフィールドを追加する場合、ここにも追加する。
+"""
+
+
+def _chunk(ids: list[str], size: int) -> list[list[str]]:
+    return [ids[index : index + size] for index in range(0, len(ids), size)]
+
+
+async def fetch_ytlive_channels(
+    http_client: httpx.AsyncClient,
+    ytlive_channel_ids: list[str],
     ytlive_api_key: str,
+    ytlive_api_base_url: str,
     useragent: str,
-) -> YtliveChannelLive:
-    # チャンネル情報を取得（アイコン）
-    channel_api_response = requests.get(
-        "https://www.googleapis.com/youtube/v3/channels",
-        params={
-            "key": ytlive_api_key,
-            "part": "snippet",
-            "id": ytlive_channel_id,
-        },
-        headers={
-            "User-Agent": useragent,
-        },
+    channel_cache: YtliveChannelCache,
+    channel_cache_ttl: timedelta,
+    quota_scope: YtliveQuotaScope,
+) -> dict[str, YtliveApiChannelItem | None]:
+    now = datetime.now(tz=UTC)
+
+    channels: dict[str, YtliveApiChannelItem | None] = {}
+    uncached_channel_ids: list[str] = []
+    for ytlive_channel_id in ytlive_channel_ids:
+        cache_entry = channel_cache.get(
+            ytlive_channel_id=ytlive_channel_id,
+            now=now,
+            ttl=channel_cache_ttl,
+        )
+        if cache_entry is not None:
+            channels[ytlive_channel_id] = cache_entry.channel
+        else:
+            uncached_channel_ids.append(ytlive_channel_id)
+
+    async def fetch_channel_api(channel_ids: list[str]) -> YtliveApiChannel:
+        # チャンネル情報を取得（アイコン）
+        channel_api_response = await http_client.get(
+            f"{ytlive_api_base_url}/channels",
+            params={
+                "key": ytlive_api_key,
+                "part": "snippet",
+                "id": ",".join(channel_ids),
+                "fields": YTLIVE_API_CHANNEL_FIELDS,
+            },
+            headers={
+                "User-Agent": useragent,
+            },
+        )
+        quota_scope.record(api="channels")
+        raise_for_ytlive_api_status(response=channel_api_response)
+        return parse_upstream_response(
+            response=channel_api_response,
+            content_type=YtliveApiChannel,
+        )
+
+    # 複数のチャンネルの情報は、まとめて取得する
+    channel_api_data_list = await asyncio.gather(
+        *(
+            fetch_channel_api(channel_ids=channel_ids)
+            for channel_ids in _chunk(uncached_channel_ids, YTLIVE_API_MAX_IDS)
+        )
     )
-    channel_api_dict = channel_api_response.json()
-    channel_api_data = YtliveApiChannel.model_validate(channel_api_dict)
 
-    channel_list_items = channel_api_data.items
-    channel = channel_list_items[0] if channel_list_items is not None else None
+    for channel_ids, channel_api_data in zip(
+        _chunk(uncached_channel_ids, YTLIVE_API_MAX_IDS),
+        channel_api_data_list,
+        strict=True,
+    ):
+        channel_list_items = channel_api_data.items
+        for ytlive_channel_id in channel_ids:
+            channel = next(
+                filter(
+                    lambda channel: channel.id == ytlive_channel_id,
+                    channel_list_items or [],
+                ),
+                None,
+            )
+            channels[ytlive_channel_id] = channel
 
-    channel_custom_url: str | None = None
-    channel_thumbnails: YtliveApiChannelItemSnippetThumbnails | None = None
-    if channel is not None:
-        if channel.snippet is not None:
-            channel_custom_url = channel.snippet.customUrl
-            channel_thumbnails = channel.snippet.thumbnails
+            # エラーレスポンスは例外になるため、存在しないチャンネルのみキャッシュされる
+            channel_cache.set(
+                ytlive_channel_id=ytlive_channel_id,
+                entry=YtliveChannelCacheEntry(channel=channel, fetched_at=now),
+            )
+
+    return channels
 
+
+async def fetch_ytlive_search_items(
+    http_client: httpx.AsyncClient,
+    ytlive_channel_id: str,
+    ytlive_api_key: str,
+    ytlive_api_base_url: str,
+    useragent: str,
+    quota_scope: YtliveQuotaScope,
+) -> list[YtliveApiSearchItem]:
     # チャンネルの動画リストを取得
-    search_response = requests.get(
-        "https://www.googleapis.com/youtube/v3/search",
+    search_response = await http_client.get(
+        f"{ytlive_api_base_url}/search",
         params={
             "key": ytlive_api_key,
             "part": "id,snippet",
@@ -155,34 +371,303 @@ def fetch_ytlive_channel_live(
             "type": "video",
             "order": "date",  # createdAt desc
             "maxResults": "10",
+            "fields": YTLIVE_API_SEARCH_FIELDS,
         },
         headers={
             "User-Agent": useragent,
         },
     )
-    search_api_dict = search_response.json()
-    search_api_data = YtliveApiSearch.model_validate(search_api_dict)
-
-    search_list_items = (
-        search_api_data.items if search_api_data.items is not None else []
+    quota_scope.record(api="search")
+    raise_for_ytlive_api_status(response=search_response)
+    search_api_data = parse_upstream_response(
+        response=search_response,
+        content_type=YtliveApiSearch,
     )
 
-    # 各動画の詳細を取得
-    video_api_response = requests.get(
-        "https://www.googleapis.com/youtube/v3/videos",
+    return search_api_data.items if search_api_data.items is not None else []
+
+
+async def fetch_ytlive_playlist_video_ids(
+    http_client: httpx.AsyncClient,
+    ytlive_channel_id: str,
+    ytlive_api_key: str,
+    ytlive_api_base_url: str,
+    useragent: str,
+    quota_scope: YtliveQuotaScope,
+) -> list[str] | None:
+    # アップロード動画の再生リストIDは、チャンネルIDの先頭の"UC"を"UU"にしたもの
+    if not ytlive_channel_id.startswith("UC"):
+        return None
+
+    uploads_playlist_id = "UU" + ytlive_channel_id.removeprefix("UC")
+
+    # アップロード動画の再生リストを取得（新しい順）
+    playlist_items_response = await http_client.get(
+        f"{ytlive_api_base_url}/playlistItems",
         params={
             "key": ytlive_api_key,
-            "part": "snippet,status,liveStreamingDetails",
-            "id": ",".join([item.id.videoId for item in search_list_items]),
+            "part": "contentDetails",
+            "playlistId": uploads_playlist_id,
+            "maxResults": "10",
+            "fields": YTLIVE_API_PLAYLIST_ITEMS_FIELDS,
         },
         headers={
             "User-Agent": useragent,
         },
     )
-    video_api_dict = video_api_response.json()
-    video_api_data = YtliveApiVideo.model_validate(video_api_dict)
+    quota_scope.record(api="playlistItems")
+    if playlist_items_response.status_code == 404:
+        # アップロード動画の再生リストが存在しない
+        return None
+
+    raise_for_ytlive_api_status(response=playlist_items_response)
+    playlist_items_data = parse_upstream_response(
+        response=playlist_items_response,
+        content_type=YtliveApiPlaylistItems,
+    )
+
+    return [
+        item.contentDetails.videoId
+        for item in playlist_items_data.items or []
+        if item.contentDetails is not None
+    ]
+
+
+async def discover_ytlive_videos(
+    http_client: httpx.AsyncClient,
+    ytlive_channel_id: str,
+    ytlive_api_key: str,
+    ytlive_api_base_url: str,
+    useragent: str,
+    discovery: YtliveDiscovery,
+    quota_scope: YtliveQuotaScope,
+) -> YtliveDiscoveredVideos:
+    if discovery == "playlist":
+        video_ids = await fetch_ytlive_playlist_video_ids(
+            http_client=http_client,
+            ytlive_channel_id=ytlive_channel_id,
+            ytlive_api_key=ytlive_api_key,
+            ytlive_api_base_url=ytlive_api_base_url,
+            useragent=useragent,
+            quota_scope=quota_scope,
+        )
+        if video_ids is not None:
+            return YtliveDiscoveredVideos(
+                video_ids=video_ids,
+                live_broadcast_contents={},
+            )
+
+        # 再生リストを取得できない場合、search.listで取得する
+
+    search_list_items = await fetch_ytlive_search_items(
+        http_client=http_client,
+        ytlive_channel_id=ytlive_channel_id,
+        ytlive_api_key=ytlive_api_key,
+        ytlive_api_base_url=ytlive_api_base_url,
+        useragent=useragent,
+        quota_scope=quota_scope,
+    )
+
+    live_broadcast_contents: dict[str, str] = {}
+    for search_item in search_list_items:
+        if search_item.snippet is not None:
+            live_broadcast_contents[search_item.id.videoId] = (
+                search_item.snippet.liveBroadcastContent
+            )
+
+    return YtliveDiscoveredVideos(
+        video_ids=[item.id.videoId for item in search_list_items],
+        live_broadcast_contents=live_broadcast_contents,
+    )
+
+
+async def fetch_ytlive_video_items(
+    http_client: httpx.AsyncClient,
+    video_ids: list[str],
+    ytlive_api_key: str,
+    ytlive_api_base_url: str,
+    useragent: str,
+    quota_scope: YtliveQuotaScope,
+) -> list[YtliveApiVideoItem]:
+    async def fetch_video_api(video_ids: list[str]) -> YtliveApiVideo:
+        # 各動画の詳細を取得
+        video_api_response = await http_client.get(
+            f"{ytlive_api_base_url}/videos",
+            params={
+                "key": ytlive_api_key,
+                "part": "snippet,status,liveStreamingDetails",
+                "id": ",".join(video_ids),
+                "fields": YTLIVE_API_VIDEO_FIELDS,
+            },
+            headers={
+                "User-Agent": useragent,
+            },
+        )
+        quota_scope.record(api="videos")
+        raise_for_ytlive_api_status(response=video_api_response)
+        return parse_upstream_response(
+            response=video_api_response,
+            content_type=YtliveApiVideo,
+        )
+
+    # 複数の動画の情報は、まとめて取得する
+    video_api_data_list = await asyncio.gather(
+        *(
+            fetch_video_api(video_ids=chunked_video_ids)
+            for chunked_video_ids in _chunk(video_ids, YTLIVE_API_MAX_IDS)
+        )
+    )
+
+    video_list_items: list[YtliveApiVideoItem] = []
+    for video_api_data in video_api_data_list:
+        if video_api_data.items is not None:
+            video_list_items.extend(video_api_data.items)
+
+    return video_list_items
+
+
+async def fetch_ytlive_channel_live(
+    http_client: httpx.AsyncClient,
+    ytlive_channel_id: str,
+    ytlive_api_key: str,
+    ytlive_api_base_url: str,
+    useragent: str,
+    channel_cache: YtliveChannelCache,
+    channel_cache_ttl: timedelta,
+    discovery: YtliveDiscovery,
+    quota_scope: YtliveQuotaScope,
+) -> YtliveChannelLive:
+    ytlive_channel_lives = await fetch_ytlive_channel_lives(
+        http_client=http_client,
+        ytlive_channel_ids=[ytlive_channel_id],
+        ytlive_api_key=ytlive_api_key,
+        ytlive_api_base_url=ytlive_api_base_url,
+        useragent=useragent,
+        channel_cache=channel_cache,
+        channel_cache_ttl=channel_cache_ttl,
+        discovery=discovery,
+        quota_scope=quota_scope,
+    )
+
+    return ytlive_channel_lives.channels[ytlive_channel_id]
+
+
+async def fetch_ytlive_channel_lives(
+    http_client: httpx.AsyncClient,
+    ytlive_channel_ids: list[str],
+    ytlive_api_key: str,
+    ytlive_api_base_url: str,
+    useragent: str,
+    channel_cache: YtliveChannelCache,
+    channel_cache_ttl: timedelta,
+    discovery: YtliveDiscovery,
+    quota_scope: YtliveQuotaScope,
+) -> YtliveChannelLives:
+    async def fetch_discovered_and_video_items() -> tuple[
+        dict[str, YtliveDiscoveredVideos],
+        list[YtliveApiVideoItem],
+    ]:
+        # 動画リストはチャンネルごとにしか取得できない
+        discovered_videos_list = await asyncio.gather(
+            *(
+                discover_ytlive_videos(
+                    http_client=http_client,
+                    ytlive_channel_id=ytlive_channel_id,
+                    ytlive_api_key=ytlive_api_key,
+                    ytlive_api_base_url=ytlive_api_base_url,
+                    useragent=useragent,
+                    discovery=discovery,
+                    quota_scope=quota_scope,
+                )
+                for ytlive_channel_id in ytlive_channel_ids
+            )
+        )
+        discovered_videos_by_channel = dict(
+            zip(ytlive_channel_ids, discovered_videos_list, strict=True)
+        )
+
+        video_ids = list(
+            dict.fromkeys(
+                video_id
+                for discovered_videos in discovered_videos_list
+                for video_id in discovered_videos.video_ids
+            )
+        )
+        video_list_items = (
+            await fetch_ytlive_video_items(
+                http_client=http_client,
+                video_ids=video_ids,
+                ytlive_api_key=ytlive_api_key,
+                ytlive_api_base_url=ytlive_api_base_url,
+                useragent=useragent,
+                quota_scope=quota_scope,
+            )
+            if len(video_ids) > 0
+            else []
+        )
+
+        return discovered_videos_by_channel, video_list_items
+
+    # チャンネル情報の取得は動画リストの取得に依存しないため、並行して取得する
+    (
+        channels,
+        (discovered_videos_by_channel, video_list_items),
+    ) = await asyncio.gather(
+        fetch_ytlive_channels(
+            http_client=http_client,
+            ytlive_channel_ids=ytlive_channel_ids,
+            ytlive_api_key=ytlive_api_key,
+            ytlive_api_base_url=ytlive_api_base_url,
+            useragent=useragent,
+            channel_cache=channel_cache,
+            channel_cache_ttl=channel_cache_ttl,
+            quota_scope=quota_scope,
+        ),
+        fetch_discovered_and_video_items(),
+    )
+
+    channel_lives: dict[str, YtliveChannelLive] = {}
+    for ytlive_channel_id in ytlive_channel_ids:
+        discovered_videos = discovered_videos_by_channel[ytlive_channel_id]
+        discovered_video_ids = set(discovered_videos.video_ids)
+
+        channel_video_list_items = [
+            video_item
+            for video_item in video_list_items
+            if video_item.id in discovered_video_ids
+        ]
+
+        # search.listで取得していない場合、videos.listのliveBroadcastContentを使う
+        live_broadcast_contents = dict(discovered_videos.live_broadcast_contents)
+        for video_item in channel_video_list_items:
+            if video_item.snippet is not None:
+                if video_item.snippet.liveBroadcastContent is not None:
+                    live_broadcast_contents.setdefault(
+                        video_item.id,
+                        video_item.snippet.liveBroadcastContent,
+                    )
+
+        channel_lives[ytlive_channel_id] = build_ytlive_channel_live(
+            channel=channels.get(ytlive_channel_id),
+            video_list_items=channel_video_list_items,
+            live_broadcast_contents=live_broadcast_contents,
+        )
+
+    return YtliveChannelLives(channels=channel_lives)
+
+
+def build_ytlive_channel_live(
+    channel: YtliveApiChannelItem | None,
+    video_list_items: list[YtliveApiVideoItem],
+    live_broadcast_contents: dict[str, str],
+) -> YtliveChannelLive:
+    channel_custom_url: str | None = None
+    channel_thumbnails: YtliveApiChannelItemSnippetThumbnails | None = None
+    if channel is not None:
+        if channel.snippet is not None:
+            channel_custom_url = channel.snippet.customUrl
+            channel_thumbnails = channel.snippet.thumbnails
 
-    video_list_items = video_api_data.items if video_api_data.items is not None else []
     live_items: list[YtliveApiVideoItem] = []
     for video_item in video_list_items:
         video_id = video_item.id
@@ -191,16 +676,7 @@ def fetch_ytlive_channel_live(
             # 非公開・限定公開のライブ配信・動画は対象にしない
             continue
 
-        search_item: YtliveApiSearchItem = next(
-            filter(
-                lambda search_item: search_item.id.videoId == video_id,
-                search_list_items,
-            )
-        )
-
-        live_broadcast_content: str | None = None
-        if search_item.snippet is not None:
-            live_broadcast_content = search_item.snippet.liveBroadcastContent
+        live_broadcast_content = live_broadcast_contents.get(video_id)
 
         if live_broadcast_content == "live":
             # ライブ配信中の番組がある場合、選択する
@@ -226,7 +702,7 @@ def fetch_ytlive_channel_live(
         start_time = (
             datetime.fromisoformat(start_time_string)
             if start_time_string is not None
-            else datetime.min
+            else datetime.min.replace(tzinfo=UTC)
         )
 
         if max_start_time is None or max_start_time < start_time:
@@ -236,23 +712,12 @@ def fetch_ytlive_channel_live(
     # Extract data from active_video_item
     active_video_id = active_video_item.id if active_video_item is not None else None
 
-    active_search_item: YtliveApiSearchItem | None = next(
-        filter(
-            lambda search_item: (
-                search_item is not None and search_item.id.videoId == active_video_id
-            ),
-            search_list_items,
-        ),
-        None,
+    active_live_broadcast_content = (
+        live_broadcast_contents.get(active_video_id)
+        if active_video_id is not None
+        else None
     )
 
-    active_search_item_live_broadcast_content: str | None = None
-    if active_search_item is not None:
-        if active_search_item.snippet is not None:
-            active_search_item_live_broadcast_content = (
-                active_search_item.snippet.liveBroadcastContent
-            )
-
     title: str | None = None
     description: str | None = None
     channel_id: str | None = None
@@ -298,7 +763,7 @@ def fetch_ytlive_channel_live(
             thumbnails=thumbnails,
             startTime=active_video_item_start_time_string,
             endTime=active_video_item_end_time_string,
-            isOnair=active_search_item_live_broadcast_content == "live",
+            isOnair=active_live_broadcast_content == "live",
         ),
         channel=YtliveChannelLiveChannel(
             id=channel_id,
@@ -0,0 +1,142 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Literal
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel
+
+PT = ZoneInfo("America/Los_Angeles")
+"""
+YouTube Data APIのクォータがリセットされるタイムゾーン（太平洋時間）
+"""
+
+YtliveApiName = Literal["channels", "playlistItems", "search", "videos"]
+
+YTLIVE_API_QUOTA_COSTS: dict[YtliveApiName, int] = {
+    "channels": 1,
+    "playlistItems": 1,
+    "search": 100,
+    "videos": 1,
+}
+"""
+各APIの1リクエストあたりのクォータ消費量
+"""
+
+
+class YtliveQuotaSourceUsage(BaseModel):
+    refresh_cost: int
+    """
+    1回の取得で消費したクォータ
+    """
+
+    interval: timedelta
+    """
+    設定された取得間隔
+    """
+
+
+class YtliveQuotaScope:
+    """
+    1回の取得で消費したクォータを数える
+    """
+
+    def __init__(self, tracker: "YtliveQuotaTracker") -> None:
+        self.tracker = tracker
+        self.units = 0
+
+    def record(self, api: YtliveApiName) -> None:
+        cost = YTLIVE_API_QUOTA_COSTS[api]
+        self.tracker.record(api=api)
+        self.units += cost
+
+
+class YtliveQuotaTracker:
+    """
+    YouTube Data APIのクォータ消費量を記録し、1日の予算内に収まる取得間隔を計算する。
+
+    クォータは太平洋時間の0時にリセットされる。
+    """
+
+    def __init__(self) -> None:
+        self._day: str | None = None
+        self._used = 0
+        self._sources: dict[str, YtliveQuotaSourceUsage] = {}
+        self._total_by_api: dict[YtliveApiName, int] = {}
+
+    def _rollover(self, now: datetime) -> None:
+        day = now.astimezone(PT).date().isoformat()
+        if day != self._day:
+            self._day = day
+            self._used = 0
+
+    def record(self, api: YtliveApiName, now: datetime | None = None) -> None:
+        self._rollover(now=now or datetime.now(tz=PT))
+        self._used += YTLIVE_API_QUOTA_COSTS[api]
+        self._total_by_api[api] = (
+            self._total_by_api.get(api, 0) + YTLIVE_API_QUOTA_COSTS[api]
+        )
+
+    def get_used(self, now: datetime) -> int:
+        self._rollover(now=now)
+        return self._used
+
+    def get_total_by_api(self) -> dict[YtliveApiName, int]:
+        """
+        起動してから消費したクォータ（APIごと）
+        """
+        return dict(self._total_by_api)
+
+    @contextmanager
+    def scope(self, name: str, interval: timedelta) -> Iterator[YtliveQuotaScope]:
+        quota_scope = YtliveQuotaScope(tracker=self)
+        try:
+            yield quota_scope
+        finally:
+            # 失敗した取得で消費したクォータも記録する
+            self._sources[name] = YtliveQuotaSourceUsage(
+                refresh_cost=quota_scope.units,
+                interval=interval,
+            )
+
+    def get_safe_interval(
+        self,
+        name: str,
+        interval: timedelta,
+        now: datetime,
+        daily_budget: int,
+    ) -> timedelta:
+        """
+        各ソースの取得を続けても、クォータのリセットまでに予算を超えない取得間隔を返す。
+
+        予算に余裕がある場合は、設定された取得間隔をそのまま返す。
+        """
+        if daily_budget <= 0:
+            return interval
+
+        self._rollover(now=now)
+
+        now_pt = now.astimezone(PT)
+        reset_at = datetime.combine(
+            now_pt.date() + timedelta(days=1),
+            datetime.min.time(),
+            tzinfo=PT,
+        )
+        # 同じtzinfoの日時の差はUTCオフセットを無視するため、夏時間の切り替わる日も
+        # 正しい時間になるようにUTCで計算する
+        time_until_reset = reset_at.astimezone(UTC) - now_pt.astimezone(UTC)
+
+        remaining_budget = daily_budget - self._used
+        if remaining_budget <= 0:
+            # 予算を使い切った場合、リセットまで取得しない
+            return max(interval, time_until_reset)
+
+        # リセットまでに消費する見込みのクォータ
+        projected = sum(
+            usage.refresh_cost * (time_until_reset / usage.interval)
+            for usage in self._sources.values()
+            if usage.interval > timedelta(0)
+        )
+
+        scale = max(1.0, projected / remaining_budget)
+        return interval * scale
@@ -0,0 +1,100 @@
+import hashlib
+from collections.abc import Callable
+from datetime import UTC, datetime
+from email.utils import format_datetime
+
+from pydantic import BaseModel, ConfigDict
+
+from .metrics import SERIALIZE_DURATION
+
+
+class Snapshot[T: BaseModel](BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    content: T
+    """
+    検証済みの配信情報
+    """
+
+    content_json: bytes
+    """
+    contentをJSONにシリアライズしたもの（レスポンスボディとしてそのまま返す）
+    """
+
+    fetched_at: datetime
+    """
+    配信情報を取得した時刻
+    """
+
+    etag: str
+    """
+    content_jsonのハッシュから生成した強いETag（引用符を含む）
+    """
+
+    last_modified: str
+    """
+    fetched_atをHTTP-date形式にしたもの（Last-Modifiedヘッダ用）
+    """
+
+
+def create_snapshot[T: BaseModel](content: T, fetched_at: datetime) -> Snapshot[T]:
+    with SERIALIZE_DURATION.time():
+        content_json = content.model_dump_json().encode("utf-8")
+        content_hash = hashlib.sha256(content_json).hexdigest()
+
+    return Snapshot(
+        content=content,
+        content_json=content_json,
+        fetched_at=fetched_at,
+        etag=f'"{content_hash[:32]}"',
+        last_modified=format_datetime(fetched_at.astimezone(UTC), usegmt=True),
+    )
+
+
+class SnapshotItemCache[T: BaseModel]:
+    """
+    まとめて取得した配信情報から切り出した、キーごとの配信情報のキャッシュ
+
+    切り出し元の配信情報の内容が変化すると、キャッシュは破棄される。
+    内容が変化せずに取得時刻のみ更新された場合、切り出した配信情報の取得時刻も更新する
+    （古い取得時刻のままでは、AgeやWarningが誤る）。
+    """
+
+    def __init__(self) -> None:
+        self._parent_etag: str | None = None
+        self._parent_fetched_at: datetime | None = None
+        self._items: dict[str, Snapshot[T]] = {}
+
+    def get[U: BaseModel](
+        self,
+        parent: Snapshot[U],
+        key: str,
+        get_item: Callable[[U], T | None],
+    ) -> Snapshot[T] | None:
+        if parent.etag != self._parent_etag:
+            self._parent_etag = parent.etag
+            self._parent_fetched_at = parent.fetched_at
+            self._items = {}
+        elif parent.fetched_at != self._parent_fetched_at:
+            self._parent_fetched_at = parent.fetched_at
+            # 内容は同じため、シリアライズし直さない
+            self._items = {
+                item_key: item_snapshot.model_copy(
+                    update={
+                        "fetched_at": parent.fetched_at,
+                        "last_modified": parent.last_modified,
+                    }
+                )
+                for item_key, item_snapshot in self._items.items()
+            }
+
+        item_snapshot = self._items.get(key)
+        if item_snapshot is None:
+            item = get_item(parent.content)
+            if item is None:
+                return None
+
+            item_snapshot = create_snapshot(content=item, fetched_at=parent.fetched_at)
+            self._items[key] = item_snapshot
+
+        return item_snapshot
@@ -0,0 +1,16 @@
+from .base import IntervalPolicy, KeyedSource, Source
+from .nicolive import NicoliveSource, NicoliveUsersSource
+from .registry import SourceRegistry, get_source_registry
+from .ytlive import YtliveChannelsSource, YtliveSource
+
+__all__ = [
+    "IntervalPolicy",
+    "KeyedSource",
+    "NicoliveSource",
+    "NicoliveUsersSource",
+    "Source",
+    "SourceRegistry",
+    "YtliveChannelsSource",
+    "YtliveSource",
+    "get_source_registry",
+]
@@ -0,0 +1,195 @@
+from abc import ABC, abstractmethod
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING, cast
+
+import httpx
+from pydantic import BaseModel
+
+from ..history import Change, detect_changes
+from ..schedule import LiveProgram, get_adaptive_interval
+from ..settings import Settings
+from ..snapshot import Snapshot
+
+if TYPE_CHECKING:
+    from ..snapshot import SnapshotItemCache
+    from ..state import SourceState, State
+
+
+class IntervalPolicy(BaseModel):
+    """
+    取得間隔の設定
+
+    配信状態に応じて、min_intervalからmax_intervalの間で変化する（schedule）。
+    """
+
+    interval: timedelta
+    min_interval: timedelta
+    max_interval: timedelta
+
+
+class Source[T: BaseModel](ABC):
+    """
+    配信情報の取得元（ソース）
+
+    ソースを登録すると、バックグラウンドでの取得、キャッシュ、ダンプ、メトリクス、
+    APIのルート（{path}、{path}/stream）がソースごとに作成される。
+    """
+
+    name: str
+    """
+    ソースの名前（ダンプのキー、メトリクスのラベルとして使われる）
+    """
+
+    content_type: type[T]
+
+    path: str
+    """
+    APIのパス（/v1/nicoliveなど）
+    """
+
+    event: str
+    """
+    プッシュ配信のイベント名
+    """
+
+    not_found_detail: str
+    """
+    配信情報がない場合の404のメッセージ
+    """
+
+    @abstractmethod
+    def is_enabled(self, settings: Settings) -> bool:
+        """
+        取得対象が設定されている場合Trueを返す（設定されていない場合は取得しない）
+        """
+
+    @abstractmethod
+    def get_dump_path(self, settings: Settings) -> str:
+        """
+        CACHE_BACKEND=fileの場合のダンプの保存先
+        """
+
+    @abstractmethod
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy: ...
+
+    @abstractmethod
+    def get_programs(self, content: T) -> list[LiveProgram]:
+        """
+        取得間隔の計算に使う配信状態を返す
+        """
+
+    @abstractmethod
+    async def fetch(
+        self,
+        settings: Settings,
+        state: "State",
+        http_client: httpx.AsyncClient,
+    ) -> T:
+        """
+        配信サイトから配信情報を取得する。失敗した場合は例外を送出する。
+        """
+
+    def get_source_state(self, state: "State") -> "SourceState[T]":
+        return cast("SourceState[T]", state.source_states[self.name])
+
+    def get_adaptive_interval(self, settings: Settings, state: "State") -> timedelta:
+        snapshot = self.get_source_state(state=state).snapshot
+        interval_policy = self.get_interval_policy(settings=settings)
+        return get_adaptive_interval(
+            programs=(
+                self.get_programs(content=snapshot.content)
+                if snapshot is not None
+                else []
+            ),
+            now=datetime.now(tz=UTC),
+            interval=interval_policy.interval,
+            min_interval=interval_policy.min_interval,
+            max_interval=interval_policy.max_interval,
+            start_window=timedelta(seconds=settings.adaptive_start_window),
+            idle_backoff=timedelta(seconds=settings.adaptive_idle_backoff),
+        )
+
+    def get_interval(self, settings: Settings, state: "State") -> timedelta:
+        """
+        現在の取得間隔を返す（デフォルトは配信状態に応じた取得間隔）
+        """
+        return self.get_adaptive_interval(settings=settings, state=state)
+
+    def get_keyed_programs(self, content: T) -> dict[str | None, LiveProgram]:
+        """
+        変更履歴に使う、取得対象ごとの配信状態を返す（取得対象が1つの場合、キーはNone）
+        """
+        programs = self.get_programs(content=content)
+        return {None: programs[0]} if programs else {}
+
+    def get_changes(self, previous: T, current: T) -> list[Change]:
+        return detect_changes(
+            previous=self.get_keyed_programs(content=previous),
+            current=self.get_keyed_programs(content=current),
+        )
+
+
+class KeyedSource[T: BaseModel, I: BaseModel](Source[T]):
+    """
+    複数の取得対象をまとめて取得し、取得対象ごとの配信情報を返すソース
+
+    APIのパスは{path}/{キー}、{path}/{キー}/streamになる。
+    """
+
+    item_type: type[I]
+
+    key_name: str
+    """
+    APIのパスパラメータの名前
+    """
+
+    key_not_found_detail: str
+    """
+    取得対象として設定されていないキーの場合の404のメッセージ
+    """
+
+    @abstractmethod
+    def get_keys(self, settings: Settings) -> list[str]: ...
+
+    @abstractmethod
+    def get_items(self, content: T) -> dict[str, I]:
+        """
+        まとめて取得した配信情報を、キーごとの配信情報に分ける
+        """
+
+    @abstractmethod
+    def get_item_program(self, item: I) -> LiveProgram: ...
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return len(self.get_keys(settings=settings)) > 0
+
+    def get_item(self, content: T, key: str) -> I | None:
+        return self.get_items(content=content).get(key)
+
+    def get_programs(self, content: T) -> list[LiveProgram]:
+        return [
+            self.get_item_program(item=item)
+            for item in self.get_items(content=content).values()
+        ]
+
+    def get_keyed_programs(self, content: T) -> dict[str | None, LiveProgram]:
+        return {
+            key: self.get_item_program(item=item)
+            for key, item in self.get_items(content=content).items()
+        }
+
+    def get_item_snapshot(
+        self,
+        state: "State",
+        parent: Snapshot[T],
+        key: str,
+    ) -> Snapshot[I] | None:
+        """
+        まとめて取得した配信情報から、キーの配信情報を切り出す（切り出し結果はキャッシュする）
+        """
+        item_snapshots = cast("SnapshotItemCache[I]", state.item_snapshots[self.name])
+        return item_snapshots.get(
+            parent=parent,
+            key=key,
+            get_item=lambda content: self.get_item(content=content, key=key),
+        )
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+import httpx
+
+from ..schedule import LiveProgram
+from ..settings import Settings, get_nicolive_user_ids
+from ..site.nicolive import (
+    NicoliveUserLive,
+    NicoliveUserLives,
+    fetch_nicolive_user_live,
+    fetch_nicolive_user_lives,
+)
+from ..utility.useragent import get_useragent
+from .base import IntervalPolicy, KeyedSource, Source
+
+if TYPE_CHECKING:
+    from ..state import State
+
+
+def _get_nicolive_interval_policy(settings: Settings) -> IntervalPolicy:
+    return IntervalPolicy(
+        interval=timedelta(seconds=settings.nicolive_interval),
+        min_interval=timedelta(seconds=settings.nicolive_min_interval),
+        max_interval=timedelta(seconds=settings.nicolive_max_interval),
+    )
+
+
+class NicoliveSource(Source[NicoliveUserLive]):
+    """
+    /v1/nicolive: NICOLIVE_USER_IDの配信情報
+    """
+
+    name = "nicolive"
+    content_type = NicoliveUserLive
+    path = "/v1/nicolive"
+    event = "nicolive"
+    not_found_detail = "Nicolive User Live not found"
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return bool(settings.nicolive_user_id)
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return settings.nicolive_dump_path
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        return _get_nicolive_interval_policy(settings=settings)
+
+    def get_programs(self, content: NicoliveUserLive) -> list[LiveProgram]:
+        return [content.program]
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: "State",
+        http_client: httpx.AsyncClient,
+    ) -> NicoliveUserLive:
+        return await fetch_nicolive_user_live(
+            http_client=http_client,
+            nicolive_user_id=settings.nicolive_user_id,
+            useragent=get_useragent(settings=settings),
+            nicolive_api_base_url=settings.nicolive_api_base_url,
+        )
+
+
+class NicoliveUsersSource(KeyedSource[NicoliveUserLives, NicoliveUserLive]):
+    """
+    /v2/nicolive/{nicolive_user_id}: NICOLIVE_USER_IDSの配信情報（まとめて取得する）
+    """
+
+    name = "nicolive_users"
+    content_type = NicoliveUserLives
+    item_type = NicoliveUserLive
+    path = "/v2/nicolive"
+    key_name = "nicolive_user_id"
+    event = "nicolive"
+    not_found_detail = "Nicolive User Live not found"
+    key_not_found_detail = "Nicolive User not found"
+
+    def get_keys(self, settings: Settings) -> list[str]:
+        return get_nicolive_user_ids(settings=settings)
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return settings.nicolive_users_dump_path
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        return _get_nicolive_interval_policy(settings=settings)
+
+    def get_items(self, content: NicoliveUserLives) -> dict[str, NicoliveUserLive]:
+        return content.users
+
+    def get_item_program(self, item: NicoliveUserLive) -> LiveProgram:
+        return item.program
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: "State",
+        http_client: httpx.AsyncClient,
+    ) -> NicoliveUserLives:
+        return await fetch_nicolive_user_lives(
+            http_client=http_client,
+            nicolive_user_ids=get_nicolive_user_ids(settings=settings),
+            useragent=get_useragent(settings=settings),
+            nicolive_api_base_url=settings.nicolive_api_base_url,
+        )
@@ -0,0 +1,38 @@
+from collections.abc import Iterator
+from functools import lru_cache
+from typing import Any
+
+from .base import Source
+from .nicolive import NicoliveSource, NicoliveUsersSource
+from .ytlive import YtliveChannelsSource, YtliveSource
+
+
+class SourceRegistry:
+    """
+    登録されたソース（登録順に取得・ルートの作成を行う）
+    """
+
+    def __init__(self) -> None:
+        self._sources: dict[str, Source[Any]] = {}
+
+    def register(self, source: Source[Any]) -> None:
+        if source.name in self._sources:
+            raise ValueError(f"Source {source.name} is already registered")
+
+        self._sources[source.name] = source
+
+    def get(self, name: str) -> Source[Any]:
+        return self._sources[name]
+
+    def __iter__(self) -> Iterator[Source[Any]]:
+        return iter(self._sources.values())
+
+
+@lru_cache
+def get_source_registry() -> SourceRegistry:
+    registry = SourceRegistry()
+    registry.register(NicoliveSource())
+    registry.register(YtliveSource())
+    registry.register(NicoliveUsersSource())
+    registry.register(YtliveChannelsSource())
+    return registry
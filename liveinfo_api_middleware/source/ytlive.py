@@ -0,0 +1,142 @@
+from datetime import UTC, datetime, timedelta
+from typing import TYPE_CHECKING
+
+import httpx
+
+from ..schedule import LiveProgram
+from ..settings import Settings, get_ytlive_channel_ids
+from ..site.ytlive import (
+    YtliveChannelLive,
+    YtliveChannelLives,
+    fetch_ytlive_channel_live,
+    fetch_ytlive_channel_lives,
+)
+from ..utility.useragent import get_useragent
+from .base import IntervalPolicy, KeyedSource, Source
+
+if TYPE_CHECKING:
+    from ..state import State
+
+
+def _get_ytlive_interval_policy(settings: Settings) -> IntervalPolicy:
+    return IntervalPolicy(
+        interval=timedelta(seconds=settings.ytlive_interval),
+        min_interval=timedelta(seconds=settings.ytlive_min_interval),
+        max_interval=timedelta(seconds=settings.ytlive_max_interval),
+    )
+
+
+class YtliveSource(Source[YtliveChannelLive]):
+    """
+    /v1/ytlive: YTLIVE_CHANNEL_IDの配信情報
+    """
+
+    name = "ytlive"
+    content_type = YtliveChannelLive
+    path = "/v1/ytlive"
+    event = "ytlive"
+    not_found_detail = "Ytlive Channel Live not found"
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return bool(settings.ytlive_channel_id)
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return settings.ytlive_dump_path
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        return _get_ytlive_interval_policy(settings=settings)
+
+    def get_programs(self, content: YtliveChannelLive) -> list[LiveProgram]:
+        return [content.program]
+
+    def get_interval(self, settings: Settings, state: "State") -> timedelta:
+        # クォータの予算を超えないように、取得間隔を延ばす
+        return state.ytlive_quota.get_safe_interval(
+            name=self.name,
+            interval=self.get_adaptive_interval(settings=settings, state=state),
+            now=datetime.now(tz=UTC),
+            daily_budget=settings.ytlive_quota_daily_budget,
+        )
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: "State",
+        http_client: httpx.AsyncClient,
+    ) -> YtliveChannelLive:
+        with state.ytlive_quota.scope(
+            name=self.name,
+            interval=self.get_adaptive_interval(settings=settings, state=state),
+        ) as quota_scope:
+            return await fetch_ytlive_channel_live(
+                http_client=http_client,
+                ytlive_channel_id=settings.ytlive_channel_id,
+                ytlive_api_key=settings.ytlive_api_key,
+                ytlive_api_base_url=settings.ytlive_api_base_url,
+                useragent=get_useragent(settings=settings),
+                channel_cache=state.ytlive_channel_cache,
+                channel_cache_ttl=timedelta(seconds=settings.ytlive_channel_interval),
+                discovery=settings.ytlive_discovery,
+                quota_scope=quota_scope,
+            )
+
+
+class YtliveChannelsSource(KeyedSource[YtliveChannelLives, YtliveChannelLive]):
+    """
+    /v2/ytlive/{ytlive_channel_id}: YTLIVE_CHANNEL_IDSの配信情報（まとめて取得する）
+    """
+
+    name = "ytlive_channels"
+    content_type = YtliveChannelLives
+    item_type = YtliveChannelLive
+    path = "/v2/ytlive"
+    key_name = "ytlive_channel_id"
+    event = "ytlive"
+    not_found_detail = "Ytlive Channel Live not found"
+    key_not_found_detail = "Ytlive Channel not found"
+
+    def get_keys(self, settings: Settings) -> list[str]:
+        return get_ytlive_channel_ids(settings=settings)
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return settings.ytlive_channels_dump_path
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        return _get_ytlive_interval_policy(settings=settings)
+
+    def get_items(self, content: YtliveChannelLives) -> dict[str, YtliveChannelLive]:
+        return content.channels
+
+    def get_item_program(self, item: YtliveChannelLive) -> LiveProgram:
+        return item.program
+
+    def get_interval(self, settings: Settings, state: "State") -> timedelta:
+        # クォータの予算を超えないように、取得間隔を延ばす
+        return state.ytlive_quota.get_safe_interval(
+            name=self.name,
+            interval=self.get_adaptive_interval(settings=settings, state=state),
+            now=datetime.now(tz=UTC),
+            daily_budget=settings.ytlive_quota_daily_budget,
+        )
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: "State",
+        http_client: httpx.AsyncClient,
+    ) -> YtliveChannelLives:
+        with state.ytlive_quota.scope(
+            name=self.name,
+            interval=self.get_adaptive_interval(settings=settings, state=state),
+        ) as quota_scope:
+            return await fetch_ytlive_channel_lives(
+                http_client=http_client,
+                ytlive_channel_ids=get_ytlive_channel_ids(settings=settings),
+                ytlive_api_key=settings.ytlive_api_key,
+                ytlive_api_base_url=settings.ytlive_api_base_url,
+                useragent=get_useragent(settings=settings),
+                channel_cache=state.ytlive_channel_cache,
+                channel_cache_ttl=timedelta(seconds=settings.ytlive_channel_interval),
+                discovery=settings.ytlive_discovery,
+                quota_scope=quota_scope,
+            )
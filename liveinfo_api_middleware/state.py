@@ -1,14 +1,392 @@
-from datetime import datetime
+import asyncio
+import threading
+from collections import deque
+from collections.abc import Callable, Coroutine
+from contextlib import AbstractContextManager
+from datetime import UTC, datetime, timedelta
 from functools import lru_cache
+from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+from .broadcaster import ChangeWaiters, SnapshotBroadcaster
+from .cache_backend import CacheBackend, DumpKey, create_cache_backend
+from .circuit_breaker import CircuitBreaker, CircuitBreakerPolicy, CircuitState
+from .dump import DumpWriter
+from .history import Change, HistoryEntry
+from .settings import get_settings
+from .site.ytlive import YtliveChannelCache, YtliveQuotaTracker
+from .snapshot import Snapshot, SnapshotItemCache
+from .source import KeyedSource, get_source_registry
+from .utility.upstream_error import UpstreamErrorKind, classify_upstream_error
+
+
+class SourceState[T: BaseModel](BaseModel):
+    snapshot: Snapshot[T] | None = None
+    """
+    最後に取得に成功した配信情報（またはダンプから読み込んだ配信情報）
+    """
+
+    last_fetched: datetime | None = None
+    """
+    最後に取得を試みた時刻（成功・失敗を問わない）
+    """
+
+    last_succeeded: datetime | None = None
+    last_errored: datetime | None = None
+    last_error: str | None = None
+    last_error_kind: UpstreamErrorKind | None = None
+
+    cache_hits: int = 0
+    """
+    取得を待たずにキャッシュから応答したリクエストの数
+    """
+
+    cache_misses: int = 0
+    """
+    キャッシュが期限切れで、取得の完了を待って応答したリクエストの数
+    """
+
+    stale_responses: int = 0
+    """
+    取得間隔を過ぎた古い配信情報で応答したリクエストの数
+    """
+
+    upstream_fetches: int = 0
+    """
+    配信サイトへの取得の実行回数
+    """
+
+    dump_errors: int = 0
+    """
+    ダンプの書き込みに失敗した回数（配信サイトからの取得の失敗には含めない）
+    """
+
+    version: int = 0
+    """
+    配信情報の内容が変化するたびに増える番号（プロセスごとに0から数える）
+    """
+
+    history_size: int = 100
+    """
+    保持する変更履歴の数
+    """
+
+    get_changes: Callable[[T, T], list[Change]] | None = None
+    """
+    以前の配信情報と新しい配信情報から、配信状態の変化を返す
+    """
+
+    # 取得処理とダンプの書き込みの完了はイベントループ上で記録されるが、
+    # refresherのメトリクスのHTTPサーバー（REFRESHER_METRICS_PORT）は別のスレッドから
+    # 読み込むため、複数のフィールドの読み書きはロックで保護する
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    # メモリ上の配信情報と対応するダンプのキー
+    _dump_key: DumpKey | None = PrivateAttr(default=None)
+
+    # ダンプの変更を最後に確認した時刻（time.monotonic）
+    _dump_checked: float | None = PrivateAttr(default=None)
+
+    # 実行中の取得処理（single-flight）
+    _refresh_task: asyncio.Task[None] | None = PrivateAttr(default=None)
+
+    # 配信情報の更新の購読者（/streamエンドポイント）
+    _broadcaster: SnapshotBroadcaster[T] = PrivateAttr(
+        default_factory=SnapshotBroadcaster,
+    )
+
+    # 配信情報の内容の変化を待つリクエスト（ロングポーリング）
+    _change_waiters: ChangeWaiters = PrivateAttr(default_factory=ChangeWaiters)
+
+    # 失敗が続いている配信サイトへのアクセスを遮断する
+    _circuit_breaker: CircuitBreaker = PrivateAttr(default_factory=CircuitBreaker)
+
+    # 変更履歴（古いものから破棄する）
+    _history: deque[HistoryEntry] = PrivateAttr(default_factory=deque)
+
+    def model_post_init(self, context: Any) -> None:
+        self._history = deque(maxlen=max(self.history_size, 1))
+
+    def get_time_until_expired(self, now: datetime, interval: timedelta) -> timedelta:
+        """
+        次の取得までの残り時間を返す。
+
+        このプロセスで取得していない場合（serverロールのAPIサーバなど）、
+        ダンプから読み込んだ配信情報の取得時刻から求める。
+        """
+        with self._lock:
+            if self.last_fetched is not None:
+                expires_from = self.last_fetched
+            elif self.snapshot is not None:
+                expires_from = self.snapshot.fetched_at
+            else:
+                return timedelta(0)
+
+            return max(expires_from + interval - now, timedelta(0))
+
+    def record_success(self, snapshot: Snapshot[T], now: datetime) -> None:
+        with self._lock:
+            changed = self._is_changed(snapshot=snapshot)
+            if changed:
+                self._record_change(snapshot=snapshot)
+            self.snapshot = snapshot
+            self.last_succeeded = now
+
+        if changed:
+            self._broadcaster.publish(snapshot=snapshot)
+            self._change_waiters.notify_all()
+
+    def record_dump(self, snapshot: Snapshot[T], dump_key: DumpKey) -> None:
+        with self._lock:
+            changed = self._is_changed(snapshot=snapshot)
+            if changed:
+                self._record_change(snapshot=snapshot)
+            self.snapshot = snapshot
+            self._dump_key = dump_key
+
+        if changed:
+            self._broadcaster.publish(snapshot=snapshot)
+            self._change_waiters.notify_all()
+
+    def _is_changed(self, snapshot: Snapshot[T]) -> bool:
+        return self.snapshot is None or self.snapshot.etag != snapshot.etag
+
+    def _record_change(self, snapshot: Snapshot[T]) -> None:
+        # ロックを獲得し、snapshotを置き換える前に呼び出す
+        changes: list[Change] = []
+        if self.snapshot is not None and self.get_changes is not None:
+            changes = self.get_changes(self.snapshot.content, snapshot.content)
+
+        self.version += 1
+        self._history.append(
+            HistoryEntry(
+                version=self.version,
+                changedAt=snapshot.fetched_at,
+                etag=snapshot.etag,
+                changes=changes,
+            )
+        )
+
+    def get_history(self, since: int) -> tuple[int, list[HistoryEntry], bool]:
+        """
+        現在のバージョンと、sinceより後のバージョンの変更履歴を返す。
+
+        sinceより後の変更履歴の一部が破棄されている場合（または、再起動により
+        sinceが現在のバージョンより新しい場合）、3つ目の値がTrueになる。
+        """
+        with self._lock:
+            entries = [entry for entry in self._history if entry.version > since]
+            truncated = since > self.version or (
+                len(self._history) > 0 and since + 1 < self._history[0].version
+            )
+            return self.version, entries, truncated
+
+    def subscribe(
+        self, maxsize: int
+    ) -> AbstractContextManager[asyncio.Queue[Snapshot[T]]]:
+        """
+        配信情報の内容が変化するたびに、新しい配信情報を受け取るキューを返す
+        """
+        return self._broadcaster.subscribe(maxsize=maxsize)
+
+    def get_subscriber_count(self) -> int:
+        return self._broadcaster.subscriber_count
+
+    async def wait_for_change(self, timeout: float) -> None:
+        """
+        配信情報の内容が次に変化するまで待つ。timeout秒経過した場合、TimeoutErrorを送出する。
+        """
+        await self._change_waiters.wait(timeout=timeout)
+
+    def get_waiter_count(self) -> int:
+        return self._change_waiters.waiter_count
+
+    def record_dump_key(self, dump_key: DumpKey) -> None:
+        """
+        自身が書き込んだダンプのキーを記録する（外部からの変更として読み込まない）
+        """
+        with self._lock:
+            self._dump_key = dump_key
+
+    def get_dump_key(self) -> DumpKey | None:
+        with self._lock:
+            return self._dump_key
+
+    def should_check_dump(self, now: float, interval: float) -> bool:
+        with self._lock:
+            if self._dump_checked is not None and now - self._dump_checked < interval:
+                return False
+
+            self._dump_checked = now
+            return True
+
+    def record_error(
+        self,
+        error: BaseException,
+        now: datetime,
+        circuit_breaker_policy: CircuitBreakerPolicy | None = None,
+    ) -> None:
+        """
+        取得の失敗を記録する。
+
+        circuit_breaker_policyを指定した場合、配信サイトからの取得の失敗として扱う。
+        """
+        kind = classify_upstream_error(error)
+
+        with self._lock:
+            self.last_errored = now
+            self.last_error = repr(error)
+            self.last_error_kind = kind
+
+            if circuit_breaker_policy is not None:
+                self._circuit_breaker.record_failure(
+                    now=now,
+                    kind=kind,
+                    policy=circuit_breaker_policy,
+                )
+
+    def record_dump_error(self) -> None:
+        with self._lock:
+            self.dump_errors += 1
+
+    def begin_upstream_fetch(self, now: datetime) -> None:
+        """
+        配信サイトへのアクセスを遮断している場合、CircuitOpenErrorを送出する
+        """
+        with self._lock:
+            self._circuit_breaker.before_call(now=now)
+            self.upstream_fetches += 1
+
+    def record_upstream_success(self) -> None:
+        with self._lock:
+            self._circuit_breaker.record_success()
+
+    def get_circuit_state(self) -> CircuitState:
+        with self._lock:
+            return self._circuit_breaker.state
+
+    def record_request(self, fetched: bool) -> None:
+        with self._lock:
+            if fetched:
+                self.cache_misses += 1
+            else:
+                self.cache_hits += 1
+
+    def record_stale_response(self) -> None:
+        with self._lock:
+            self.stale_responses += 1
+
+    def _begin_fetch(self, now: datetime, interval: timedelta) -> bool:
+        with self._lock:
+            if self.last_fetched is not None and now - self.last_fetched < interval:
+                return False
+
+            self.last_fetched = now
+            return True
+
+    def is_revalidation_failed(self) -> bool:
+        """
+        最後の取得が失敗し、古い配信情報を返している場合Trueを返す
+        """
+        with self._lock:
+            if self.last_errored is None:
+                return False
+
+            return (
+                self.last_succeeded is None or self.last_succeeded < self.last_errored
+            )
+
+    async def refresh_if_expired(
+        self,
+        interval: timedelta,
+        fetch: Callable[[datetime], Coroutine[Any, Any, None]],
+        wait: bool = True,
+    ) -> bool:
+        """
+        キャッシュが期限切れの場合、fetchを呼び出して取得結果を更新する。
+
+        同時に複数回呼び出された場合、fetchは1回だけ実行され、
+        後続の呼び出しは実行中の取得の完了を待つ。
+        waitがFalseの場合、取得の完了を待たずに返る（stale-while-revalidate）。
+
+        取得の完了を待った場合Trueを返す。
+        """
+        refresh_task = self._refresh_task
+        if refresh_task is None or refresh_task.done():
+            now = datetime.now(tz=UTC)
+            if not self._begin_fetch(now=now, interval=interval):
+                return False
+
+            refresh_task = asyncio.create_task(fetch(now))
+            # 完了を待つ呼び出しがなくても、例外を取得済みにする
+            # （失敗はrecord_errorで記録される）
+            refresh_task.add_done_callback(_retrieve_task_exception)
+            self._refresh_task = refresh_task
+
+        if not wait:
+            return False
+
+        await asyncio.shield(refresh_task)
+        return True
+
+
+def _retrieve_task_exception(task: asyncio.Task[None]) -> None:
+    if not task.cancelled():
+        task.exception()
 
 
 class State(BaseModel):
-    nicolive_last_fetched: datetime | None = None
-    ytlive_last_fetched: datetime | None = None
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    source_states: dict[str, SourceState[Any]]
+    """
+    ソースごとの状態（キーはソースの名前）
+    """
+
+    item_snapshots: dict[str, SnapshotItemCache[Any]]
+    """
+    まとめて取得するソース（KeyedSource）ごとの、キーごとの配信情報のキャッシュ
+    """
+
+    ytlive_channel_cache: YtliveChannelCache = Field(
+        default_factory=YtliveChannelCache,
+    )
+    ytlive_quota: YtliveQuotaTracker = Field(
+        default_factory=YtliveQuotaTracker,
+    )
+    cache_backend: CacheBackend
+    dump_writer: DumpWriter
 
 
 @lru_cache
 def get_state() -> State:
-    return State()
+    settings = get_settings()
+    sources = get_source_registry()
+    cache_backend = create_cache_backend(
+        backend=settings.cache_backend,
+        dump_paths={
+            source.name: source.get_dump_path(settings=settings) for source in sources
+        },
+        mmap_dir=settings.cache_mmap_dir,
+        sqlite_path=settings.cache_sqlite_path,
+        redis_url=settings.cache_redis_url,
+        redis_key_prefix=settings.cache_redis_key_prefix,
+    )
+
+    return State(
+        source_states={
+            source.name: SourceState[source.content_type](  # type: ignore[name-defined]
+                history_size=settings.history_size,
+                get_changes=source.get_changes,
+            )
+            for source in sources
+        },
+        item_snapshots={
+            source.name: SnapshotItemCache[Any]()
+            for source in sources
+            if isinstance(source, KeyedSource)
+        },
+        cache_backend=cache_backend,
+        dump_writer=DumpWriter(cache_backend=cache_backend),
+    )
@@ -0,0 +1,173 @@
+import asyncio
+import random
+import time
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import httpx
+from fastapi import Request
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+
+from ..metrics import UPSTREAM_REQUEST_DURATION, get_upstream_api_name
+from ..settings import Settings
+
+tracer = trace.get_tracer(__name__)
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+"""
+再試行するレスポンスのステータスコード
+"""
+
+
+def _get_retry_after(response: httpx.Response) -> float | None:
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is None:
+        return None
+
+    if retry_after.isdigit():
+        return float(retry_after)
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    retry_after_seconds: float = (retry_at - datetime.now(tz=UTC)).total_seconds()
+    return retry_after_seconds
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    配信サイトのAPIごとに、リクエストの所要時間をメトリクスとスパンに記録するトランスポート
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        api = get_upstream_api_name(path=request.url.path)
+        with tracer.start_as_current_span(
+            f"{request.method} {api}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "http.request.method": request.method,
+                # APIキーを含むクエリパラメータは記録しない
+                "url.full": str(request.url.copy_with(query=None)),
+            },
+        ) as span:
+            started_at = time.perf_counter()
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as error:
+                UPSTREAM_REQUEST_DURATION.labels(
+                    api=api,
+                    outcome=type(error).__name__,
+                ).observe(time.perf_counter() - started_at)
+                raise
+
+            UPSTREAM_REQUEST_DURATION.labels(
+                api=api,
+                outcome=str(response.status_code),
+            ).observe(time.perf_counter() - started_at)
+            span.set_attribute("http.response.status_code", response.status_code)
+            return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    一時的なエラー（タイムアウト、接続エラー、429、5xx）の場合に、
+    指数バックオフ（full jitter）で再試行するトランスポート
+
+    冪等なGET、HEADリクエストのみ再試行する。
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        retries: int,
+        backoff: float,
+        max_backoff: float,
+    ) -> None:
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def _get_delay(self, attempt: int, retry_after: float | None) -> float:
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.max_backoff)
+
+        return random.uniform(0, min(self.backoff * 2**attempt, self.max_backoff))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in ("GET", "HEAD"):
+            return await self.transport.handle_async_request(request)
+
+        attempt = 0
+        while True:
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if self.retries <= attempt:
+                    raise
+
+                await asyncio.sleep(self._get_delay(attempt=attempt, retry_after=None))
+                attempt += 1
+                continue
+
+            if (
+                response.status_code not in RETRY_STATUS_CODES
+                or self.retries <= attempt
+            ):
+                return response
+
+            retry_after = _get_retry_after(response=response)
+            await response.aclose()
+
+            await asyncio.sleep(
+                self._get_delay(attempt=attempt, retry_after=retry_after)
+            )
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    各配信サイトへのリクエストに共有するHTTPクライアントを作成する。
+
+    接続はプールされ、取得のたびにDNS解決やTLSハンドシェイクが発生しないように再利用される。
+    """
+    return httpx.AsyncClient(
+        transport=RetryTransport(
+            transport=InstrumentedTransport(
+                transport=httpx.AsyncHTTPTransport(
+                    http2=settings.http2,
+                    limits=httpx.Limits(
+                        max_connections=settings.http_max_connections,
+                        max_keepalive_connections=settings.http_max_keepalive_connections,
+                    ),
+                ),
+            ),
+            retries=settings.http_retries,
+            backoff=settings.http_retry_backoff,
+            max_backoff=settings.http_retry_max_backoff,
+        ),
+        timeout=httpx.Timeout(
+            settings.http_read_timeout,
+            connect=settings.http_connect_timeout,
+        ),
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    http_client = request.app.state.http_client
+    if not isinstance(http_client, httpx.AsyncClient):
+        raise RuntimeError("HTTP client is not initialized")
+
+    return http_client
@@ -0,0 +1,51 @@
+import json
+import logging
+from datetime import UTC, datetime
+from typing import Any, Literal
+
+from opentelemetry import trace
+
+LogFormat = Literal["text", "json"]
+
+TEXT_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class JsonLogFormatter(logging.Formatter):
+    """
+    ログを1行のJSONとして出力する
+
+    トレースの実行中の場合、trace_id、span_idを含める。
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        log: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, tz=UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            log["trace_id"] = trace.format_trace_id(span_context.trace_id)
+            log["span_id"] = trace.format_span_id(span_context.span_id)
+
+        if record.exc_info is not None:
+            log["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(log, ensure_ascii=False)
+
+
+def setup_logging(log_format: LogFormat) -> None:
+    handler = logging.StreamHandler()
+    if log_format == "json":
+        handler.setFormatter(JsonLogFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_LOG_FORMAT))
+
+    logging.basicConfig(level=logging.INFO, handlers=[handler])
+
+    # httpxはリクエストごとにURL（APIキーを含むクエリパラメータ）をINFOで出力するため、
+    # 警告以上のみ出力する
+    for logger_name in ("httpx", "httpcore"):
+        logging.getLogger(logger_name).setLevel(logging.WARNING)
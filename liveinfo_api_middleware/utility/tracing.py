@@ -0,0 +1,102 @@
+import time
+from collections.abc import Awaitable, Callable
+from typing import Literal
+
+from fastapi import Request, Response
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+)
+from opentelemetry.trace import SpanKind
+
+from .version import get_version
+
+TracingExporter = Literal["none", "console", "otlp"]
+"""
+トレースの出力先
+
+- none: 出力しない
+- console: 標準出力
+- otlp: OTLP/HTTP（OTEL_EXPORTER_OTLP_ENDPOINTなどの環境変数で設定する）
+"""
+
+tracer = trace.get_tracer(__name__)
+
+
+def _create_span_exporter(exporter: TracingExporter) -> SpanExporter:
+    if exporter == "console":
+        return ConsoleSpanExporter()
+
+    try:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+    except ImportError as error:
+        raise RuntimeError(
+            "TRACING_EXPORTER=otlp requires the 'otlp' extra: "
+            "pip install liveinfo-api-middleware[otlp]"
+        ) from error
+
+    return OTLPSpanExporter()
+
+
+def setup_tracing(exporter: TracingExporter) -> TracerProvider | None:
+    """
+    トレースの出力を設定する。
+
+    出力しない場合、各モジュールのスパンは何もしない（no-op）。
+    """
+    if exporter == "none":
+        return None
+
+    tracer_provider = TracerProvider(
+        resource=Resource.create(
+            {
+                "service.name": "liveinfo_api_middleware",
+                "service.version": get_version(),
+            }
+        ),
+    )
+    tracer_provider.add_span_processor(
+        BatchSpanProcessor(_create_span_exporter(exporter=exporter)),
+    )
+    trace.set_tracer_provider(tracer_provider)
+
+    return tracer_provider
+
+
+async def trace_request(
+    request: Request,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    """
+    リクエストごとにスパンを作成するミドルウェア
+    """
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}",
+        kind=SpanKind.SERVER,
+        attributes={
+            "http.request.method": request.method,
+            "url.path": request.url.path,
+        },
+    ) as span:
+        started_at = time.perf_counter()
+        response = await call_next(request)
+
+        # パスパラメータを含まない、ルートのパスをスパン名にする
+        route_path = getattr(request.scope.get("route"), "path", None)
+        if isinstance(route_path, str):
+            span.update_name(f"{request.method} {route_path}")
+            span.set_attribute("http.route", route_path)
+
+        span.set_attribute("http.response.status_code", response.status_code)
+        span.set_attribute(
+            "liveinfo.time_to_first_byte",
+            time.perf_counter() - started_at,
+        )
+
+        return response
@@ -0,0 +1,94 @@
+from typing import Literal
+
+import httpx
+from opentelemetry import trace
+from pydantic import BaseModel, ValidationError
+
+tracer = trace.get_tracer(__name__)
+
+UpstreamErrorKind = Literal[
+    "quota_exceeded",
+    "rate_limited",
+    "server_error",
+    "client_error",
+    "timeout",
+    "network",
+    "malformed",
+]
+"""
+配信サイトからの取得に失敗した原因の分類
+"""
+
+
+class UpstreamError(Exception):
+    """
+    配信サイトからの取得の失敗
+
+    失敗した場合に空の配信情報を返すと、正常な配信情報が上書きされてしまうため、
+    例外として扱う。
+    """
+
+    def __init__(self, kind: UpstreamErrorKind, message: str) -> None:
+        super().__init__(message)
+        self.kind = kind
+
+    def __repr__(self) -> str:
+        return f"UpstreamError(kind={self.kind!r}, message={str(self)!r})"
+
+
+def classify_upstream_error(error: BaseException) -> UpstreamErrorKind | None:
+    if isinstance(error, UpstreamError):
+        return error.kind
+
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+
+    if isinstance(error, httpx.TransportError):
+        return "network"
+
+    return None
+
+
+def get_upstream_error_kind(status_code: int) -> UpstreamErrorKind:
+    if status_code == 429:
+        return "rate_limited"
+
+    if 500 <= status_code:
+        return "server_error"
+
+    return "client_error"
+
+
+def create_upstream_status_error(
+    response: httpx.Response,
+    kind: UpstreamErrorKind | None = None,
+) -> UpstreamError:
+    # APIキーを含むクエリパラメータは、エラー情報（/v1/status）に含めない
+    url = response.request.url.copy_with(query=None)
+    return UpstreamError(
+        kind=kind or get_upstream_error_kind(status_code=response.status_code),
+        message=f"{url} returned {response.status_code}: {response.text[:200]}",
+    )
+
+
+def raise_for_upstream_status(response: httpx.Response) -> None:
+    if not response.is_success:
+        raise create_upstream_status_error(response=response)
+
+
+def parse_upstream_response[T: BaseModel](
+    response: httpx.Response,
+    content_type: type[T],
+) -> T:
+    try:
+        with tracer.start_as_current_span(f"parse {content_type.__name__}"):
+            return content_type.model_validate_json(response.content)
+    except ValidationError as error:
+        url = response.request.url.copy_with(query=None)
+        raise UpstreamError(
+            kind="malformed",
+            message=(
+                f"{url} returned a malformed payload "
+                f"({error.error_count()} validation errors)"
+            ),
+        ) from error
@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.cache_backend import MemoryCacheBackend
+from liveinfo_api_middleware.dump import DumpWriter
+from liveinfo_api_middleware.router.aggregate import create_aggregate_router
+from liveinfo_api_middleware.schedule import LiveProgram
+from liveinfo_api_middleware.settings import Settings, get_settings
+from liveinfo_api_middleware.snapshot import create_snapshot
+from liveinfo_api_middleware.source import IntervalPolicy, Source, SourceRegistry
+from liveinfo_api_middleware.state import SourceState, State, get_state
+from liveinfo_api_middleware.utility.upstream_error import UpstreamError
+
+INTERVAL = timedelta(minutes=1)
+
+
+class Live(BaseModel):
+    title: str
+
+
+class FakeSource(Source[Live]):
+    content_type = Live
+    not_found_detail = "Test Live not found"
+
+    def __init__(
+        self,
+        name: str,
+        fetch_content: Callable[[], Awaitable[Live]],
+        enabled: bool = True,
+    ) -> None:
+        self.name = name
+        self.path = f"/v1/{name}"
+        self.event = name
+        self.fetch_content = fetch_content
+        self.enabled = enabled
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return self.enabled
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return f"{self.name}.json"
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        return IntervalPolicy(
+            interval=INTERVAL,
+            min_interval=INTERVAL,
+            max_interval=INTERVAL,
+        )
+
+    def get_programs(self, content: Live) -> list[LiveProgram]:
+        return []
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: State,
+        http_client: httpx.AsyncClient,
+    ) -> Live:
+        return await self.fetch_content()
+
+
+async def _fetch_ok() -> Live:
+    return Live(title="配信")
+
+
+async def _fetch_error() -> Live:
+    raise UpstreamError(kind="server_error", message="Internal Server Error")
+
+
+async def _fetch_slow() -> Live:
+    await asyncio.sleep(60)
+    return Live(title="遅い配信")
+
+
+def _create_app(sources: list[FakeSource], state: State, settings: Settings) -> FastAPI:
+    registry = SourceRegistry()
+    for source in sources:
+        registry.register(source)
+
+    app = FastAPI()
+    app.include_router(create_aggregate_router(sources=registry))
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_state] = lambda: state
+    app.state.http_client = httpx.AsyncClient()
+    return app
+
+
+def _create_state(sources: list[FakeSource]) -> State:
+    cache_backend = MemoryCacheBackend()
+    return State(
+        source_states={source.name: SourceState[Live]() for source in sources},
+        item_snapshots={},
+        cache_backend=cache_backend,
+        dump_writer=DumpWriter(cache_backend=cache_backend),
+    )
+
+
+async def _get_all(
+    sources: list[FakeSource],
+    settings: Settings,
+    prepare: Callable[[State], None] | None = None,
+    revalidate: bool = True,
+) -> httpx.Response:
+    state = _create_state(sources=sources)
+    if prepare is not None:
+        prepare(state)
+
+    app = _create_app(sources=sources, state=state, settings=settings)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app),
+        base_url="http://testserver",
+    ) as client:
+        response = await client.get("/v1/all")
+        if revalidate:
+            # 同じ内容のレスポンスのETagで再検証する
+            revalidated = await client.get(
+                "/v1/all",
+                headers={"If-None-Match": response.headers["ETag"]},
+            )
+            assert revalidated.status_code == 304
+            assert revalidated.headers["ETag"] == response.headers["ETag"]
+
+    await app.state.http_client.aclose()
+    return response
+
+
+def _request_settings(**kwargs: Any) -> Settings:
+    # リクエスト時に取得する
+    return Settings(background_refresh=False, **kwargs)
+
+
+def test_all_returns_partial_results() -> None:
+    sources = [
+        FakeSource(name="ok", fetch_content=_fetch_ok),
+        FakeSource(name="error", fetch_content=_fetch_error),
+        FakeSource(name="disabled", fetch_content=_fetch_ok, enabled=False),
+    ]
+
+    response = asyncio.run(_get_all(sources=sources, settings=_request_settings()))
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "ok": {
+            "status": "ok",
+            "fetchedAt": response.json()["ok"]["fetchedAt"],
+            "etag": response.json()["ok"]["etag"],
+            "content": {"title": "配信"},
+        },
+        "error": {"status": "unavailable", "error": "server_error"},
+    }
+
+
+def test_all_reports_missing_source_without_refresh() -> None:
+    # バックグラウンドで取得する場合、リクエスト時には取得しない
+    sources = [FakeSource(name="missing", fetch_content=_fetch_ok)]
+
+    response = asyncio.run(_get_all(sources=sources, settings=Settings()))
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "missing": {"status": "unavailable", "error": "not_found"},
+    }
+
+
+def test_all_stops_waiting_at_source_deadline() -> None:
+    sources = [
+        FakeSource(name="ok", fetch_content=_fetch_ok),
+        FakeSource(name="slow", fetch_content=_fetch_slow),
+        FakeSource(name="stale", fetch_content=_fetch_slow),
+    ]
+
+    def prepare(state: State) -> None:
+        # 取得間隔を過ぎた配信情報
+        fetched_at = datetime.now(tz=UTC) - INTERVAL * 2
+        sources[2].get_source_state(state=state).record_success(
+            snapshot=create_snapshot(
+                content=Live(title="古い配信"), fetched_at=fetched_at
+            ),
+            now=fetched_at,
+        )
+
+    settings = _request_settings(all_source_deadline=0.2, stale_while_revalidate=False)
+    started_at = time.monotonic()
+    response = asyncio.run(
+        _get_all(
+            sources=sources,
+            settings=settings,
+            prepare=prepare,
+            # 打ち切った取得が完了していないため、再検証しない
+            revalidate=False,
+        )
+    )
+    elapsed = time.monotonic() - started_at
+
+    assert elapsed < 5.0
+    assert response.status_code == 200
+    result = response.json()
+    assert result["ok"]["status"] == "ok"
+    assert result["slow"] == {"status": "unavailable", "error": "timeout"}
+    assert result["stale"]["status"] == "stale"
+    assert result["stale"]["error"] == "timeout"
+    assert result["stale"]["content"] == {"title": "古い配信"}
+
+
+def test_all_splices_serialized_content() -> None:
+    sources = [
+        FakeSource(name="a", fetch_content=_fetch_ok),
+        FakeSource(name="b", fetch_content=_fetch_error),
+    ]
+
+    response = asyncio.run(_get_all(sources=sources, settings=_request_settings()))
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/json"
+
+    # 埋め込んだ配信情報を含めて、JSONとして解釈できる
+    result = json.loads(response.content)
+    assert list(result) == ["a", "b"]
+    assert result["a"]["content"] == Live(title="配信").model_dump()
+    assert "content" not in result["b"]
+
+    etag = hashlib.sha256(response.content).hexdigest()[:32]
+    assert response.headers["ETag"] == f'"{etag}"'
+    # 最も早く期限切れになるソースに合わせる
+    max_age = int(response.headers["Cache-Control"].removeprefix("max-age="))
+    assert 0 < max_age <= INTERVAL.total_seconds()
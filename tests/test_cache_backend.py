@@ -0,0 +1,216 @@
+import asyncio
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import fakeredis
+import pytest
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.cache_backend import (
+    CacheBackend,
+    RedisCacheBackend,
+    SqliteCacheBackend,
+)
+from liveinfo_api_middleware.circuit_breaker import CircuitBreakerPolicy
+from liveinfo_api_middleware.dump import DumpWriter
+from liveinfo_api_middleware.refresher import refresh
+from liveinfo_api_middleware.state import SourceState
+
+CreateCacheBackend = Callable[[], CacheBackend]
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def create_cache_backend(
+    request: pytest.FixtureRequest,
+    tmp_path: Path,
+) -> Iterator[CreateCacheBackend]:
+    """
+    同じ保存先を共有する（別のプロセスを模した）保存先を作成する
+    """
+    redis_server = fakeredis.FakeServer()
+    cache_backends: list[CacheBackend] = []
+
+    def create() -> CacheBackend:
+        cache_backend: CacheBackend
+        if request.param == "sqlite":
+            cache_backend = SqliteCacheBackend(
+                database_path=str(tmp_path / "cache.sqlite3"),
+            )
+        else:
+            redis_cache_backend = RedisCacheBackend(
+                url="redis://localhost:6379/0",
+                key_prefix="test:",
+            )
+            redis_cache_backend._client = fakeredis.FakeRedis(server=redis_server)
+            cache_backend = redis_cache_backend
+
+        cache_backends.append(cache_backend)
+        return cache_backend
+
+    yield create
+
+    for cache_backend in cache_backends:
+        cache_backend.close()
+
+
+def test_dump_key_changes_on_write_and_touch(
+    create_cache_backend: CreateCacheBackend,
+) -> None:
+    writer = create_cache_backend()
+    reader = create_cache_backend()
+    now = datetime.now(tz=UTC)
+
+    assert reader.get_dump_key(name="test") is None
+    assert reader.read_dump(name="test") is None
+    assert writer.touch_dump(name="test", updated_at=now) is None
+
+    written_key = writer.write_dump(name="test", content=b'{"a":1}', updated_at=now)
+    assert reader.get_dump_key(name="test") == written_key
+    assert reader.read_dump(name="test") == (b'{"a":1}', written_key)
+
+    touched_key = writer.touch_dump(name="test", updated_at=now + timedelta(1))
+    assert touched_key is not None
+    assert touched_key != written_key
+    assert reader.get_dump_key(name="test") == touched_key
+    assert reader.read_dump(name="test") == (b'{"a":1}', touched_key)
+
+    # 同じ更新時刻でも、内容のサイズが変われば別のキーになる
+    rewritten_key = writer.write_dump(
+        name="test",
+        content=b'{"a":10}',
+        updated_at=now + timedelta(1),
+    )
+    assert rewritten_key != touched_key
+    assert reader.get_dump_key(name="test") == rewritten_key
+
+
+def test_quarantine_dump(create_cache_backend: CreateCacheBackend) -> None:
+    cache_backend = create_cache_backend()
+    cache_backend.write_dump(
+        name="test",
+        content=b"corrupt",
+        updated_at=datetime.now(tz=UTC),
+    )
+
+    quarantine_name = cache_backend.quarantine_dump(name="test")
+
+    assert quarantine_name is not None
+    assert quarantine_name.startswith("test.corrupt-")
+    assert cache_backend.get_dump_key(name="test") is None
+    quarantined = cache_backend.read_dump(name=quarantine_name)
+    assert quarantined is not None
+    assert quarantined[0] == b"corrupt"
+
+
+def test_quarantine_dump_twice_in_same_second(
+    create_cache_backend: CreateCacheBackend,
+) -> None:
+    cache_backend = create_cache_backend()
+
+    quarantine_names = []
+    for content in (b"corrupt1", b"corrupt2"):
+        cache_backend.write_dump(
+            name="test",
+            content=content,
+            updated_at=datetime.now(tz=UTC),
+        )
+        quarantine_name = cache_backend.quarantine_dump(name="test")
+        assert quarantine_name is not None
+        quarantine_names.append(quarantine_name)
+
+    # 以前に退避したダンプを上書きしない
+    assert quarantine_names[0] != quarantine_names[1]
+    for quarantine_name, content in zip(
+        quarantine_names,
+        (b"corrupt1", b"corrupt2"),
+        strict=True,
+    ):
+        quarantined = cache_backend.read_dump(name=quarantine_name)
+        assert quarantined is not None
+        assert quarantined[0] == content
+
+
+def test_lease_acquire_renew_and_expire(
+    create_cache_backend: CreateCacheBackend,
+) -> None:
+    holder = create_cache_backend()
+    other = create_cache_backend()
+    ttl = timedelta(milliseconds=200)
+
+    assert holder.acquire_lease(name="test", ttl=ttl)
+    assert not other.acquire_lease(name="test", ttl=ttl)
+
+    # リースを持つプロセスは延長できる
+    assert holder.acquire_lease(name="test", ttl=ttl)
+    assert not other.acquire_lease(name="test", ttl=ttl)
+
+    # リースはソースごと
+    assert other.acquire_lease(name="other", ttl=ttl)
+
+    # 期限が切れると、他のプロセスが引き継ぐ
+    time.sleep(ttl.total_seconds() * 2)
+    assert other.acquire_lease(name="test", ttl=ttl)
+    assert not holder.acquire_lease(name="test", ttl=ttl)
+
+
+class Live(BaseModel):
+    title: str
+
+
+async def _refresh_two_processes(
+    create_cache_backend: CreateCacheBackend,
+) -> tuple[list[SourceState[Live]], int]:
+    fetch_count = 0
+
+    async def fetch_content() -> Live:
+        nonlocal fetch_count
+        fetch_count += 1
+        return Live(title="配信")
+
+    source_states: list[SourceState[Live]] = []
+    for _ in range(2):
+        cache_backend = create_cache_backend()
+        dump_writer = DumpWriter(cache_backend=cache_backend)
+        dump_writer_task = asyncio.create_task(dump_writer.run())
+        source_state = SourceState[Live]()
+        try:
+            await refresh(
+                source_state=source_state,
+                name="test",
+                content_type=Live,
+                interval=timedelta(minutes=1),
+                fetch_content=fetch_content,
+                circuit_breaker_policy=CircuitBreakerPolicy(
+                    failure_threshold=1,
+                    reset_timeout=timedelta(minutes=5),
+                ),
+                cache_backend=cache_backend,
+                dump_writer=dump_writer,
+            )
+        finally:
+            # 次のプロセスが読み込めるように、ダンプを書き込んでおく
+            dump_writer_task.cancel()
+            await asyncio.gather(dump_writer_task, return_exceptions=True)
+            await dump_writer.close()
+
+        source_states.append(source_state)
+
+    return source_states, fetch_count
+
+
+def test_only_lease_holder_fetches(create_cache_backend: CreateCacheBackend) -> None:
+    (holder, other), fetch_count = asyncio.run(
+        _refresh_two_processes(create_cache_backend=create_cache_backend)
+    )
+
+    assert fetch_count == 1
+    assert holder.upstream_fetches == 1
+    assert other.upstream_fetches == 0
+
+    # リースを持たないプロセスは、共有されたダンプを読み込む
+    assert holder.snapshot is not None
+    assert other.snapshot is not None
+    assert other.snapshot.etag == holder.snapshot.etag
+    assert other.snapshot.content == Live(title="配信")
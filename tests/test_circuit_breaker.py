@@ -0,0 +1,95 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from liveinfo_api_middleware.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerPolicy,
+    CircuitOpenError,
+)
+
+POLICY = CircuitBreakerPolicy(failure_threshold=3, reset_timeout=timedelta(minutes=5))
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _open_circuit(circuit_breaker: CircuitBreaker) -> None:
+    for _ in range(POLICY.failure_threshold):
+        circuit_breaker.before_call(now=NOW)
+        circuit_breaker.record_failure(now=NOW, kind="server_error", policy=POLICY)
+
+
+def test_opens_after_failure_threshold() -> None:
+    circuit_breaker = CircuitBreaker()
+
+    for _ in range(POLICY.failure_threshold - 1):
+        circuit_breaker.before_call(now=NOW)
+        circuit_breaker.record_failure(now=NOW, kind="server_error", policy=POLICY)
+        assert circuit_breaker.state == "closed"
+
+    circuit_breaker.before_call(now=NOW)
+    circuit_breaker.record_failure(now=NOW, kind="server_error", policy=POLICY)
+
+    assert circuit_breaker.state == "open"
+    assert circuit_breaker.open_until == NOW + POLICY.reset_timeout
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call(now=NOW + timedelta(minutes=1))
+
+
+def test_success_resets_consecutive_failures() -> None:
+    circuit_breaker = CircuitBreaker()
+
+    for _ in range(POLICY.failure_threshold - 1):
+        circuit_breaker.record_failure(now=NOW, kind="timeout", policy=POLICY)
+    circuit_breaker.record_success()
+    circuit_breaker.record_failure(now=NOW, kind="timeout", policy=POLICY)
+
+    assert circuit_breaker.state == "closed"
+    assert circuit_breaker.consecutive_failures == 1
+
+
+def test_half_open_after_reset_timeout() -> None:
+    circuit_breaker = CircuitBreaker()
+    _open_circuit(circuit_breaker)
+
+    circuit_breaker.before_call(now=NOW + POLICY.reset_timeout)
+
+    assert circuit_breaker.state == "half_open"
+
+
+def test_half_open_success_closes() -> None:
+    circuit_breaker = CircuitBreaker()
+    _open_circuit(circuit_breaker)
+    circuit_breaker.before_call(now=NOW + POLICY.reset_timeout)
+
+    circuit_breaker.record_success()
+
+    assert circuit_breaker.state == "closed"
+    assert circuit_breaker.consecutive_failures == 0
+    assert circuit_breaker.open_until is None
+    circuit_breaker.before_call(now=NOW + POLICY.reset_timeout)
+
+
+def test_half_open_failure_reopens() -> None:
+    circuit_breaker = CircuitBreaker()
+    _open_circuit(circuit_breaker)
+    half_open_at = NOW + POLICY.reset_timeout
+    circuit_breaker.before_call(now=half_open_at)
+
+    # 連続した失敗の回数によらず、1回の失敗で遮断する
+    circuit_breaker.record_failure(now=half_open_at, kind="timeout", policy=POLICY)
+
+    assert circuit_breaker.state == "open"
+    assert circuit_breaker.open_until == half_open_at + POLICY.reset_timeout
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call(now=half_open_at)
+
+
+def test_quota_exceeded_opens_immediately() -> None:
+    circuit_breaker = CircuitBreaker()
+
+    circuit_breaker.before_call(now=NOW)
+    circuit_breaker.record_failure(now=NOW, kind="quota_exceeded", policy=POLICY)
+
+    assert circuit_breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_call(now=NOW)
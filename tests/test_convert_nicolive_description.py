@@ -0,0 +1,62 @@
+import pytest
+
+from liveinfo_api_middleware.site.nicolive.convert_nicolive_description import (
+    convert_nicolive_description,
+)
+
+# 期待値は、以前のBeautifulSoup（beautifulsoup4==4.14.3、html5lib==1.1）による変換
+# （brを改行に置き換えてからtextを取り出す）の結果を記録したもの
+DESCRIPTIONS = [
+    ("配信します<br>よろしくお願いします", "配信します\nよろしくお願いします"),
+    ("1行目<br/>2行目<br />3行目</br>4行目", "1行目\n2行目\n3行目\n4行目"),
+    ("末尾の改行<br><br>", "末尾の改行\n\n"),
+    ("行1\r\n行2\r行3", "行1\n行2\n行3"),
+    ('<font color="#ff0000"><b>赤い<i>太字</i></b></font>の説明', "赤い太字の説明"),
+    (
+        '<a href="https://example.com/?a=1&amp;b=2" target="_blank">リンク</a>です',
+        "リンクです",
+    ),
+    ("<u>下線</u><s>取り消し</s>", "下線取り消し"),
+    ("  \n <b>先頭の空白</b> は消える", "先頭の空白 は消える"),
+    (
+        "&amp; &lt;tag&gt; &quot;q&quot; &#12354; &#x3042; &nbsp; &copy &unknown;",
+        '& <tag> "q" あ あ \xa0 © &unknown;',
+    ),
+    ("<script>var a = '<br>' && b;</script>後", "var a = '<br>' && b;後"),
+    ("<style>p { color: red; }</style>後", "p { color: red; }後"),
+    ("<script>閉じられていない <b>x", "閉じられていない <b>x"),
+    ("<!-- コメント -->本文<!-- 閉じられていない", "本文"),
+    ("<!-->空のコメント<!--->", "空のコメント"),
+    ("<p>閉じられていない <b>太字<br>行", "閉じられていない 太字\n行"),
+    ("a < b > c", "a < b > c"),
+    ("本文<", "本文<"),
+    ("本文 <b", "本文 "),
+    ("</p>終了タグのみ", "終了タグのみ"),
+    ("本文\x00NUL", "本文NUL"),
+    ("<textarea><b>x</b> &amp; <br>y</textarea>z", "<b>x</b> & <br>yz"),
+    ("<textarea>\n先頭の改行</textarea>", "先頭の改行"),
+    ("<textarea/><b>x</b>", "<b>x</b>"),
+    ("<title><b>x</b> &amp; <br>y</title>z", "<b>x</b> & <br>yz"),
+    ("<title>a</title foo>b", "ab"),
+    ("<xmp><b>x</b> &amp; <br>y</xmp>z", "<b>x</b> &amp; <br>yz"),
+    ("<iframe><b>x</b><br>y</iframe>z", "<b>x</b><br>yz"),
+    ("<noembed><b>x</b></noembed>z", "<b>x</b>z"),
+    ("<noframes><b>x</b></noframes>z", "<b>x</b>z"),
+    ("<plaintext><b>x</b><br>y</plaintext>z", "<b>x</b><br>y</plaintext>z"),
+    ("<noscript><b>x</b><br>y</noscript>z", "x\nyz"),
+    ("<script>a\x00b</script>", "a\ufffdb"),
+    ("<pre>\n先頭の改行</pre>", "先頭の改行"),
+    ("<pre></b>\n先頭の改行</pre>", "先頭の改行"),
+    ("<pre><!-- c -->\n改行</pre>", "\n改行"),
+    ("<listing>\n先頭の改行</listing>", "先頭の改行"),
+    ("<svg><title><b>x</b></title></svg>z", "xz"),
+    ("<svg><style><b>x</b></style>\x00</svg>", "x"),
+    ("<svg><title><textarea><b>x</b></textarea></title></svg>", "<b>x</b>"),
+    ("<math><title><style><b>x</b></style></title></math>", "x"),
+    ("<svg><p><style><b>x</b></style></svg>", "<b>x</b>"),
+]
+
+
+@pytest.mark.parametrize(("description_html", "expected"), DESCRIPTIONS)
+def test_convert_nicolive_description(description_html: str, expected: str) -> None:
+    assert convert_nicolive_description(description_html) == expected
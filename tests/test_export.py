@@ -0,0 +1,244 @@
+import asyncio
+import gzip
+import json
+import stat
+import sys
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.cache_backend import MemoryCacheBackend, to_ns
+from liveinfo_api_middleware.dump import DumpWriter
+from liveinfo_api_middleware.export import (
+    MANIFEST_NAME,
+    Manifest,
+    StaticExporter,
+    _is_safe_key,
+    _write_file,
+)
+from liveinfo_api_middleware.schedule import LiveProgram
+from liveinfo_api_middleware.settings import Settings
+from liveinfo_api_middleware.snapshot import Snapshot, create_snapshot
+from liveinfo_api_middleware.source import IntervalPolicy, Source
+from liveinfo_api_middleware.state import SourceState, State
+
+
+class Live(BaseModel):
+    title: str
+
+
+class CachedSource(Source[Live]):
+    name = "test"
+    content_type = Live
+    path = "/v1/test"
+    event = "test"
+    not_found_detail = "Test Live not found"
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return True
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return "test.json"
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        interval = timedelta(minutes=1)
+        return IntervalPolicy(
+            interval=interval,
+            min_interval=interval,
+            max_interval=interval,
+        )
+
+    def get_programs(self, content: Live) -> list[LiveProgram]:
+        return []
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: State,
+        http_client: httpx.AsyncClient,
+    ) -> Live:
+        raise AssertionError("exporter must not fetch")
+
+
+SOURCE = CachedSource()
+
+
+def _create_exporter(output_dir: Path, settings: Settings) -> StaticExporter:
+    cache_backend = MemoryCacheBackend()
+    state = State(
+        source_states={SOURCE.name: SourceState[Live]()},
+        item_snapshots={},
+        cache_backend=cache_backend,
+        dump_writer=DumpWriter(cache_backend=cache_backend),
+    )
+    return StaticExporter(
+        output_dir=str(output_dir),
+        settings=settings,
+        state=state,
+        sources=[SOURCE],
+    )
+
+
+def _export(exporter: StaticExporter, title: str) -> Snapshot[Live]:
+    snapshot = create_snapshot(
+        content=Live(title=title),
+        fetched_at=datetime(2026, 1, 15, 12, 0, tzinfo=UTC),
+    )
+    asyncio.run(exporter.export(source=SOURCE, snapshot=snapshot, version=1))
+    return snapshot
+
+
+def test_write_file_is_atomic(tmp_path: Path) -> None:
+    path = tmp_path / "v1" / "test.json"
+    updated_at = datetime(2026, 1, 15, 12, 0, tzinfo=UTC)
+
+    _write_file(path=path, content=b'{"a":1}', updated_at=updated_at)
+    _write_file(path=path, content=b'{"a":2}', updated_at=updated_at)
+
+    assert path.read_bytes() == b'{"a":2}'
+    assert stat.S_IMODE(path.stat().st_mode) == 0o644
+    assert path.stat().st_mtime_ns == to_ns(updated_at)
+    # 一時ファイルは残らない
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_write_file_removes_temp_file_on_failure(tmp_path: Path) -> None:
+    # ディレクトリは置き換えられない
+    path = tmp_path / "test.json"
+    path.mkdir()
+
+    with pytest.raises(OSError):
+        _write_file(
+            path=path,
+            content=b'{"a":1}',
+            updated_at=datetime.now(tz=UTC),
+        )
+
+    assert path.is_dir()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_export_writes_manifest_last(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    written_paths: list[Path] = []
+
+    def write_file(path: Path, content: bytes, updated_at: datetime) -> None:
+        written_paths.append(path)
+        _write_file(path=path, content=content, updated_at=updated_at)
+
+    monkeypatch.setattr("liveinfo_api_middleware.export._write_file", write_file)
+
+    exporter = _create_exporter(output_dir=tmp_path, settings=Settings())
+    snapshot = _export(exporter=exporter, title="配信")
+
+    json_path = tmp_path / "v1" / "test.json"
+    assert written_paths == [
+        json_path.with_name("test.json.gz"),
+        json_path,
+        tmp_path / MANIFEST_NAME,
+    ]
+
+    manifest = Manifest.model_validate_json((tmp_path / MANIFEST_NAME).read_bytes())
+    exported_file = manifest.files[SOURCE.path]
+    assert exported_file.file == "v1/test.json"
+    assert exported_file.etag == snapshot.etag
+    assert exported_file.version == 1
+    assert exported_file.size == len(snapshot.content_json)
+    assert exported_file.encodings == ["gzip"]
+
+    assert json_path.read_bytes() == snapshot.content_json
+    assert json_path.stat().st_mtime_ns == to_ns(snapshot.fetched_at)
+    assert json.loads(json_path.read_bytes()) == {"title": "配信"}
+
+
+def test_export_skips_unchanged_file(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    exporter = _create_exporter(output_dir=tmp_path, settings=Settings())
+    _export(exporter=exporter, title="配信")
+
+    written_paths: list[Path] = []
+
+    def write_file(path: Path, content: bytes, updated_at: datetime) -> None:
+        written_paths.append(path)
+        _write_file(path=path, content=content, updated_at=updated_at)
+
+    monkeypatch.setattr("liveinfo_api_middleware.export._write_file", write_file)
+    _export(exporter=exporter, title="配信")
+
+    assert written_paths == [tmp_path / MANIFEST_NAME]
+
+
+@pytest.mark.parametrize(
+    ("key", "expected"),
+    [
+        ("UC1234567890", True),
+        ("user.name", True),
+        ("", False),
+        (".", False),
+        ("..", False),
+        ("../manifest", False),
+        ("a/b", False),
+        ("/absolute", False),
+    ],
+)
+def test_is_safe_key(key: str, expected: bool) -> None:
+    assert _is_safe_key(key=key) is expected
+
+
+def _decompress_gzip(content: bytes) -> bytes:
+    return gzip.decompress(content)
+
+
+def _decompress_brotli(content: bytes) -> bytes:
+    brotli = pytest.importorskip("brotli")
+    return bytes(brotli.decompress(content))
+
+
+@pytest.mark.parametrize(
+    ("extension", "decompress", "export_brotli"),
+    [
+        ("gz", _decompress_gzip, False),
+        ("br", _decompress_brotli, True),
+    ],
+)
+def test_compressed_file_matches_content_json(
+    tmp_path: Path,
+    extension: str,
+    decompress: Callable[[bytes], bytes],
+    export_brotli: bool,
+) -> None:
+    if export_brotli:
+        pytest.importorskip("brotli")
+
+    exporter = _create_exporter(
+        output_dir=tmp_path,
+        settings=Settings(export_brotli=export_brotli),
+    )
+    snapshot = _export(exporter=exporter, title="配信")
+
+    compressed_path = tmp_path / "v1" / f"test.json.{extension}"
+    assert decompress(compressed_path.read_bytes()) == snapshot.content_json
+    assert stat.S_IMODE(compressed_path.stat().st_mode) == 0o644
+    assert compressed_path.stat().st_mtime_ns == to_ns(snapshot.fetched_at)
+
+
+def test_brotli_requires_extra(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # brotliがインストールされていない環境
+    monkeypatch.setitem(sys.modules, "brotli", None)
+
+    with pytest.raises(RuntimeError, match="brotli"):
+        _create_exporter(
+            output_dir=tmp_path,
+            settings=Settings(export_brotli=True),
+        )
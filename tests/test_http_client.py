@@ -0,0 +1,196 @@
+import asyncio
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from liveinfo_api_middleware.utility import http_client as http_client_module
+from liveinfo_api_middleware.utility.http_client import RetryTransport
+
+URL = "https://example.com/api"
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+@pytest.fixture
+def delays(monkeypatch: pytest.MonkeyPatch) -> list[float]:
+    """
+    再試行までの待ち時間を記録する（実際には待たない）
+    """
+    recorded: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        recorded.append(delay)
+
+    monkeypatch.setattr(f"{http_client_module.__name__}.asyncio.sleep", sleep)
+    return recorded
+
+
+def _create_handler(responses: list[httpx.Response | Exception]) -> Handler:
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+
+        return response
+
+    return handler
+
+
+def _request(
+    handler: Handler,
+    method: str = "GET",
+    retries: int = 2,
+    backoff: float = 0.5,
+    max_backoff: float = 10.0,
+) -> httpx.Response:
+    async def request() -> httpx.Response:
+        async with httpx.AsyncClient(
+            transport=RetryTransport(
+                transport=httpx.MockTransport(handler),
+                retries=retries,
+                backoff=backoff,
+                max_backoff=max_backoff,
+            ),
+        ) as http_client:
+            return await http_client.request(method, URL)
+
+    return asyncio.run(request())
+
+
+def test_retries_transient_status_until_success(delays: list[float]) -> None:
+    responses: list[httpx.Response | Exception] = [
+        httpx.Response(503),
+        httpx.Response(500),
+        httpx.Response(200),
+    ]
+
+    response = _request(_create_handler(responses))
+
+    assert response.status_code == 200
+    assert len(responses) == 0
+    assert len(delays) == 2
+
+
+def test_returns_last_response_after_retries(delays: list[float]) -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(502)
+
+    response = _request(handler, retries=2)
+
+    assert response.status_code == 502
+    assert calls == 3
+    assert len(delays) == 2
+
+
+def test_does_not_retry_client_error(delays: list[float]) -> None:
+    responses: list[httpx.Response | Exception] = [httpx.Response(404)]
+
+    response = _request(_create_handler(responses))
+
+    assert response.status_code == 404
+    assert delays == []
+
+
+def test_does_not_retry_non_idempotent_method(delays: list[float]) -> None:
+    responses: list[httpx.Response | Exception] = [httpx.Response(503)]
+
+    response = _request(_create_handler(responses), method="POST")
+
+    assert response.status_code == 503
+    assert delays == []
+
+
+def test_retries_transport_error_then_raises(delays: list[float]) -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        raise httpx.ConnectError("connection refused", request=request)
+
+    with pytest.raises(httpx.ConnectError):
+        _request(handler, retries=2)
+
+    assert calls == 3
+    assert len(delays) == 2
+
+
+def test_exponential_backoff_is_capped(
+    delays: list[float],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # full jitterの上限を待つ
+    monkeypatch.setattr(
+        f"{http_client_module.__name__}.random.uniform",
+        lambda lower, upper: upper,
+    )
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(500)
+
+    _request(handler, retries=4, backoff=0.5, max_backoff=3.0)
+
+    assert delays == [0.5, 1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize(
+    ("retry_after", "expected_delay"),
+    [
+        ("2", 2.0),
+        # max_backoffを超える場合は、max_backoffまで待つ
+        ("60", 5.0),
+    ],
+)
+def test_retry_after_seconds(
+    delays: list[float],
+    retry_after: str,
+    expected_delay: float,
+) -> None:
+    responses: list[httpx.Response | Exception] = [
+        httpx.Response(429, headers={"Retry-After": retry_after}),
+        httpx.Response(200),
+    ]
+
+    response = _request(_create_handler(responses), max_backoff=5.0)
+
+    assert response.status_code == 200
+    assert delays == [expected_delay]
+
+
+def test_retry_after_http_date(delays: list[float]) -> None:
+    retry_at = datetime.now(tz=UTC) + timedelta(seconds=30)
+    responses: list[httpx.Response | Exception] = [
+        httpx.Response(
+            503,
+            headers={"Retry-After": format_datetime(retry_at, usegmt=True)},
+        ),
+        httpx.Response(200),
+    ]
+
+    response = _request(_create_handler(responses), max_backoff=60.0)
+
+    assert response.status_code == 200
+    assert len(delays) == 1
+    assert 28.0 <= delays[0] <= 30.0
+
+
+def test_retry_after_in_the_past_does_not_wait(delays: list[float]) -> None:
+    retry_at = datetime.now(tz=UTC) - timedelta(minutes=1)
+    responses: list[httpx.Response | Exception] = [
+        httpx.Response(
+            503,
+            headers={"Retry-After": format_datetime(retry_at, usegmt=True)},
+        ),
+        httpx.Response(200),
+    ]
+
+    _request(_create_handler(responses))
+
+    assert delays == [0.0]
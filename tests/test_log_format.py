@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import get_args
+
+import httpx
+import pytest
+
+from liveinfo_api_middleware.utility.log_format import LogFormat, setup_logging
+
+API_KEY = "secret-api-key"
+
+
+async def _request_with_api_key() -> None:
+    async with httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200)),
+    ) as http_client:
+        response = await http_client.get(
+            "https://www.googleapis.com/youtube/v3/videos",
+            params={"id": "video", "key": API_KEY},
+        )
+        response.raise_for_status()
+
+
+@pytest.mark.parametrize("log_format", get_args(LogFormat))
+def test_api_key_is_not_logged(
+    log_format: LogFormat,
+    caplog: pytest.LogCaptureFixture,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    # アプリケーションと同じく、INFO以上を出力する
+    caplog.set_level(logging.INFO)
+    setup_logging(log_format=log_format)
+
+    asyncio.run(_request_with_api_key())
+
+    captured = capsys.readouterr()
+    assert API_KEY not in caplog.text
+    assert API_KEY not in captured.out
+    assert API_KEY not in captured.err
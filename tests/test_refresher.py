@@ -0,0 +1,164 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.cache_backend import FileCacheBackend
+from liveinfo_api_middleware.circuit_breaker import CircuitBreakerPolicy
+from liveinfo_api_middleware.dump import DumpWriter
+from liveinfo_api_middleware.refresher import fetch_and_dump, run_dump_watcher
+from liveinfo_api_middleware.router.snapshot_stream import (
+    create_snapshot_stream_response,
+)
+from liveinfo_api_middleware.schedule import LiveProgram
+from liveinfo_api_middleware.settings import Settings
+from liveinfo_api_middleware.snapshot import create_snapshot
+from liveinfo_api_middleware.source import IntervalPolicy, Source, SourceRegistry
+from liveinfo_api_middleware.state import SourceState, State
+
+
+class Live(BaseModel):
+    title: str
+
+
+class DumpOnlySource(Source[Live]):
+    """
+    取得専用のプロセスが書き込んだダンプのみを読み込むソース
+    """
+
+    name = "test"
+    content_type = Live
+    path = "/v1/test"
+    event = "test"
+    not_found_detail = "Test Live not found"
+
+    def __init__(self, dump_path: Path) -> None:
+        self.dump_path = dump_path
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return True
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return str(self.dump_path)
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        interval = timedelta(minutes=1)
+        return IntervalPolicy(
+            interval=interval,
+            min_interval=interval,
+            max_interval=interval,
+        )
+
+    def get_programs(self, content: Live) -> list[LiveProgram]:
+        return []
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: State,
+        http_client: httpx.AsyncClient,
+    ) -> Live:
+        raise AssertionError("server role must not fetch")
+
+
+async def _watch_dump_and_stream(tmp_path: Path) -> bytes:
+    source = DumpOnlySource(dump_path=tmp_path / "test.json")
+    settings = Settings(process_role="server", dump_check_interval=0.01)
+    sources = SourceRegistry()
+    sources.register(source)
+
+    dump_paths = {source.name: source.get_dump_path(settings=settings)}
+    cache_backend = FileCacheBackend(dump_paths=dump_paths)
+    state = State(
+        source_states={source.name: SourceState[Live]()},
+        item_snapshots={},
+        cache_backend=cache_backend,
+        dump_writer=DumpWriter(cache_backend=cache_backend),
+    )
+
+    response = create_snapshot_stream_response(
+        source_state=source.get_source_state(state=state),
+        get_item=lambda snapshot: snapshot,
+        event=source.event,
+        last_event_id=None,
+        queue_size=settings.stream_queue_size,
+        heartbeat_interval=60.0,
+    )
+
+    watcher_task = asyncio.create_task(
+        run_dump_watcher(settings=settings, state=state, sources=sources)
+    )
+    next_event = asyncio.ensure_future(anext(aiter(response.body_iterator)))
+    try:
+        # 取得専用のプロセスによるダンプの書き込み
+        snapshot = create_snapshot(
+            content=Live(title="配信"),
+            fetched_at=datetime.now(tz=UTC),
+        )
+        FileCacheBackend(dump_paths=dump_paths).write_dump(
+            name=source.name,
+            content=snapshot.content_json,
+            updated_at=snapshot.fetched_at,
+        )
+
+        event = await asyncio.wait_for(next_event, timeout=5.0)
+    finally:
+        next_event.cancel()
+        watcher_task.cancel()
+        await asyncio.gather(next_event, watcher_task, return_exceptions=True)
+
+    assert isinstance(event, bytes)
+    return event
+
+
+def test_dump_watcher_pushes_external_dump_to_stream(tmp_path: Path) -> None:
+    event = asyncio.run(_watch_dump_and_stream(tmp_path=tmp_path))
+
+    assert event.startswith(b"id: ")
+    assert b"event: test\n" in event
+    assert b"data: " + Live(title="配信").model_dump_json().encode() in event
+
+
+async def _fetch_and_fail_dump() -> SourceState[Live]:
+    # ダンプの保存先が設定されていないため、書き込みに失敗する
+    cache_backend = FileCacheBackend(dump_paths={})
+    dump_writer = DumpWriter(cache_backend=cache_backend)
+    source_state = SourceState[Live]()
+
+    async def fetch_content() -> Live:
+        return Live(title="配信")
+
+    await fetch_and_dump(
+        source_state=source_state,
+        name="test",
+        fetch_content=fetch_content,
+        now=datetime.now(tz=UTC),
+        circuit_breaker_policy=CircuitBreakerPolicy(
+            failure_threshold=1,
+            reset_timeout=timedelta(minutes=5),
+        ),
+        dump_writer=dump_writer,
+    )
+
+    dump_writer_task = asyncio.create_task(dump_writer.run())
+    try:
+        async with asyncio.timeout(5.0):
+            while source_state.dump_errors == 0:
+                await asyncio.sleep(0.01)
+    finally:
+        dump_writer_task.cancel()
+        await asyncio.gather(dump_writer_task, return_exceptions=True)
+        await dump_writer.close()
+
+    return source_state
+
+
+def test_dump_write_failure_is_not_upstream_error() -> None:
+    source_state = asyncio.run(_fetch_and_fail_dump())
+
+    assert source_state.dump_errors == 1
+    assert source_state.last_error is None
+    assert not source_state.is_revalidation_failed()
+    assert source_state.get_circuit_state() == "closed"
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+from liveinfo_api_middleware.schedule import get_adaptive_interval
+
+NOW = datetime(2026, 1, 15, 12, 0, tzinfo=UTC)
+INTERVAL = timedelta(seconds=60)
+MIN_INTERVAL = timedelta(seconds=30)
+MAX_INTERVAL = timedelta(seconds=900)
+START_WINDOW = timedelta(minutes=10)
+IDLE_BACKOFF = timedelta(hours=1)
+
+
+@dataclass
+class Program:
+    title: str | None = None
+    url: str | None = None
+    startTime: str | None = None
+    endTime: str | None = None
+    isOnair: bool | None = None
+
+
+def _get_interval(*programs: Program) -> timedelta:
+    return get_adaptive_interval(
+        programs=programs,
+        now=NOW,
+        interval=INTERVAL,
+        min_interval=MIN_INTERVAL,
+        max_interval=MAX_INTERVAL,
+        start_window=START_WINDOW,
+        idle_backoff=IDLE_BACKOFF,
+    )
+
+
+def _isoformat(delta: timedelta) -> str:
+    return (NOW + delta).isoformat()
+
+
+def test_onair_uses_min_interval() -> None:
+    program = Program(
+        startTime=_isoformat(-timedelta(days=1)),
+        isOnair=True,
+    )
+
+    assert _get_interval(program) == MIN_INTERVAL
+
+
+def test_near_start_time_uses_min_interval() -> None:
+    for delta in (
+        START_WINDOW,
+        timedelta(minutes=1),
+        -timedelta(minutes=1),
+        -START_WINDOW,
+    ):
+        program = Program(startTime=_isoformat(delta), isOnair=False)
+        assert _get_interval(program) == MIN_INTERVAL
+
+
+def test_idle_without_programs_uses_interval() -> None:
+    assert _get_interval() == INTERVAL
+
+
+def test_recently_ended_uses_interval() -> None:
+    program = Program(
+        startTime=_isoformat(-timedelta(hours=2)),
+        endTime=_isoformat(-IDLE_BACKOFF + timedelta(seconds=1)),
+        isOnair=False,
+    )
+
+    assert _get_interval(program) == INTERVAL
+
+
+def test_idle_interval_doubles_per_backoff() -> None:
+    for doublings in range(4):
+        program = Program(
+            startTime=_isoformat(-timedelta(days=1)),
+            endTime=_isoformat(-IDLE_BACKOFF * doublings),
+            isOnair=False,
+        )
+        assert _get_interval(program) == INTERVAL * (2**doublings)
+
+
+def test_idle_interval_follows_latest_program() -> None:
+    programs = [
+        Program(endTime=_isoformat(-timedelta(days=30)), isOnair=False),
+        Program(endTime=_isoformat(-timedelta(minutes=30)), isOnair=False),
+    ]
+
+    assert _get_interval(*programs) == INTERVAL
+
+
+def test_idle_interval_is_clamped_to_max_interval() -> None:
+    program = Program(
+        startTime=_isoformat(-timedelta(days=366)),
+        endTime=_isoformat(-timedelta(days=365)),
+        isOnair=False,
+    )
+
+    assert _get_interval(program) == MAX_INTERVAL
+
+
+def test_upcoming_start_time_caps_interval() -> None:
+    programs = [
+        Program(endTime=_isoformat(-timedelta(days=1)), isOnair=False),
+        Program(startTime=_isoformat(START_WINDOW + INTERVAL * 2), isOnair=False),
+    ]
+
+    # 開始予定時刻のSTART_WINDOW前までに取得する
+    assert _get_interval(*programs) == INTERVAL * 2
+
+
+def test_upcoming_start_time_is_clamped_to_min_interval() -> None:
+    program = Program(
+        startTime=_isoformat(START_WINDOW + timedelta(seconds=1)),
+        isOnair=False,
+    )
+
+    assert _get_interval(program) == MIN_INTERVAL
+
+
+def test_invalid_program_time_is_ignored() -> None:
+    programs = [
+        Program(startTime="invalid", endTime="", isOnair=False),
+        # タイムゾーンのない日時
+        Program(startTime=(NOW - timedelta(days=1)).replace(tzinfo=None).isoformat()),
+    ]
+
+    assert _get_interval(*programs) == INTERVAL
@@ -0,0 +1,256 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.cache_backend import DumpKey
+from liveinfo_api_middleware.router.snapshot_response import (
+    create_snapshot_response,
+    get_max_stale,
+)
+from liveinfo_api_middleware.settings import Settings
+from liveinfo_api_middleware.snapshot import (
+    Snapshot,
+    SnapshotItemCache,
+    create_snapshot,
+)
+from liveinfo_api_middleware.state import SourceState
+
+
+class Item(BaseModel):
+    title: str
+
+
+class Items(BaseModel):
+    items: dict[str, Item]
+
+
+def test_item_snapshot_follows_parent_fetched_at() -> None:
+    item_cache = SnapshotItemCache[Item]()
+    content = Items(items={"a": Item(title="配信")})
+    now = datetime.now(tz=UTC)
+
+    first_parent = create_snapshot(content=content, fetched_at=now - timedelta(hours=1))
+    first_item = item_cache.get(
+        parent=first_parent,
+        key="a",
+        get_item=lambda parent_content: parent_content.items.get("a"),
+    )
+
+    # 内容が変化しない取得
+    parent = create_snapshot(content=content, fetched_at=now)
+    item = item_cache.get(
+        parent=parent,
+        key="a",
+        get_item=lambda parent_content: parent_content.items.get("a"),
+    )
+
+    assert first_item is not None
+    assert item is not None
+    assert item.etag == first_item.etag
+    assert item.fetched_at == parent.fetched_at
+    assert item.last_modified == parent.last_modified
+
+
+def test_item_response_is_not_stale_after_refresh_with_identical_content() -> None:
+    item_cache = SnapshotItemCache[Item]()
+    content = Items(items={"a": Item(title="配信")})
+    now = datetime.now(tz=UTC)
+    interval = timedelta(minutes=1)
+
+    source_state = SourceState[Items]()
+    for fetched_at in (now - timedelta(hours=1), now):
+        parent = create_snapshot(content=content, fetched_at=fetched_at)
+        source_state.record_success(snapshot=parent, now=fetched_at)
+        item = item_cache.get(
+            parent=parent,
+            key="a",
+            get_item=lambda parent_content: parent_content.items.get("a"),
+        )
+
+    assert item is not None
+    response = create_snapshot_response(
+        snapshot=item,
+        source_state=source_state,
+        if_none_match=None,
+        interval=interval,
+        max_stale=timedelta(seconds=30),
+    )
+
+    assert response.status_code == 200
+    assert "Warning" not in response.headers
+    assert int(response.headers["Age"]) < interval.total_seconds()
+    assert source_state.stale_responses == 0
+
+
+def test_max_age_follows_dump_fetched_at_without_fetching() -> None:
+    # serverロールのAPIサーバは取得せず、ダンプから配信情報を読み込む
+    now = datetime.now(tz=UTC)
+    interval = timedelta(minutes=1)
+
+    source_state = SourceState[Items]()
+    snapshot = create_snapshot(
+        content=Items(items={}),
+        fetched_at=now - timedelta(seconds=20),
+    )
+    source_state.record_dump(
+        snapshot=snapshot,
+        dump_key=DumpKey(updated_at_ns=1, size=len(snapshot.content_json)),
+    )
+
+    response = create_snapshot_response(
+        snapshot=snapshot,
+        source_state=source_state,
+        if_none_match=None,
+        interval=interval,
+        max_stale=None,
+    )
+
+    max_age = int(response.headers["Cache-Control"].removeprefix("max-age="))
+    assert 0 < max_age <= 40
+
+
+INTERVAL = timedelta(minutes=1)
+MAX_STALE = timedelta(minutes=5)
+
+
+def _create_source_state(
+    age: timedelta,
+) -> tuple[Snapshot[Items], SourceState[Items]]:
+    fetched_at = datetime.now(tz=UTC) - age
+    snapshot = create_snapshot(
+        content=Items(items={"a": Item(title="配信")}),
+        fetched_at=fetched_at,
+    )
+    source_state = SourceState[Items]()
+    source_state.record_success(snapshot=snapshot, now=fetched_at)
+    return snapshot, source_state
+
+
+def test_fresh_response_has_age_without_warning() -> None:
+    snapshot, source_state = _create_source_state(age=timedelta(seconds=20))
+
+    response = create_snapshot_response(
+        snapshot=snapshot,
+        source_state=source_state,
+        if_none_match=None,
+        interval=INTERVAL,
+        max_stale=MAX_STALE,
+    )
+
+    assert response.status_code == 200
+    assert response.body == snapshot.content_json
+    assert response.headers["ETag"] == snapshot.etag
+    assert 20 <= int(response.headers["Age"]) < 30
+    assert "Warning" not in response.headers
+    assert response.headers["Cache-Control"].endswith(", stale-if-error=300")
+    assert source_state.stale_responses == 0
+
+
+def test_response_past_interval_is_stale() -> None:
+    snapshot, source_state = _create_source_state(age=INTERVAL * 2)
+
+    response = create_snapshot_response(
+        snapshot=snapshot,
+        source_state=source_state,
+        if_none_match=None,
+        interval=INTERVAL,
+        max_stale=MAX_STALE,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Warning"] == '110 - "Response is Stale"'
+    assert response.headers["Cache-Control"].startswith("max-age=0,")
+    assert int(response.headers["Age"]) >= INTERVAL.total_seconds() * 2
+    assert source_state.stale_responses == 1
+
+
+def test_response_after_failed_revalidation() -> None:
+    snapshot, source_state = _create_source_state(age=timedelta(seconds=20))
+    source_state.record_error(
+        error=RuntimeError("upstream error"),
+        now=datetime.now(tz=UTC),
+    )
+
+    response = create_snapshot_response(
+        snapshot=snapshot,
+        source_state=source_state,
+        if_none_match=None,
+        interval=INTERVAL,
+        max_stale=MAX_STALE,
+    )
+
+    # 取得間隔を過ぎていなくても、取得の失敗を通知する
+    assert response.status_code == 200
+    assert response.headers["Warning"] == '111 - "Revalidation Failed"'
+    assert source_state.stale_responses == 1
+
+
+def test_response_past_max_stale_is_unavailable() -> None:
+    snapshot, source_state = _create_source_state(
+        age=INTERVAL + MAX_STALE + timedelta(seconds=1)
+    )
+
+    with pytest.raises(HTTPException) as exc_info:
+        create_snapshot_response(
+            snapshot=snapshot,
+            source_state=source_state,
+            if_none_match=None,
+            interval=INTERVAL,
+            max_stale=MAX_STALE,
+        )
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "1"}
+
+
+def test_response_without_max_stale_is_never_unavailable() -> None:
+    snapshot, source_state = _create_source_state(age=timedelta(days=1))
+
+    response = create_snapshot_response(
+        snapshot=snapshot,
+        source_state=source_state,
+        if_none_match=None,
+        interval=INTERVAL,
+        max_stale=None,
+    )
+
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "max-age=0"
+    assert response.headers["Warning"] == '110 - "Response is Stale"'
+
+
+def test_matching_if_none_match_returns_not_modified() -> None:
+    snapshot, source_state = _create_source_state(age=timedelta(seconds=20))
+
+    for if_none_match in (
+        snapshot.etag,
+        f"W/{snapshot.etag}",
+        f'"other", {snapshot.etag}',
+        "*",
+    ):
+        response = create_snapshot_response(
+            snapshot=snapshot,
+            source_state=source_state,
+            if_none_match=if_none_match,
+            interval=INTERVAL,
+            max_stale=MAX_STALE,
+        )
+        assert response.status_code == 304
+        assert response.body == b""
+        assert response.headers["ETag"] == snapshot.etag
+
+    response = create_snapshot_response(
+        snapshot=snapshot,
+        source_state=source_state,
+        if_none_match='"other"',
+        interval=INTERVAL,
+        max_stale=MAX_STALE,
+    )
+    assert response.status_code == 200
+
+
+def test_get_max_stale() -> None:
+    assert get_max_stale(settings=Settings(max_stale=0)) is None
+    assert get_max_stale(settings=Settings(max_stale=30)) == timedelta(seconds=30)
@@ -0,0 +1,273 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from liveinfo_api_middleware.cache_backend import MemoryCacheBackend
+from liveinfo_api_middleware.dump import DumpWriter
+from liveinfo_api_middleware.router.source import create_source_router
+from liveinfo_api_middleware.schedule import LiveProgram
+from liveinfo_api_middleware.settings import Settings, get_settings
+from liveinfo_api_middleware.snapshot import create_snapshot
+from liveinfo_api_middleware.source import IntervalPolicy, Source
+from liveinfo_api_middleware.state import SourceState, State, get_state
+
+INTERVAL = timedelta(minutes=1)
+
+
+class Live(BaseModel):
+    title: str
+
+
+class CachedSource(Source[Live]):
+    """
+    バックグラウンドで取得した配信情報のみを返すソース
+    """
+
+    name = "test"
+    content_type = Live
+    path = "/v1/test"
+    event = "test"
+    not_found_detail = "Test Live not found"
+
+    def is_enabled(self, settings: Settings) -> bool:
+        return True
+
+    def get_dump_path(self, settings: Settings) -> str:
+        return "test.json"
+
+    def get_interval_policy(self, settings: Settings) -> IntervalPolicy:
+        return IntervalPolicy(
+            interval=INTERVAL,
+            min_interval=INTERVAL,
+            max_interval=INTERVAL,
+        )
+
+    def get_programs(self, content: Live) -> list[LiveProgram]:
+        return []
+
+    async def fetch(
+        self,
+        settings: Settings,
+        state: State,
+        http_client: httpx.AsyncClient,
+    ) -> Live:
+        raise AssertionError("background refresh must not fetch on request")
+
+
+SOURCE = CachedSource()
+
+
+@asynccontextmanager
+async def _create_client(
+    settings: Settings,
+    history_size: int = 100,
+) -> AsyncIterator[tuple[httpx.AsyncClient, SourceState[Live]]]:
+    cache_backend = MemoryCacheBackend()
+    state = State(
+        source_states={SOURCE.name: SourceState[Live](history_size=history_size)},
+        item_snapshots={},
+        cache_backend=cache_backend,
+        dump_writer=DumpWriter(cache_backend=cache_backend),
+    )
+
+    app = FastAPI()
+    app.include_router(create_source_router(source=SOURCE))
+    app.dependency_overrides[get_settings] = lambda: settings
+    app.dependency_overrides[get_state] = lambda: state
+
+    async with (
+        httpx.AsyncClient() as http_client,
+        httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://testserver",
+        ) as client,
+    ):
+        app.state.http_client = http_client
+        yield client, SOURCE.get_source_state(state=state)
+
+
+def _record(source_state: SourceState[Live], title: str) -> str:
+    now = datetime.now(tz=UTC)
+    snapshot = create_snapshot(content=Live(title=title), fetched_at=now)
+    source_state.record_success(snapshot=snapshot, now=now)
+    return snapshot.etag
+
+
+async def _wait_for_waiters(source_state: SourceState[Any], count: int) -> None:
+    async with asyncio.timeout(5.0):
+        while source_state.get_waiter_count() < count:
+            await asyncio.sleep(0.01)
+
+
+async def _wait_returns_on_change() -> tuple[httpx.Response, float]:
+    async with _create_client(settings=Settings()) as (client, source_state):
+        etag = _record(source_state=source_state, title="配信")
+
+        started_at = time.monotonic()
+        request = asyncio.create_task(
+            client.get(
+                SOURCE.path,
+                params={"wait": 30},
+                headers={"If-None-Match": etag},
+            )
+        )
+        await _wait_for_waiters(source_state=source_state, count=1)
+        _record(source_state=source_state, title="新しい配信")
+
+        response = await asyncio.wait_for(request, timeout=5.0)
+        return response, time.monotonic() - started_at
+
+
+def test_wait_returns_early_on_change() -> None:
+    response, elapsed = asyncio.run(_wait_returns_on_change())
+
+    assert elapsed < 5.0
+    assert response.status_code == 200
+    assert response.json() == {"title": "新しい配信"}
+    assert response.headers["X-Snapshot-Version"] == "2"
+
+
+async def _wait_with_version() -> tuple[httpx.Response, float]:
+    async with _create_client(settings=Settings()) as (client, source_state):
+        _record(source_state=source_state, title="配信")
+
+        started_at = time.monotonic()
+        response = await client.get(SOURCE.path, params={"wait": 30, "version": 0})
+        return response, time.monotonic() - started_at
+
+
+def test_wait_returns_immediately_on_version_mismatch() -> None:
+    response, elapsed = asyncio.run(_wait_with_version())
+
+    assert elapsed < 5.0
+    assert response.status_code == 200
+    assert response.json() == {"title": "配信"}
+
+
+async def _wait_times_out() -> tuple[httpx.Response, float]:
+    async with _create_client(settings=Settings()) as (client, source_state):
+        etag = _record(source_state=source_state, title="配信")
+
+        started_at = time.monotonic()
+        response = await client.get(
+            SOURCE.path,
+            params={"wait": 0.2},
+            headers={"If-None-Match": etag},
+        )
+        return response, time.monotonic() - started_at
+
+
+def test_wait_times_out_without_change() -> None:
+    response, elapsed = asyncio.run(_wait_times_out())
+
+    assert response.status_code == 304
+    assert 0.2 <= elapsed < 5.0
+
+
+async def _exceed_max_waiters() -> tuple[httpx.Response, httpx.Response]:
+    settings = Settings(long_poll_max_waiters=1)
+    async with _create_client(settings=settings) as (client, source_state):
+        etag = _record(source_state=source_state, title="配信")
+        headers = {"If-None-Match": etag}
+
+        waiting = asyncio.create_task(
+            client.get(SOURCE.path, params={"wait": 30}, headers=headers)
+        )
+        await _wait_for_waiters(source_state=source_state, count=1)
+
+        rejected = await client.get(SOURCE.path, params={"wait": 30}, headers=headers)
+
+        _record(source_state=source_state, title="新しい配信")
+        return rejected, await asyncio.wait_for(waiting, timeout=5.0)
+
+
+def test_wait_rejects_requests_over_max_waiters() -> None:
+    rejected, waiting = asyncio.run(_exceed_max_waiters())
+
+    assert rejected.status_code == 503
+    assert rejected.headers["Retry-After"] == "1"
+    assert waiting.status_code == 200
+
+
+async def _get_histories(sinces: list[int | None]) -> list[dict[str, Any]]:
+    async with _create_client(settings=Settings(), history_size=2) as (
+        client,
+        source_state,
+    ):
+        for index in range(4):
+            _record(source_state=source_state, title=f"配信{index}")
+
+        histories = []
+        for since in sinces:
+            params = {"since": since} if since is not None else {}
+            response = await client.get(f"{SOURCE.path}/history", params=params)
+            assert response.status_code == 200
+            histories.append(response.json())
+
+        return histories
+
+
+def test_history_since_is_truncated() -> None:
+    # 保持する2件（バージョン3、4）より前の変更履歴は破棄されている
+    (
+        all_history,
+        truncated_history,
+        history,
+        restarted_history,
+    ) = asyncio.run(_get_histories(sinces=[None, 1, 2, 10]))
+
+    assert all_history["version"] == 4
+    assert all_history["truncated"]
+    assert [entry["version"] for entry in all_history["entries"]] == [3, 4]
+
+    assert truncated_history["truncated"]
+    assert [entry["version"] for entry in truncated_history["entries"]] == [3, 4]
+
+    assert not history["truncated"]
+    assert [entry["version"] for entry in history["entries"]] == [3, 4]
+
+    # 再起動により、sinceが現在のバージョンより新しい場合は待たずに返す
+    assert restarted_history == {"version": 4, "truncated": True, "entries": []}
+
+
+async def _wait_for_history(
+    change: bool,
+) -> tuple[dict[str, Any], float]:
+    settings = Settings(history_wait_timeout=0.2 if not change else 30.0)
+    async with _create_client(settings=settings) as (client, source_state):
+        _record(source_state=source_state, title="配信")
+
+        started_at = time.monotonic()
+        request = asyncio.create_task(
+            client.get(f"{SOURCE.path}/history", params={"since": 1})
+        )
+        if change:
+            await _wait_for_waiters(source_state=source_state, count=1)
+            _record(source_state=source_state, title="新しい配信")
+
+        response = await asyncio.wait_for(request, timeout=5.0)
+        assert response.status_code == 200
+        return response.json(), time.monotonic() - started_at
+
+
+def test_history_wait_returns_on_change() -> None:
+    history, elapsed = asyncio.run(_wait_for_history(change=True))
+
+    assert elapsed < 5.0
+    assert history["version"] == 2
+    assert not history["truncated"]
+    assert [entry["version"] for entry in history["entries"]] == [2]
+
+
+def test_history_wait_times_out() -> None:
+    history, elapsed = asyncio.run(_wait_for_history(change=False))
+
+    assert 0.2 <= elapsed < 5.0
+    assert history == {"version": 1, "truncated": False, "entries": []}
@@ -0,0 +1,139 @@
+from datetime import UTC, datetime, timedelta
+
+from liveinfo_api_middleware.site.ytlive import YtliveQuotaTracker
+
+INTERVAL = timedelta(seconds=60)
+
+
+def test_scope_counts_units_per_call() -> None:
+    tracker = YtliveQuotaTracker()
+
+    with tracker.scope(name="ytlive", interval=INTERVAL) as quota_scope:
+        quota_scope.record(api="search")
+        quota_scope.record(api="videos")
+        quota_scope.record(api="videos")
+
+    assert quota_scope.units == 102
+    assert tracker.get_used(now=datetime.now(tz=UTC)) == 102
+    assert tracker.get_total_by_api() == {"search": 100, "videos": 2}
+
+
+def test_used_resets_at_pacific_midnight() -> None:
+    tracker = YtliveQuotaTracker()
+
+    # 2026-01-15 23:59 PST
+    tracker.record(api="search", now=datetime(2026, 1, 16, 7, 59, tzinfo=UTC))
+    assert tracker.get_used(now=datetime(2026, 1, 16, 7, 59, 59, tzinfo=UTC)) == 100
+
+    # 2026-01-16 00:00 PST
+    assert tracker.get_used(now=datetime(2026, 1, 16, 8, 0, tzinfo=UTC)) == 0
+
+    # 起動してからの合計は、リセットされない
+    assert tracker.get_total_by_api() == {"search": 100}
+
+
+def test_used_resets_at_pacific_midnight_across_dst() -> None:
+    tracker = YtliveQuotaTracker()
+
+    # 2026-03-08 02:00 PSTに夏時間が始まるため、翌日の0時はUTCの7時
+    tracker.record(api="videos", now=datetime(2026, 3, 8, 8, 0, tzinfo=UTC))
+    assert tracker.get_used(now=datetime(2026, 3, 9, 6, 59, tzinfo=UTC)) == 1
+    assert tracker.get_used(now=datetime(2026, 3, 9, 7, 0, tzinfo=UTC)) == 0
+
+    # 2026-11-01 02:00 PDTに夏時間が終わるため、翌日の0時はUTCの8時
+    tracker.record(api="videos", now=datetime(2026, 11, 1, 7, 0, tzinfo=UTC))
+    assert tracker.get_used(now=datetime(2026, 11, 2, 7, 59, tzinfo=UTC)) == 1
+    assert tracker.get_used(now=datetime(2026, 11, 2, 8, 0, tzinfo=UTC)) == 0
+
+
+def _record_refresh(tracker: YtliveQuotaTracker, units: int) -> None:
+    # 1回の取得で消費するユニットを記録する（記録した日の消費量は、別の日には数えない）
+    with tracker.scope(name="ytlive", interval=INTERVAL) as quota_scope:
+        for _ in range(units):
+            quota_scope.record(api="videos")
+
+
+def test_safe_interval_keeps_interval_within_budget() -> None:
+    tracker = YtliveQuotaTracker()
+    _record_refresh(tracker=tracker, units=1)
+
+    # 2026-01-15 12:00 PST（リセットまで12時間、720回で720ユニット）
+    now = datetime(2026, 1, 15, 20, 0, tzinfo=UTC)
+
+    assert (
+        tracker.get_safe_interval(
+            name="ytlive",
+            interval=INTERVAL,
+            now=now,
+            daily_budget=10000,
+        )
+        == INTERVAL
+    )
+
+
+def test_safe_interval_scales_with_remaining_budget() -> None:
+    tracker = YtliveQuotaTracker()
+    _record_refresh(tracker=tracker, units=100)
+
+    # 2026-01-15 12:00 PST（リセットまで12時間、720回で72000ユニット）
+    now = datetime(2026, 1, 15, 20, 0, tzinfo=UTC)
+    interval = tracker.get_safe_interval(
+        name="ytlive",
+        interval=INTERVAL,
+        now=now,
+        daily_budget=7200,
+    )
+
+    assert interval == INTERVAL * 10
+
+
+def test_safe_interval_on_dst_start_day() -> None:
+    tracker = YtliveQuotaTracker()
+    _record_refresh(tracker=tracker, units=100)
+
+    # 2026-03-08 00:00 PST（夏時間が始まる日のため、リセットまで23時間）
+    now = datetime(2026, 3, 8, 8, 0, tzinfo=UTC)
+
+    interval = tracker.get_safe_interval(
+        name="ytlive",
+        interval=INTERVAL,
+        now=now,
+        daily_budget=13800,
+    )
+
+    # 23時間で1380回、138000ユニット
+    assert interval == INTERVAL * 10
+
+
+def test_safe_interval_waits_for_reset_when_budget_is_used_up() -> None:
+    tracker = YtliveQuotaTracker()
+    # 2026-01-15 12:00 PST
+    now = datetime(2026, 1, 15, 20, 0, tzinfo=UTC)
+    for _ in range(100):
+        tracker.record(api="search", now=now)
+
+    interval = tracker.get_safe_interval(
+        name="ytlive",
+        interval=INTERVAL,
+        now=now,
+        daily_budget=10000,
+    )
+
+    assert interval == timedelta(hours=12)
+
+
+def test_safe_interval_without_budget() -> None:
+    tracker = YtliveQuotaTracker()
+    now = datetime(2026, 1, 15, 20, 0, tzinfo=UTC)
+    for _ in range(1000):
+        tracker.record(api="search", now=now)
+
+    assert (
+        tracker.get_safe_interval(
+            name="ytlive",
+            interval=INTERVAL,
+            now=now,
+            daily_budget=0,
+        )
+        == INTERVAL
+    )